@@ -2,25 +2,39 @@ import sys
 import os
 
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
 from streamlit_extras.stylable_container import stylable_container
 import subprocess
 import time
 import json
-import threading
 import signal
 import re
 import glob
-from PIL import Image
-import io
 import pandas as pd
 from datetime import datetime
-from heartbeat import write_heartbeat
-write_heartbeat()
+from data_catalog import get_catalog
+from retention_janitor import get_janitor
+from sync_ledger import get_sync_ledger
+from image_cache import get_image_cache
+from charge_chart import charge_chart
+from station import load_station, save_station, make_slot, MAX_SLOTS, EXECUTOR_PID_FILE, EXECUTOR_SOCKET
+from state_service import StateService
+from executor_channel import send_command
+from ssh_pool import get_ssh_pool, ssh_command
+from sync_engine import get_background_syncs, Tree
+from executor_metrics import read_latest, headline, METRICS_PORT
+from reference_histogram import load_reference, comparison_label
+from result_reader import read_gain_result, read_text_value, read_charge_artifact, classify_gain, GAIN_NORMAL_RANGE, STATUS_TEXT
 
 SYNC_DATA_DIR = "synced_data/"
 os.makedirs(SYNC_DATA_DIR, exist_ok=True)
 
+@st.cache_resource
+def get_state_service():
+    """One state service per server process; every session reads its snapshots"""
+    return StateService(SYNC_DATA_DIR)
+
+get_state_service().touch()
+
 st.set_page_config(page_title="H-K R12860 Precalibration Live Data Monitoring", page_icon="📡", layout="wide")
 
 st.title("H-K R12860 Precalibration Live Data Monitoring")
@@ -59,15 +73,8 @@ defaults = {
     'hv_remote_command': 'sbatch ./HV_CHECK/RUN_HV_CHECK.slurm {SN} {HVNOMLL} {HVNOML} {HVNOM} {HVNOMH} {HVNOMHH}',
     'relative_archive': 'archive',
     'relative_flag': 'FLAG',
-    'serial_number_pmt1': '',
-    'serial_number_pmt2': '',
-    'hv_value_pmt1': '',
-    'hv_value_pmt2': '',
     'cleanup_time_hours': 24,
-    'selected_hv_plot_pmt1': None,
-    'selected_hv_plot_pmt2': None,
-    'selected_scan_plot_pmt1': None,
-    'selected_scan_plot_pmt2': None,
+    'cleanup_max_mb': 0,
     'show_overlay': False,
     'example_plot_path': 'example_data/GOOD_DATA_charge.png',
 }
@@ -75,6 +82,20 @@ for key, default in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = _uc.get(key, default)
 
+# ── Station model: one slot per PMT on the test stand ──
+STATION = load_station()
+STATION_BY_ID = {slot.pmt_id: slot for slot in STATION}
+get_state_service().track(STATION)
+for slot in STATION:
+    for key, default in [(f"serial_number_{slot.pmt_id}", ''),
+                         (f"hv_value_{slot.pmt_id}", ''),
+                         (f"selected_hv_plot_{slot.pmt_id}", None),
+                         (f"selected_hv_gain_{slot.pmt_id}", None),
+                         (f"selected_scan_plot_{slot.pmt_id}", None),
+                         (f"selected_scan_gain_{slot.pmt_id}", None)]:
+        if key not in st.session_state:
+            st.session_state[key] = default
+
 # ============================================================================
 # GLOBAL SERVER CONFIGURATION (Top of page)
 # ============================================================================
@@ -145,39 +166,54 @@ st.divider()
 # GLOBAL PMT CONFIGURATION (Above Tabs)
 # ============================================================================
 st.header("PMT Configuration")
-st.caption("Enter serial numbers for both PMTs before starting any scans")
-
-col_pmt1, col_pmt2 = st.columns(2)
+st.caption("Enter serial numbers for every PMT on the station before starting any scans")
+
+slot_count = st.number_input(
+    "PMT slots on this station",
+    min_value=1,
+    max_value=MAX_SLOTS,
+    value=len(STATION),
+    step=1,
+    key="pmt_slots_global",
+    help="Sections, executors and status below are generated per slot"
+)
+if slot_count != len(STATION):
+    # Jobs of removed slots are stopped further down, once the helpers exist
+    st.session_state.removed_slots = [slot.pmt_id for slot in STATION[slot_count:]]
+    save_station(slot_count)
+    st.rerun()
+
+PMT_COLUMNS = 4   # serial number inputs per row
+for row_start in range(0, len(STATION), PMT_COLUMNS):
+    row_slots = STATION[row_start:row_start + PMT_COLUMNS]
+    for col, slot in zip(st.columns(max(2, len(row_slots))), row_slots):
+        with col:
+            st.subheader(f"{slot.icon} {slot.label}")
+            serial_number = st.text_input(
+                f"Serial Number ({slot.label}):",
+                value=st.session_state.get(f"serial_number_{slot.pmt_id}", ""),
+                placeholder="e.g. SN12345",
+                key=f"sn_{slot.pmt_id}_global"
+            )
+            st.session_state[f"serial_number_{slot.pmt_id}"] = serial_number
 
-with col_pmt1:
-    st.subheader("🔵 PMT 1")
-    serial_number_pmt1 = st.text_input(
-        "Serial Number (PMT 1):",
-        value=st.session_state.get("serial_number_pmt1", ""),
-        placeholder="e.g. SN12345",
-        key="sn_pmt1_global"
-    )
-    st.session_state.serial_number_pmt1 = serial_number_pmt1
-    
-    if st.session_state.serial_number_pmt1.strip():
-        st.success(f"✓ PMT 1: {st.session_state.serial_number_pmt1}")
-    else:
-        st.warning("⚠️ PMT 1: Not set")
-
-with col_pmt2:
-    st.subheader("🟣 PMT 2")
-    serial_number_pmt2 = st.text_input(
-        "Serial Number (PMT 2):",
-        value=st.session_state.get("serial_number_pmt2", ""),
-        placeholder="e.g. SN67890",
-        key="sn_pmt2_global"
+            if serial_number.strip():
+                st.success(f"✓ {slot.label}: {serial_number}")
+            else:
+                st.warning(f"⚠️ {slot.label}: Not set")
+
+# Only the selected slots get full sections; status and executors cover all of them
+if len(STATION) > 2:
+    visible_ids = st.multiselect(
+        "Show sections for",
+        options=[slot.pmt_id for slot in STATION],
+        default=[slot.pmt_id for slot in STATION],
+        format_func=lambda pmt_id: STATION_BY_ID[pmt_id].label,
+        key="visible_slots"
     )
-    st.session_state.serial_number_pmt2 = serial_number_pmt2
-    
-    if st.session_state.serial_number_pmt2.strip():
-        st.success(f"✓ PMT 2: {st.session_state.serial_number_pmt2}")
-    else:
-        st.warning("⚠️ PMT 2: Not set")
+    VISIBLE_SLOTS = [slot for slot in STATION if slot.pmt_id in visible_ids]
+else:
+    VISIBLE_SLOTS = list(STATION)
 
 st.divider()
 
@@ -198,59 +234,11 @@ st.markdown("""
 """, unsafe_allow_html=True)
 tab1, tab2 = st.tabs(["⚡ High Voltage/Gain Check", "📊 Scanning Data"])
 
-CONFIG_FILE_PMT1 = "executor_config_pmt1.json"
-CONFIG_FILE_PMT2 = "executor_config_pmt2.json"
-STATUS_FILE_PMT1 = "executor_status_pmt1.json"
-STATUS_FILE_PMT2 = "executor_status_pmt2.json"
-EXECUTOR_PID_FILE_PMT1 = "executor_pid_pmt1.txt"
-EXECUTOR_PID_FILE_PMT2 = "executor_pid_pmt2.txt"
-
-# *---- Remove old data: --------------------------------------------------------------------------*
-def cleanup_old_data(directory, max_age_hours):
-    """Delete data files older than max_age_hours"""
-    if not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-        return 0
-    
-    current_time = time.time()
-    max_age_seconds = max_age_hours * 3600
-    deleted_count = 0
-    
-    png_files = glob.glob(f"{directory}/**/*.png", recursive=True)
-    txt_files = glob.glob(f"{directory}/**/*_GAIN.txt", recursive=True)
-    
-    all_files = png_files + txt_files
-    
-    for file_path in all_files:
-        try:
-            file_age = current_time - os.path.getmtime(file_path)
-            
-            if file_age > max_age_seconds:
-                os.remove(file_path)
-                deleted_count += 1
-        except Exception as e:
-            st.warning(f"Could not delete {os.path.basename(file_path)}: {str(e)}")
-    
-    # Optionally clean up empty directories
-    try:
-        for root, dirs, files in os.walk(directory, topdown=False):
-            for dir_name in dirs:
-                dir_path = os.path.join(root, dir_name)
-                try:
-                    if not os.listdir(dir_path):  # If directory is empty
-                        os.rmdir(dir_path)
-                except:
-                    pass
-    except:
-        pass
-    
-    return deleted_count
-
-
 def archive_data_on_server(remote_host, remote_dir, archive_dir):
     """Move plots and text files from remote directory to archive directory"""
+    get_ssh_pool().ensure(remote_host)
     
-    mkdir_command = f"ssh {remote_host} 'mkdir -p {archive_dir}'"
+    mkdir_command = f"{ssh_command(remote_host)} 'mkdir -p {archive_dir}'"
     
     try:
         subprocess.run(
@@ -263,7 +251,7 @@ def archive_data_on_server(remote_host, remote_dir, archive_dir):
         
         
         move_command = (
-            f"ssh {remote_host} "
+            f"{ssh_command(remote_host)} "
             f"'mv {remote_dir}/scan_output* {remote_dir}/*.log {archive_dir}/ 2>/dev/null || true'"
         )
         
@@ -284,7 +272,8 @@ def archive_data_on_server(remote_host, remote_dir, archive_dir):
 
 def flag_data_on_server(remote_host, remote_dir, flag_dir):
     """Move plots and text files from remote directory to flagged directory"""
-    mkdir_command = f"ssh {remote_host} 'mkdir -p {flag_dir}'"
+    get_ssh_pool().ensure(remote_host)
+    mkdir_command = f"{ssh_command(remote_host)} 'mkdir -p {flag_dir}'"
     
     try:
         subprocess.run(
@@ -297,7 +286,7 @@ def flag_data_on_server(remote_host, remote_dir, flag_dir):
         
         
         move_command = (
-            f"ssh {remote_host} "
+            f"{ssh_command(remote_host)} "
             f"'mv {remote_dir}/scan_output* {remote_dir}/*.log {flag_dir}/ 2>/dev/null || true'"
         )
         
@@ -318,8 +307,9 @@ def flag_data_on_server(remote_host, remote_dir, flag_dir):
     
 def archive_HV_data_on_server(remote_host, remote_dir, archive_dir):
     """Move plots and text files from remote directory to archive directory"""
+    get_ssh_pool().ensure(remote_host)
     
-    mkdir_command = f"ssh {remote_host} 'mkdir -p {archive_dir}'"
+    mkdir_command = f"{ssh_command(remote_host)} 'mkdir -p {archive_dir}'"
     
     try:
         subprocess.run(
@@ -332,7 +322,7 @@ def archive_HV_data_on_server(remote_host, remote_dir, archive_dir):
         
         
         move_command = (
-            f"ssh {remote_host} "
+            f"{ssh_command(remote_host)} "
             f"'mv {remote_dir}/HV_output* {remote_dir}/*.log {archive_dir}/ 2>/dev/null || true'"
         )
         
@@ -353,7 +343,8 @@ def archive_HV_data_on_server(remote_host, remote_dir, archive_dir):
 
 def flag_HV_data_on_server(remote_host, remote_dir, flag_dir):
     """Move plots and text files from remote directory to flagged directory"""
-    mkdir_command = f"ssh {remote_host} 'mkdir -p {flag_dir}'"
+    get_ssh_pool().ensure(remote_host)
+    mkdir_command = f"{ssh_command(remote_host)} 'mkdir -p {flag_dir}'"
     
     try:
         subprocess.run(
@@ -366,7 +357,7 @@ def flag_HV_data_on_server(remote_host, remote_dir, flag_dir):
         
         
         move_command = (
-            f"ssh {remote_host} "
+            f"{ssh_command(remote_host)} "
             f"'mv {remote_dir}/HV_output* {remote_dir}/*.log {flag_dir}/ 2>/dev/null || true'"
         )
         
@@ -386,67 +377,18 @@ def flag_HV_data_on_server(remote_host, remote_dir, flag_dir):
         return False, f"Flag error: {str(e)}"
 
 
-def sync_from_spartan(remote_host, remote_dir, local_dir="synced_data/", serial_number=None):
-    """Execute rsync command to sync files from scan_output directories AND HV_analysis directories"""
-    try:
-        # Sync from scan_output directories (existing functionality)
-        if serial_number:
-            # source_path = f"{remote_dir}/scan_output_{serial_number}/{curr_date}/"
-            source_path = f"{remote_dir}/scan_output_*/{serial_number}"
-        else:
-            source_path = f"{remote_dir}/scan_output_*/"
-        
-        rsync_command = (
-            f"rsync -avz "
-            f"--include='*/' "
-            f"--include='*_charge.png' "
-            f"--include='*_GAIN.txt' "
-            f"--exclude='*' "
-            f"{remote_host}:{source_path} {local_dir}"
-        )
-        
-        result = subprocess.run(
-            rsync_command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
-        
-        # ALSO sync HV analysis plots
-        if serial_number:
-            hv_source_path = f"{remote_dir}/HV_output_*/{serial_number}/"
-        else:
-            hv_source_path = f"{remote_dir}/HV_output_*/"
-        
-        rsync_hv_command = (
-            f"rsync -avz --include='*/' "
-            f"--include='HV_output_*/' "
-            f"--include='*/data_HV_*/' "
-            f"--include='*_charge.png' "
-            f"--include='*_GAIN.txt' "
-            f"--include='*_gain_vs_hv_loglog.png' "
-            f"--include='*_HV_at_gain_*.txt' "
-            f"--exclude='*' "
-            f"{remote_host}:{hv_source_path} {local_dir}"
-        )
-        
-        result_hv = subprocess.run(
-            rsync_hv_command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
-        
-        if result.returncode == 0 or result_hv.returncode == 0:
-            sn_msg = f" (SN: {serial_number})" if serial_number else ""
-            return True, f"Synced from scan_output_* and HV_analysis_*{sn_msg}"
-        else:
-            return False, f"Rsync failed"
-        
-    except Exception as e:
-        return False, f"Sync error: {str(e)}"
+def finish_manual_sync(result):
+    """After a manual sync: refresh the catalog and tell running jobs what arrived"""
+    get_catalog("synced_data/").refresh(force=True)
+    # Points this sync fetched before the executor's own rsync could
+    if result.files:
+        send_command(EXECUTOR_SOCKET, 'artifacts', paths=result.files)
+
+
+def start_manual_sync(key, kind, remote_host, remote_dir, serial_number=None):
+    """Sync one tree ('scan' or 'hv') in the background; progress via display_manual_sync(key)"""
+    return get_background_syncs().start(key, Tree(remote_host, remote_dir, kind), serial_number,
+                                        on_done=finish_manual_sync)
 
 
 def parse_theta_phi_from_path(filepath):
@@ -477,64 +419,22 @@ def get_slot_from_theta_phi(theta, phi):
 
 def find_files_by_theta_phi(sync_data_dir, theta, phi, serial_number=None):
     """Find PNG and TXT files for specific theta/phi coordinates"""
-    if serial_number:
-        pattern = f"{sync_data_dir}/**/{serial_number}/data_theta{theta}_phi{phi}/*_theta{theta}_phi{phi}_charge.png"
-    else:
-        pattern = f"{sync_data_dir}/**/data_theta{theta}_phi{phi}/*_theta{theta}_phi{phi}_charge.png"
-    
-    png_files = glob.glob(pattern, recursive=True)
-    
-    if not png_files:
-        return None, None
-    
-    png_file = max(png_files, key=os.path.getmtime)
-    gain_file = png_file.replace('_charge.png', '_GAIN.txt')
-    
-    if not os.path.exists(gain_file):
-        gain_file = None
-    
-    return png_file, gain_file
+    return get_catalog(sync_data_dir).scan_files(theta, phi, serial_number)
 
 def find_files_by_hv(sync_data_dir, serial_number, hv_value):
     """Find PNG and TXT files for specific HV value"""
-    # Pattern 1: Try the actual structure first
-    pattern = f"{sync_data_dir}/**/{serial_number}/data_HV_{hv_value}/*_HV_{hv_value}_charge.png"
-    png_files = glob.glob(pattern, recursive=True)
-    
-    # Pattern 2: Fallback pattern
-    if not png_files:
-        pattern = f"{sync_data_dir}/**/*{serial_number}*HV_{hv_value}*charge.png"
-        png_files = glob.glob(pattern, recursive=True)
-    
-    if not png_files:
-        return None, None
-    
-    png_file = max(png_files, key=os.path.getmtime)
-    gain_file = png_file.replace('_charge.png', '_GAIN.txt')
-    
-    if not os.path.exists(gain_file):
-        gain_file = None
-    
-    return png_file, gain_file
+    return get_catalog(sync_data_dir).hv_files(serial_number, hv_value)
 
 def get_gain_value_from_file(gain_file_path):
     """Extract gain value from gain result file"""
-    if not gain_file_path or not os.path.exists(gain_file_path):
-        return "Gain: N/A"
-    
-    try:
-        with open(gain_file_path, 'r') as f:
-            gain_str = f.read().strip()
-            try:
-                gain_val = float(gain_str)
-                return f"Gain: {gain_val:.2e}"
-            except ValueError:
-                return f"Gain: {gain_str}"
-    except Exception as e:
-        return "Gain: Error"
+    return read_gain_result(gain_file_path).label
+
+def get_slot(pmt_id):
+    """Station slot for pmt_id (also for slots removed from the station since)"""
+    return STATION_BY_ID.get(pmt_id) or make_slot(int(pmt_id[len("pmt"):]) - 1)
 
 def load_status(pmt_id="pmt1"):
-    status_file = STATUS_FILE_PMT1 if pmt_id == "pmt1" else STATUS_FILE_PMT2
+    status_file = get_slot(pmt_id).status_file
     if os.path.exists(status_file):
         try:
             with open(status_file, 'r') as f:
@@ -544,14 +444,19 @@ def load_status(pmt_id="pmt1"):
     return None
 
 def save_config(config, pmt_id="pmt1"):
-    config_file = CONFIG_FILE_PMT1 if pmt_id == "pmt1" else CONFIG_FILE_PMT2
-    with open(config_file, 'w') as f:
+    """Write the config file, then tell the executor over its socket so it acts at once"""
+    slot = get_slot(pmt_id)
+    with open(slot.config_file, 'w') as f:
         json.dump(config, f, indent=2)
+    if config.get('running'):
+        send_command(EXECUTOR_SOCKET, 'submit', pmt_id=pmt_id, config=config)
+    else:
+        send_command(EXECUTOR_SOCKET, 'stop', pmt_id=pmt_id)
+    get_state_service().invalidate()
 
-def start_background_executor(pmt_id="pmt1"):
-    config_file = CONFIG_FILE_PMT1 if pmt_id == "pmt1" else CONFIG_FILE_PMT2
-    status_file = STATUS_FILE_PMT1 if pmt_id == "pmt1" else STATUS_FILE_PMT2
-    pid_file = EXECUTOR_PID_FILE_PMT1 if pmt_id == "pmt1" else EXECUTOR_PID_FILE_PMT2
+def start_background_executor():
+    """One executor process serves every slot on the station"""
+    pid_file = EXECUTOR_PID_FILE
 
     # Only remove the PID file if the process it points to is actually dead.
     # Never remove the config or status files here — the caller writes them.
@@ -567,7 +472,7 @@ def start_background_executor(pmt_id="pmt1"):
 
     try:
         process = subprocess.Popen(
-            [sys.executable, "background_executor.py", config_file, status_file],
+            [sys.executable, "background_executor.py", EXECUTOR_SOCKET],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             start_new_session=True
@@ -578,8 +483,7 @@ def start_background_executor(pmt_id="pmt1"):
     except Exception as e:
         return False, str(e)
 
-def check_executor_running(pmt_id="pmt1"):
-    pid_file = EXECUTOR_PID_FILE_PMT1 if pmt_id == "pmt1" else EXECUTOR_PID_FILE_PMT2
+def check_executor_running(pid_file=EXECUTOR_PID_FILE):
     if not os.path.exists(pid_file):
         return False
     try:
@@ -592,8 +496,7 @@ def check_executor_running(pmt_id="pmt1"):
             os.remove(pid_file)
         return False
 
-def stop_background_executor(pmt_id="pmt1"):
-    pid_file = EXECUTOR_PID_FILE_PMT1 if pmt_id == "pmt1" else EXECUTOR_PID_FILE_PMT2
+def stop_background_executor(pid_file=EXECUTOR_PID_FILE):
     if not os.path.exists(pid_file):
         return True, "Executor not running"
     try:
@@ -607,55 +510,20 @@ def stop_background_executor(pmt_id="pmt1"):
     except Exception as e:
         return False, str(e)
 
-def get_color_from_gain(gain_file_path, normal_range=(0.999e7, 1.049e7)):
+def get_color_from_gain(gain_file_path, normal_range=GAIN_NORMAL_RANGE):
     """
     Determine color based on gain value
     Returns: 'green' for healthy, 'red' for poor, 'yellow' for no data
     """
-    if not gain_file_path or not os.path.exists(gain_file_path):
-        return 'yellow'
-    
-    try:
-        with open(gain_file_path, 'r') as f:
-            gain_str = f.read().strip()
-            gain_val = float(gain_str)
-            
-            min_normal, max_normal = normal_range
-            
-            if min_normal <= gain_val <= max_normal:
-                return 'green'
-            else:
-                return 'red'
-    except (ValueError, Exception):
-        return 'yellow'
+    return classify_gain(read_gain_result(gain_file_path).value, normal_range)
     
 def find_hv_summary_plot(sync_data_dir, serial_number):
     """Find the gain vs HV summary plot for a specific SN"""
-    # Look for the loglog plot generated by plot_gain_hv.py
-    pattern = f"{sync_data_dir}/**/{serial_number}_gain_vs_hv_loglog.png"
-    plot_files = glob.glob(pattern, recursive=True)
-    
-    if not plot_files:
-        # Try alternate pattern
-        pattern = f"{sync_data_dir}/**/*{serial_number}*gain_vs_hv*.png"
-        plot_files = glob.glob(pattern, recursive=True)
-    
-    if not plot_files:
-        return None
-    
-    # Return most recent file
-    return max(plot_files, key=os.path.getmtime)
+    return get_catalog(sync_data_dir).hv_summary_plot(serial_number)
 
 def find_hv_value_file(sync_data_dir, serial_number):
     """Find the HV value text file for gain = 1e7"""
-    pattern = f"{sync_data_dir}/**/{serial_number}_HV_at_gain_*.txt"
-    txt_files = glob.glob(pattern, recursive=True)
-    
-    if not txt_files:
-        return None
-    
-    # Return most recent file
-    return max(txt_files, key=os.path.getmtime)
+    return get_catalog(sync_data_dir).hv_value_file(serial_number)
 
 # Replace these session_state initializations:
 
@@ -704,26 +572,14 @@ if "show_overlay" not in st.session_state:
 if "example_plot_path" not in st.session_state:
     st.session_state.example_plot_path = "example_data/GOOD_DATA_charge.png"
 
-if "serial_number_pmt1" not in st.session_state:
-    st.session_state.serial_number_pmt1 = ""
-
-if "serial_number_pmt2" not in st.session_state:
-    st.session_state.serial_number_pmt2 = ""
-
-if "hv_value_pmt1" not in st.session_state:
-    st.session_state.hv_value_pmt1 = ""
-
-if "hv_value_pmt2" not in st.session_state:
-    st.session_state.hv_value_pmt2 = ""
-
-# Automatic cleanup on page load
-cleanup_old_data("synced_data/", st.session_state.cleanup_time_hours)
-
-status_pmt1 = load_status("pmt1")
-status_pmt2 = load_status("pmt2")
+# Retention runs on the janitor thread; the page only hands it the limits
+get_janitor(SYNC_DATA_DIR).configure(
+    st.session_state.cleanup_time_hours,
+    st.session_state.cleanup_max_mb * 1024 * 1024
+)
 
 def load_config_file(pmt_id="pmt1"):
-    config_file = CONFIG_FILE_PMT1 if pmt_id == "pmt1" else CONFIG_FILE_PMT2
+    config_file = get_slot(pmt_id).config_file
     if os.path.exists(config_file):
         try:
             with open(config_file, 'r') as f:
@@ -732,23 +588,44 @@ def load_config_file(pmt_id="pmt1"):
             return None
     return None
 
-config_pmt1 = load_config_file("pmt1")
-config_pmt2 = load_config_file("pmt2")
-is_running_pmt1 = bool(config_pmt1 and config_pmt1.get('running', False))
-is_running_pmt2 = bool(config_pmt2 and config_pmt2.get('running', False))
-executor_alive_pmt1 = check_executor_running("pmt1")
-executor_alive_pmt2 = check_executor_running("pmt2")
-
-if "executors_started" not in st.session_state:
-    for _pmt_id in ["pmt1", "pmt2"]:
-        if not check_executor_running(_pmt_id):
-            start_background_executor(_pmt_id)
-    st.session_state.executors_started = True
-
-# Auto-refresh if either is running
-# if is_running_pmt1 or is_running_pmt2:
-#     st_autorefresh(interval=5000, key="datarefresh")
-st_autorefresh(interval=5000, key="datarefresh")
+# Executor state comes from the shared state service, not from this session
+STATE = get_state_service().snapshot()
+IS_RUNNING = {slot.pmt_id: STATE['slots'].get(slot.pmt_id, {}).get('running', False) for slot in STATION}
+EXECUTOR_ALIVE = STATE.get('executor_alive', False)
+# Data version this run draws from; change_tick reruns the page when it moves
+st.session_state.data_version = STATE.get('data_version', 0)
+
+# Slots removed from the station: stop their jobs, the executor keeps serving the rest
+for removed_id in st.session_state.pop("removed_slots", []):
+    removed_config = load_config_file(removed_id)
+    if removed_config and removed_config.get('running'):
+        removed_config['running'] = False
+        save_config(removed_config, removed_id)
+
+# Start the executor once per session; per-PMT executors from older versions
+# would pick up the same config files, so they are stopped first
+if "executor_started" not in st.session_state:
+    for legacy_pid_file in glob.glob("executor_pid_pmt*.txt"):
+        stop_background_executor(legacy_pid_file)
+    if not EXECUTOR_ALIVE:
+        start_background_executor()
+    st.session_state.executor_started = True
+    get_state_service().invalidate()
+
+# Only the heartbeat tick and the status fragments run on a timer.  The grids
+# and plot viewers rerun with the page: on user interaction, when the synced
+# data version moves (change_tick) or when an executor's running flag flips.
+CHANGE_POLL_SECONDS     = 2    # heartbeat tick / data version check
+STATUS_REFRESH_SECONDS  = 2    # executor status / progress bars
+
+@st.fragment(run_every=CHANGE_POLL_SECONDS)
+def change_tick():
+    service = get_state_service()
+    service.touch()
+    if service.snapshot().get('data_version', 0) != st.session_state.data_version:
+        st.rerun(scope="app")
+
+change_tick()
 
 # CSS for grid buttons
 st.markdown("""
@@ -853,6 +730,7 @@ st.markdown("""
 # ============================================================================
 # HELPER FUNCTION FOR HV GRID DISPLAY
 # ============================================================================
+@st.fragment
 def display_hv_grid(pmt_id, serial_number, hv_values):
     """Display HV Check grid for a specific PMT"""
     
@@ -881,22 +759,22 @@ def display_hv_grid(pmt_id, serial_number, hv_values):
             hv_val = hv_values[hv_slot]
             
             png_file, gain_file = find_files_by_hv("synced_data", serial_number, hv_val)
+            if png_file:
+                prefetch_plot(png_file)
             
             # Simple button with label
             if st.button(hv_label, key=f"view_hv_{pmt_id}_{hv_slot}", use_container_width=True, type="primary"):
                 if png_file:
-                    if pmt_id == "pmt1":
-                        st.session_state.selected_hv_plot_pmt1 = png_file
-                        st.session_state.selected_hv_gain_pmt1 = get_gain_value_from_file(gain_file)
-                    else:
-                        st.session_state.selected_hv_plot_pmt2 = png_file
-                        st.session_state.selected_hv_gain_pmt2 = get_gain_value_from_file(gain_file)
+                    st.session_state[f"selected_hv_plot_{pmt_id}"] = png_file
+                    st.session_state[f"selected_hv_gain_{pmt_id}"] = get_gain_value_from_file(gain_file)
+                    st.rerun()
                 else:
                     st.warning(f"No data available for {hv_label.replace(chr(10), ' ')}")
                     
 # ============================================================================
 # HELPER FUNCTION FOR FULL SCAN GRID DISPLAY
 # ============================================================================
+@st.fragment
 def display_scan_grid(pmt_id, serial_number):
     """Display 21-point scan grid for a specific PMT"""
     
@@ -933,19 +811,18 @@ def display_scan_grid(pmt_id, serial_number):
         png_file, gain_file = find_files_by_theta_phi("synced_data", theta, phi, serial_number)
         
         if png_file:
-            gain_value = get_gain_value_from_file(gain_file)
-            color = get_color_from_gain(gain_file)
-            status_text = {
-                'green': 'Healthy',
-                'yellow': 'No Data',
-                'red': 'Poor'
-            }.get(color, 'No Data')
+            prefetch_plot(png_file)
+            gain_result = read_gain_result(gain_file)
+            gain_value = gain_result.label
+            color = gain_result.status
+            status_text = STATUS_TEXT.get(color, 'No Data')
             
             st.markdown(
                 f"""
                 <div class="grid-button-{color}">
                     <div>{status_text}</div>
                     <div class="gain-label">{gain_value}</div>
+                    <div class="gain-label">{comparison_label(point_comparison(png_file))}</div>
                     <div class="coordinate-label">{coord_label}</div>
                 </div>
                 """,
@@ -953,12 +830,9 @@ def display_scan_grid(pmt_id, serial_number):
             )
             
             if st.button("View", key=f"view_scan_{pmt_id}_{slot}", use_container_width=True):
-                if pmt_id == "pmt1":
-                    st.session_state.selected_scan_plot_pmt1 = png_file
-                    st.session_state.selected_scan_gain_pmt1 = gain_value
-                else:
-                    st.session_state.selected_scan_plot_pmt2 = png_file
-                    st.session_state.selected_scan_gain_pmt2 = gain_value
+                st.session_state[f"selected_scan_plot_{pmt_id}"] = png_file
+                st.session_state[f"selected_scan_gain_{pmt_id}"] = gain_value
+                st.rerun()
         else:
             st.markdown(
                 f"""
@@ -983,19 +857,18 @@ def display_scan_grid(pmt_id, serial_number):
                 png_file, gain_file = find_files_by_theta_phi("synced_data", theta, phi, serial_number)
                 
                 if png_file:
-                    gain_value = get_gain_value_from_file(gain_file)
-                    color = get_color_from_gain(gain_file)
-                    status_text = {
-                        'green': 'Healthy',
-                        'yellow': 'No Data',
-                        'red': 'Poor'
-                    }.get(color, 'No Data')
+                    prefetch_plot(png_file)
+                    gain_result = read_gain_result(gain_file)
+                    gain_value = gain_result.label
+                    color = gain_result.status
+                    status_text = STATUS_TEXT.get(color, 'No Data')
                     
                     st.markdown(
                         f"""
                         <div class="grid-button-{color}">
                             <div>{status_text}</div>
                             <div class="gain-label">{gain_value}</div>
+                            <div class="gain-label">{comparison_label(point_comparison(png_file))}</div>
                             <div class="coordinate-label">{coord_label}</div>
                         </div>
                         """,
@@ -1003,12 +876,9 @@ def display_scan_grid(pmt_id, serial_number):
                     )
                     
                     if st.button("View", key=f"view_scan_{pmt_id}_{slot}", use_container_width=True):
-                        if pmt_id == "pmt1":
-                            st.session_state.selected_scan_plot_pmt1 = png_file
-                            st.session_state.selected_scan_gain_pmt1 = gain_value
-                        else:
-                            st.session_state.selected_scan_plot_pmt2 = png_file
-                            st.session_state.selected_scan_gain_pmt2 = gain_value
+                        st.session_state[f"selected_scan_plot_{pmt_id}"] = png_file
+                        st.session_state[f"selected_scan_gain_{pmt_id}"] = gain_value
+                        st.rerun()
                 
                 else:
                     st.markdown(
@@ -1024,802 +894,611 @@ def display_scan_grid(pmt_id, serial_number):
             slot += 1
 
 # ============================================================================
-# TAB 1: HV Check (5 points × 2 PMTs)
+# HELPER FRAGMENTS FOR PLOT VIEWERS AND EXECUTOR STATUS
 # ============================================================================
-with tab1:
-    st.write("High Voltage Check")
-    
-    # # Server Configuration for HV Check
-    # with st.expander("🔧 HV Check Server Configuration"):
-    #     col_hv_config1, col_hv_config2 = st.columns(2)
-        
-    #     with col_hv_config1:
-    #         st.session_state.hv_remote_host = st.text_input(
-    #             "HV Remote Host",
-    #             value=st.session_state.hv_remote_host,
-    #             key="hv_remote_host_config"
-    #         )
-    #         st.session_state.hv_remote_directory = st.text_input(
-    #             "HV Remote Directory",
-    #             value=st.session_state.hv_remote_directory,
-    #             key="hv_remote_dir_config"
-    #         )
-        
-    #     with col_hv_config2:
-    #         st.session_state.hv_remote_command = st.text_input(
-    #             "HV Command to Execute",
-    #             value=st.session_state.hv_remote_command,
-    #             key="hv_remote_cmd_config",
-    #             help="Use placeholders: {SN}, {HVNOMLL}, {HVNOML}, {HVNOM}, {HVNOMH}, {HVNOMHH}"
-    #         )
-    #         st.caption("Available placeholders: {SN}, {HVNOMLL}, {HVNOML}, {HVNOM}, {HVNOMH}, {HVNOMHH}")
-        
-    #     col_hv_arch1, col_hv_arch2 = st.columns(2)
-    #     with col_hv_arch1:
-    #         st.session_state.hv_archive_directory = st.text_input(
-    #             "HV Archive Directory",
-    #             value=st.session_state.hv_archive_directory,
-    #             key="hv_archive_dir_config"
-    #         )
-        
-    #     with col_hv_arch2:
-    #         st.session_state.hv_flag_directory = st.text_input(
-    #             "HV Flag Directory",
-    #             value=st.session_state.hv_flag_directory,
-    #             key="hv_flag_dir_config"
-    #         )
-    
-    # st.divider()
+def embed_png(png_path):
+    """Inline a PNG at full column width (encoded once per file version)"""
+    img_data = get_image_cache().get_base64(png_path)
+    if img_data is None:
+        return
+    st.markdown(f"""
+        <div style="width: 100%;">
+            <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
+        </div>
+    """, unsafe_allow_html=True)
+
+def prefetch_plot(plot_path):
+    """Warm the image cache for a grid cell unless it will be drawn as a chart"""
+    if plot_path.endswith('.png') and not get_catalog(SYNC_DATA_DIR).artifact_file(plot_path):
+        get_image_cache().prefetch(plot_path)
+
+def point_comparison(plot_path):
+    """Shape distance / gain ratio the analysis stored for a point, if any"""
+    artifact = read_charge_artifact(get_catalog(SYNC_DATA_DIR).artifact_file(plot_path))
+    return (artifact or {}).get('reference')
+
+def show_charge_plot(plot_path, overlay=False):
+    """Interactive chart from the _charge.json artifact, else the PNG"""
+    artifact = read_charge_artifact(get_catalog(SYNC_DATA_DIR).artifact_file(plot_path))
+    if artifact is not None:
+        try:
+            reference = load_reference() if overlay else None
+            st.altair_chart(charge_chart(artifact, reference), use_container_width=True)
+            comparison = artifact.get('reference')
+            if comparison:
+                st.caption(f"vs GOOD_DATA reference: {comparison_label(comparison)}")
+            return
+        except (KeyError, TypeError, ValueError):
+            pass
+    if plot_path.endswith('.png'):
+        embed_png(plot_path)
+
+@st.fragment
+def display_hv_summary(serial_number, bg_color, fg_color):
+    """Display the gain vs HV summary plot and required HV for a specific PMT"""
+    hv_value_file = find_hv_value_file(SYNC_DATA_DIR, serial_number)
+    summary_plot = find_hv_summary_plot(SYNC_DATA_DIR, serial_number)
+
+    if summary_plot and os.path.exists(summary_plot):
+        hv_required = read_text_value(hv_value_file)
+        if hv_required:
+            st.markdown(f"""
+            <div style="text-align: center; padding: 15px; background-color: {bg_color}; border-radius: 10px; margin: 15px 0;">
+                <h3 style="color: {fg_color}; margin: 0; font-weight: bold;">Required HV: {hv_required} V</h3>
+            </div>
+            """, unsafe_allow_html=True)
+
+        embed_png(summary_plot)
+        st.caption(f"Last updated: {os.path.basename(summary_plot)}")
 
-    # PMT 1 Section
-    with stylable_container(
-        key="pmt1_hv_section",
-        css_styles="""
-            {
-                border: 2px solid #007bff;
+    else:
+        st.info("📊 Summary plot will appear here after HV Check completes")
+        st.caption("Run the HV Check and wait for all 5 points to be collected")
+
+@st.fragment
+def display_selected_plots(kind, hide_key):
+    """Display the plots picked from the HV ('hv') or scan ('scan') grids side by side"""
+    plot_key = f"selected_{kind}_plot_{{}}"
+    gain_key = f"selected_{kind}_gain_{{}}"
+
+    if not any(st.session_state[plot_key.format(slot.pmt_id)] for slot in VISIBLE_SLOTS):
+        return
+
+    st.divider()
+    st.subheader("Selected Plots")
+    overlay = False
+    if load_reference() is not None:
+        overlay = st.toggle("Overlay GOOD_DATA reference", value=st.session_state.show_overlay,
+                            key=f"show_overlay_{kind}")
+
+    for row_start in range(0, len(VISIBLE_SLOTS), 2):
+        row_slots = VISIBLE_SLOTS[row_start:row_start + 2]
+        for col, slot in zip(st.columns(2), row_slots):
+            with col:
+                pmt_id = slot.pmt_id
+                selected = st.session_state[plot_key.format(pmt_id)]
+                if selected and os.path.exists(selected):
+                    st.write(f"{slot.icon} {slot.label}")
+                    show_charge_plot(selected, overlay=overlay)
+                    st.caption(os.path.basename(selected))
+                    if st.session_state.get(gain_key.format(pmt_id)):
+                        st.info(st.session_state[gain_key.format(pmt_id)])
+                    if st.button(f"Hide Plot ({slot.label})", key=hide_key.format(pmt_id)):
+                        st.session_state[plot_key.format(pmt_id)] = None
+                        st.session_state[gain_key.format(pmt_id)] = None
+                        st.rerun(scope="fragment")
+
+@st.fragment(run_every=STATUS_REFRESH_SECONDS)
+def display_executor_status():
+    """Progress for each running PMT, from the shared state snapshot"""
+    snapshot = get_state_service().snapshot()
+    for slot in STATION:
+        pmt_label, pmt_id = slot.label, slot.pmt_id
+        slot_state = snapshot['slots'].get(pmt_id, {})
+        fresh_status, running = slot_state.get('status'), slot_state.get('running', False)
+
+        if running != IS_RUNNING[pmt_id]:
+            # Job started/finished elsewhere — buttons above need the new state
+            st.rerun(scope="app")
+
+        if running and fresh_status:
+            st.info(f"{pmt_label}: {fresh_status.get('message', 'Processing...')}")
+            if fresh_status.get('total'):
+                progress = fresh_status.get('completed', 0) / fresh_status['total']
+                st.progress(progress)
+                st.write(f"{pmt_label} Completed: {fresh_status.get('completed', 0)}/{fresh_status['total']}")
+            if fresh_status.get('next_arrival'):
+                expected = datetime.fromtimestamp(fresh_status['next_arrival']).strftime('%H:%M:%S')
+                st.caption(f"Next point expected around {expected}")
+            slurm = fresh_status.get('slurm')
+            if slurm:
+                node = f" on {slurm['node']}" if slurm.get('node') else ""
+                st.caption(f"SLURM job {slurm['job_id']}: {slurm['state']}{node} · elapsed {slurm.get('elapsed') or '0:00'}")
+
+        events = slot_state.get('events')
+        if events:
+            with st.expander(f"{pmt_label} timeline"):
+                st.text("\n".join(format_event(event) for event in reversed(events[-TIMELINE_ROWS:])))
+
+@st.fragment(run_every=STATUS_REFRESH_SECONDS)
+def display_manual_sync(key, label):
+    """Progress of the background manual sync started under key"""
+    status = get_background_syncs().status(key)
+    if status is None:
+        return
+    if status['state'] == 'running':
+        elapsed = time.time() - status['started']
+        st.info(f"🔄 Syncing {label}: {status['message']} ({status['files']} files, {elapsed:.0f}s)")
+    elif status['state'] == 'done':
+        st.success(f"✅ {status['message']} — {status['files']} files")
+    else:
+        st.warning(f"⚠️ {status['message']}")
+
+TIMELINE_ROWS = 15   # newest journal events shown per PMT
+
+def format_event(event):
+    """One journal event as a timeline line"""
+    when = datetime.fromtimestamp(event.get('ts', 0)).strftime('%H:%M:%S')
+    if event.get('kind') == 'sync':
+        detail = f"{event.get('message', '')} ({event.get('seconds', 0):.1f}s)"
+    else:
+        detail = (event.get('status') or {}).get('message', '')
+    return f"{when}  {event.get('kind', ''):<16}{detail}"
+
+# ============================================================================
+# PER-PMT SECTIONS (generated for every slot of the station)
+# ============================================================================
+def section_container(key, color):
+    return stylable_container(
+        key=key,
+        css_styles=f"""
+            {{
+                border: 2px solid {color};
                 border-radius: 10px;
                 padding: 15px;
                 margin-bottom: 20px;
-            }
+            }}
         """,
-    ):
-        st.subheader("🔵 PMT 1 - HV Configuration")
-        
-        col_left_pmt1, col_right_pmt1 = st.columns([1, 1.5])
-        
-        with col_left_pmt1:
-            # HV Input for PMT 1
-            hv_value_input_pmt1 = st.text_input(
-                "Enter Nominal HV Value (PMT 1):",
-                value=st.session_state.hv_value_pmt1,
+    )
+
+def start_button_container(key, slot):
+    return stylable_container(
+        key,
+        css_styles=f"""
+        button {{
+            background-color: {slot.color};
+            color: white;
+            border-color: {slot.color};
+            height: 80px;
+            font-size: 18px;
+            font-weight: bold;
+            white-space: pre-line;
+            line-height: 1.3;
+        }}
+        button:hover {{
+            border-color: {slot.summary_fg};
+            opacity: 0.9;
+        }}
+        """,
+    )
+
+def stop_button_container(key):
+    return stylable_container(
+        key,
+        css_styles="""
+        button {
+            background-color: #ff8c00;
+            color: white;
+            border-color: #ff8c00;
+            height: 60px;
+            font-size: 16px;
+            font-weight: bold;
+        }
+        button:hover {
+            border-color: #0066cc;
+            opacity: 0.9;
+        }
+        """,
+    )
+
+def stop_job(slot, remote_host, job_label):
+    """Flip the slot's running flag off, mark its status stopped and scancel"""
+    if os.path.exists(slot.config_file):
+        config = load_config_file(slot.pmt_id)
+        if config:
+            config["running"] = False
+            save_config(config, slot.pmt_id)
+
+    if os.path.exists(slot.status_file):
+        status = load_status(slot.pmt_id)
+        if status:
+            status["running"] = False
+            status["message"] = "Stopped by user"
+            with open(slot.status_file, "w") as f:
+                json.dump(status, f, indent=2)
+    get_state_service().invalidate()
+
+    try:
+        remote_user = remote_host.split("@")[0]
+        get_ssh_pool().ensure(remote_host)
+        cancel_cmd = f"{ssh_command(remote_host)} scancel -u {remote_user}"
+        subprocess.run(cancel_cmd, shell=True, check=True, timeout=15)
+        st.success(f"{job_label} stopped and SLURM jobs cancelled")
+    except subprocess.CalledProcessError:
+        st.warning(f"{job_label} stopped, but scancel failed")
+
+def render_hv_section(slot):
+    """HV Check controls, grid and summary for one PMT slot"""
+    pmt_id, label = slot.pmt_id, slot.label
+    serial_number = st.session_state[f"serial_number_{pmt_id}"]
+
+    with section_container(f"{pmt_id}_hv_section", slot.color):
+        st.subheader(f"{slot.icon} {label} - HV Configuration")
+
+        col_left, col_right = st.columns([1, 1.5])
+
+        with col_left:
+            hv_value_input = st.text_input(
+                f"Enter Nominal HV Value ({label}):",
+                value=st.session_state[f"hv_value_{pmt_id}"],
                 placeholder="e.g. 1800",
                 help="Nominal high voltage value (without 'V'). Scans will be done at ±100V and ±50V from this value.",
-                key="hv_input_pmt1"
+                key=f"hv_input_{pmt_id}"
             )
-            
-            st.session_state.hv_value_pmt1 = hv_value_input_pmt1
-            
+
+            st.session_state[f"hv_value_{pmt_id}"] = hv_value_input
+
             try:
-                nominal_hv_pmt1 = int(st.session_state.hv_value_pmt1.replace('V', '').replace('v', '').strip()) if st.session_state.hv_value_pmt1 else None
+                nominal_hv = int(hv_value_input.replace('V', '').replace('v', '').strip()) if hv_value_input else None
             except:
-                nominal_hv_pmt1 = None
-            
-            if nominal_hv_pmt1:
-                st.success(f"✓ Nominal HV set: {nominal_hv_pmt1}V")
-                
+                nominal_hv = None
+
+            if nominal_hv:
+                st.success(f"✓ Nominal HV set: {nominal_hv}V")
+
                 hv_offsets = [-100, -50, 0, 50, 100]  # HV_CHECK around nominal value range
-                hv_values_pmt1 = [nominal_hv_pmt1 + offset for offset in hv_offsets]
-                st.session_state.hv_scan_values_pmt1 = hv_values_pmt1
-                
+                hv_values = [nominal_hv + offset for offset in hv_offsets]
+                st.session_state[f"hv_scan_values_{pmt_id}"] = hv_values
+
                 table_data = {
                     "Point": ["Point 1", "Point 2", "Point 3 (Nominal)", "Point 4", "Point 5"],
                     "Offset": ["-100V", "-50V", "0V", "+50V", "+100V"],
-                    "HV Value": [f"{hv}V" for hv in hv_values_pmt1]
+                    "HV Value": [f"{hv}V" for hv in hv_values]
                 }
                 df = pd.DataFrame(table_data)
                 st.table(df)
             else:
                 st.warning("⚠️ Please enter a nominal HV value")
-                st.session_state.hv_scan_values_pmt1 = None
-            
+                st.session_state[f"hv_scan_values_{pmt_id}"] = None
+
             st.divider()
-            
-            # Run button for PMT 1
-            with stylable_container(
-                "green_button_pmt1",
-                css_styles="""
-                button {
-                    background-color: #007bff;
-                    color: white;
-                    border-color: #007bff;
-                    height: 80px;
-                    font-size: 18px;
-                    font-weight: bold;
-                    white-space: pre-line;
-                    line-height: 1.3;
-                }
-                button:hover {
-                    border-color: #0056b3;
-                    opacity: 0.9;
-                }
-                """,
-            ):
-                button_disabled_pmt1 = (is_running_pmt1 or not executor_alive_pmt1 or
-                            not st.session_state.serial_number_pmt1.strip() or
-                            not nominal_hv_pmt1)
-                
-                if st.button("PROCESS HV CHECK DATA  (PMT 1)\nAutomatically Process Data and Sync", 
-                            type="primary", 
-                            use_container_width=True,
-                            disabled=button_disabled_pmt1, 
-                            key="start_auto_pmt1"):
+
+            with start_button_container(f"green_button_{pmt_id}", slot):
+                button_disabled = (IS_RUNNING[pmt_id] or not EXECUTOR_ALIVE or
+                                   not serial_number.strip() or not nominal_hv)
+
+                if st.button(f"PROCESS HV CHECK DATA  ({label})\nAutomatically Process Data and Sync",
+                             type="primary",
+                             use_container_width=True,
+                             disabled=button_disabled,
+                             key=f"start_auto_{pmt_id}"):
                     st.info("Archiving existing data on server before starting...")
                     success, message = archive_data_on_server(
                         st.session_state.hv_remote_host,
                         st.session_state.hv_remote_directory,
                         st.session_state.hv_archive_directory
                     )
-                    
+
                     if success:
                         st.success(f"✅ {message}")
                     else:
                         st.warning(f"⚠️ Archive warning: {message}")
-                    
-                    if st.session_state.hv_scan_values_pmt1:
-                        hv_command = st.session_state.hv_remote_command.format(
-                            SN=st.session_state.serial_number_pmt1,
-                            HVNOMLL=st.session_state.hv_scan_values_pmt1[0],
-                            HVNOML=st.session_state.hv_scan_values_pmt1[1],
-                            HVNOM=st.session_state.hv_scan_values_pmt1[2],
-                            HVNOMH=st.session_state.hv_scan_values_pmt1[3],
-                            HVNOMHH=st.session_state.hv_scan_values_pmt1[4]
-                        )
-                    
+
+                    hv_scan_values = st.session_state[f"hv_scan_values_{pmt_id}"]
+                    hv_command = st.session_state.hv_remote_command.format(
+                        SN=serial_number,
+                        HVNOMLL=hv_scan_values[0],
+                        HVNOML=hv_scan_values[1],
+                        HVNOM=hv_scan_values[2],
+                        HVNOMH=hv_scan_values[3],
+                        HVNOMHH=hv_scan_values[4]
+                    )
+
                     config = {
                         'running': True,
                         'remote_host': st.session_state.hv_remote_host,
                         'hv_remote_directory': st.session_state.hv_remote_directory,
                         'hv_remote_command': hv_command,
-                        'serial_number': st.session_state.serial_number_pmt1,
-                        'hv_value': st.session_state.hv_value_pmt1,
-                        'hv_scan_values': st.session_state.hv_scan_values_pmt1,
-                        'pmt_id': 'pmt1',
+                        'serial_number': serial_number,
+                        'hv_value': st.session_state[f"hv_value_{pmt_id}"],
+                        'hv_scan_values': hv_scan_values,
+                        'pmt_id': pmt_id,
                         'total_runs': 5,
                         'interval_seconds': 5,
                         'job_ids': []
                     }
-                    save_config(config, "pmt1")
-                    # if not check_executor_running("pmt1"):
-                    #     ok, result = start_background_executor("pmt1")
-                    #     if ok:
-                    #         st.success(f"✅ Background executor started (PID: {result})")
-                    #     else:
-                    #         st.error(f"❌ Could not start executor: {result}")
-                    # else:
-                    #     st.info("ℹ️ Executor already running — config updated.")
-                    st.success("HV Check started for PMT 1!")
+                    save_config(config, pmt_id)
+                    st.success(f"HV Check started for {label}!")
                     time.sleep(2)
                     st.rerun()
-            
-            st.caption("This will run a 5-point HV Check for PMT 1")
-            # Stop button for PMT 1
-            with stylable_container(
-                "stop_button_hv_pmt1",
-                css_styles="""
-                button {
-                    background-color: #ff8c00;
-                    color: white;
-                    border-color: #ff8c00;
-                    height: 60px;
-                    font-size: 16px;
-                    font-weight: bold;
-                }
-                button:hover {
-                    border-color: #0066cc;
-                    opacity: 0.9;
-                }
-                """,
-            ):
-                if st.button("Stop HV Check (PMT 1)", type="primary", use_container_width=True, 
-                disabled=not is_running_pmt1, key="stop_hv_scan_pmt1"):
-        
-                    config_file = CONFIG_FILE_PMT1
-                    status_file = STATUS_FILE_PMT1
-                    
-                    if os.path.exists(config_file):
-                        config = load_status("pmt1")
-                        if config:
-                            config["running"] = False
-                            save_config(config, "pmt1")
-
-                    if os.path.exists(status_file):
-                        status = load_status("pmt1")
-                        if status:
-                            status["running"] = False
-                            status["message"] = "Stopped by user"
-                            with open(status_file, "w") as f:
-                                json.dump(status, f, indent=2)
 
-                    try:
-                        remote_user = st.session_state.hv_remote_host.split("@")[0]
-                        cancel_cmd = f"ssh {st.session_state.hv_remote_host} scancel -u {remote_user}"
-                        subprocess.run(cancel_cmd, shell=True, check=True, timeout=15)
-                        st.success("HV Check stopped and SLURM jobs cancelled")
-                    except subprocess.CalledProcessError:
-                        st.warning("HV Check stopped, but scancel failed")
+            st.caption(f"This will run a 5-point HV Check for {label}")
 
+            with stop_button_container(f"stop_button_hv_{pmt_id}"):
+                if st.button(f"Stop HV Check ({label})", type="primary", use_container_width=True,
+                             disabled=not IS_RUNNING[pmt_id], key=f"stop_hv_scan_{pmt_id}"):
+                    stop_job(slot, st.session_state.hv_remote_host, "HV Check")
                     time.sleep(1)
-                    st.rerun() 
-            
+                    st.rerun()
+
             st.divider()
-            
-            if st.button("Manual Sync (PMT 1)", type="secondary", key="manual_sync_pmt1"):
-                st.info("Syncing PMT 1 from server...")
-                
-                sn = st.session_state.serial_number_pmt1 if st.session_state.serial_number_pmt1.strip() else None
-                success, msg = sync_from_spartan(st.session_state.hv_remote_host, st.session_state.hv_remote_directory, serial_number=sn)
-                
-                if success:
-                    st.success(f"✅ {msg}")
-                else:
-                    st.warning(f"⚠️ {msg}")
-            
+
+            if st.button(f"Manual Sync ({label})", type="secondary", key=f"manual_sync_{pmt_id}"):
+                sn = serial_number if serial_number.strip() else None
+                start_manual_sync(f"hv_{pmt_id}", 'hv', st.session_state.hv_remote_host,
+                                  st.session_state.hv_remote_directory, sn)
+            display_manual_sync(f"hv_{pmt_id}", label)
+
             st.divider()
-            
-            # Archive/Flag section for PMT 1 HV
-            st.write("**Data Management (PMT 1)**")
-            col_arch_pmt1, col_flag_pmt1 = st.columns(2)
-            
-            with col_arch_pmt1:
-                if st.button("📦 Archive Data (PMT 1)", type="secondary", use_container_width=True, key="archive_hv_pmt1"):
-                    st.info("Archiving PMT 1 HV data...")
+
+            # Archive/Flag section
+            st.write(f"**Data Management ({label})**")
+            col_arch, col_flag = st.columns(2)
+
+            with col_arch:
+                if st.button(f"📦 Archive Data ({label})", type="secondary", use_container_width=True, key=f"archive_hv_{pmt_id}"):
+                    st.info(f"Archiving {label} HV data...")
                     success, message = archive_HV_data_on_server(
                         st.session_state.hv_remote_host,
                         st.session_state.hv_remote_directory,
                         st.session_state.hv_archive_directory
                     )
-                    
+
                     if success:
                         st.success(f"✅ {message}")
                     else:
                         st.error(f"❌ {message}")
-            
-            with col_flag_pmt1:
-                if st.button("⚠️ Flag as Abnormal (PMT 1)", type="primary", use_container_width=True, key="flag_hv_pmt1"):
-                    st.info("Flagging PMT 1 HV data...")
+
+            with col_flag:
+                if st.button(f"⚠️ Flag as Abnormal ({label})", type="primary", use_container_width=True, key=f"flag_hv_{pmt_id}"):
+                    st.info(f"Flagging {label} HV data...")
                     success, message = flag_HV_data_on_server(
                         st.session_state.hv_remote_host,
                         st.session_state.hv_remote_directory,
                         st.session_state.hv_flag_directory
                     )
-                    
+
                     if success:
                         st.success(f"✅ {message}")
                     else:
                         st.error(f"❌ {message}")
-        
-        with col_right_pmt1:
-            st.subheader("Recent HV Data (PMT 1)")
-            st.caption("Shows recent HV Check results for PMT 1")
-            
-            if hasattr(st.session_state, 'hv_scan_values_pmt1') and st.session_state.hv_scan_values_pmt1 is not None:
-                display_hv_grid("pmt1", st.session_state.serial_number_pmt1, st.session_state.hv_scan_values_pmt1)
-                st.divider()
-                st.subheader("Required HV Determination (PMT 1)")
-                
-                # Find and display the summary plot
-                hv_value_file = find_hv_value_file("synced_data", st.session_state.serial_number_pmt1)
-                summary_plot = find_hv_summary_plot("synced_data", st.session_state.serial_number_pmt1)
-                
-                
-                if summary_plot and os.path.exists(summary_plot):
-                    import base64
-                    with open(summary_plot, "rb") as f:
-                        img_data = base64.b64encode(f.read()).decode()
-
-                    if hv_value_file and os.path.exists(hv_value_file):
-                        try:
-                            with open(hv_value_file, 'r') as f:
-                                hv_required = f.read().strip()
-                            st.markdown(f"""
-                            <div style="text-align: center; padding: 15px; background-color: #cce5ff; border-radius: 10px; margin: 15px 0;">
-                                <h3 style="color: #004085; margin: 0; font-weight: bold;">Required HV: {hv_required} V</h3>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        except:
-                            pass
-                    
-                    st.markdown(f"""
-                        <div style="width: 100%;">
-                            <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    st.caption(f"Last updated: {os.path.basename(summary_plot)}")
-                    
-                else:
-                    st.info("📊 Summary plot will appear here after HV Check completes")
-                    st.caption("Run the HV Check and wait for all 5 points to be collected")
 
+        with col_right:
+            st.subheader(f"Recent HV Data ({label})")
+            st.caption(f"Shows recent HV Check results for {label}")
+
+            if st.session_state.get(f"hv_scan_values_{pmt_id}") is not None:
+                display_hv_grid(pmt_id, serial_number, st.session_state[f"hv_scan_values_{pmt_id}"])
+                st.divider()
+                st.subheader(f"Required HV Determination ({label})")
+                display_hv_summary(serial_number, slot.summary_bg, slot.summary_fg)
             else:
                 st.info("Enter a nominal HV value to see scan points")
-            
-            # # Display selected plot for PMT 1 if available
-            # if st.session_state.selected_hv_plot_pmt1:
-            #     st.divider()
-            #     if os.path.exists(st.session_state.selected_hv_plot_pmt1):
-            #         st.subheader("Selected Plot (PMT 1)")
-            #         import base64
-            #         with open(st.session_state.selected_hv_plot_pmt1, "rb") as f:
-            #             img_data = base64.b64encode(f.read()).decode()
-                    
-            #         st.markdown(f"""
-            #             <div style="width: 100%;">
-            #                 <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
-            #             </div>
-            #         """, unsafe_allow_html=True)
-                    
-            #         st.caption(os.path.basename(st.session_state.selected_hv_plot_pmt1))
-            #         if hasattr(st.session_state, 'selected_hv_gain_pmt1'):
-            #             st.info(st.session_state.selected_hv_gain_pmt1)
-                    
-            #         if st.button("Hide Plot", key="hide_plot_pmt1_inline", use_container_width=True):
-            #             st.session_state.selected_hv_plot_pmt1 = None
-            #             st.session_state.selected_hv_gain_pmt1 = None
-            #             st.rerun()
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    st.divider()
-    
-    # PMT 2 Section
-    # st.markdown('<div class="pmt-section pmt2-border">', unsafe_allow_html=True)
-    with stylable_container(
-        key="pmt2_hv_section",
-        css_styles="""
-            {
-                border: 2px solid #9C27B0;
-                border-radius: 10px;
-                padding: 15px;
-                margin-bottom: 20px;
-            }
-        """,
-    ):
-        st.subheader("🟣 PMT 2 - HV Configuration")
-        
-        col_left_pmt2, col_right_pmt2 = st.columns([1, 1.5])
-        
-        with col_left_pmt2:
-            # HV Input for PMT 2
-            hv_value_input_pmt2 = st.text_input(
-                "Enter Nominal HV Value (PMT 2):",
-                value=st.session_state.hv_value_pmt2,
-                placeholder="e.g. 1800",
-                help="Nominal high voltage value (without 'V'). Scans will be done at ±100V and ±50V from this value.",
-                key="hv_input_pmt2"
-            )
-            
-            st.session_state.hv_value_pmt2 = hv_value_input_pmt2
-            
-            try:
-                nominal_hv_pmt2 = int(st.session_state.hv_value_pmt2.replace('V', '').replace('v', '').strip()) if st.session_state.hv_value_pmt2 else None
-            except:
-                nominal_hv_pmt2 = None
-            
-            if nominal_hv_pmt2:
-                st.success(f"✓ Nominal HV set: {nominal_hv_pmt2}V")
-                
-                hv_offsets = [-100, -50, 0, 50, 100]
-                hv_values_pmt2 = [nominal_hv_pmt2 + offset for offset in hv_offsets]
-                st.session_state.hv_scan_values_pmt2 = hv_values_pmt2
-                
-                table_data = {
-                    "Point": ["Point 1", "Point 2", "Point 3 (Nominal)", "Point 4", "Point 5"],
-                    "Offset": ["-100V", "-50V", "0V", "+50V", "+100V"],
-                    "HV Value": [f"{hv}V" for hv in hv_values_pmt2]
-                }
-                df = pd.DataFrame(table_data)
-                st.table(df)
-            else:
-                st.warning("⚠️ Please enter a nominal HV value")
-                st.session_state.hv_scan_values_pmt2 = None
-            
+
+def render_scan_section(slot):
+    """Full-scan controls and 21-point grid for one PMT slot"""
+    pmt_id, label = slot.pmt_id, slot.label
+    serial_number = st.session_state[f"serial_number_{pmt_id}"]
+
+    with section_container(f"{pmt_id}_scan_section", slot.color):
+        st.subheader(f"{slot.icon} {label} - Full Scan Configuration")
+
+        col_left, col_right = st.columns([1, 1.5])
+
+        with col_left:
+            st.write(f"**Serial Number:** {serial_number or 'Not set'}")
+
+            if not serial_number.strip():
+                st.warning("⚠️ Please set serial number at the top of the page")
+
             st.divider()
-            
-            # Run button for PMT 2
-            with stylable_container(
-                "green_button_pmt2",
-                css_styles="""
-                button {
-                    background-color: #9C27B0;
-                    color: white;
-                    border-color: #9C27B0;
-                    height: 80px;
-                    font-size: 18px;
-                    font-weight: bold;
-                    white-space: pre-line;
-                    line-height: 1.3;
-                }
-                button:hover {
-                    border-color: #1e7e34;
-                    opacity: 0.9;
-                }
-                """,
-            ):
-                button_disabled_pmt2 = (is_running_pmt2 or not executor_alive_pmt2 or
-                            not st.session_state.serial_number_pmt2.strip() or
-                            not nominal_hv_pmt2)
-                
-                if st.button("PROCESS HV CHECK DATA  (PMT 2)\nAutomatically Process Data and Sync", 
-                            type="primary", 
-                            use_container_width=True,
-                            disabled=button_disabled_pmt2, 
-                            key="start_auto_pmt2"):
+
+            with start_button_container(f"scan_button_{pmt_id}", slot):
+                button_disabled = (IS_RUNNING[pmt_id] or not EXECUTOR_ALIVE or
+                                   not serial_number.strip())
+
+                if st.button(f"PROCESS SCAN DATA  ({label})\nAutomatically Process Data and Sync",
+                             type="primary",
+                             use_container_width=True,
+                             disabled=button_disabled,
+                             key=f"start_scan_{pmt_id}"):
+
                     st.info("Archiving existing data on server before starting...")
                     success, message = archive_data_on_server(
-                        st.session_state.hv_remote_host,
-                        st.session_state.hv_remote_directory,
-                        st.session_state.hv_archive_directory
+                        st.session_state.remote_host,
+                        st.session_state.scan_remote_directory,
+                        st.session_state.archive_directory
                     )
-                    
                     if success:
                         st.success(f"✅ {message}")
                     else:
                         st.warning(f"⚠️ Archive warning: {message}")
-                    
-                    if st.session_state.hv_scan_values_pmt2:
-                        hv_command = st.session_state.hv_remote_command.format(
-                            SN=st.session_state.serial_number_pmt2,
-                            HVNOMLL=st.session_state.hv_scan_values_pmt2[0],
-                            HVNOML=st.session_state.hv_scan_values_pmt2[1],
-                            HVNOM=st.session_state.hv_scan_values_pmt2[2],
-                            HVNOMH=st.session_state.hv_scan_values_pmt2[3],
-                            HVNOMHH=st.session_state.hv_scan_values_pmt2[4]
-                        )
-                    
+
+                    formatted_command = st.session_state.scan_remote_command.format(
+                        SN=serial_number
+                    )
+
                     config = {
                         'running': True,
-                        'remote_host': st.session_state.hv_remote_host,
-                        'hv_remote_directory': st.session_state.hv_remote_directory,
-                        'hv_remote_command': hv_command,
-                        'serial_number': st.session_state.serial_number_pmt2,
-                        'hv_value': st.session_state.hv_value_pmt2,
-                        'hv_scan_values': st.session_state.hv_scan_values_pmt2,
-                        'pmt_id': 'pmt2',
-                        'total_runs': 5,
+                        'remote_host': st.session_state.remote_host,
+                        'scan_remote_directory': st.session_state.scan_remote_directory,
+                        'scan_remote_command': formatted_command,
+                        'serial_number': serial_number,
+                        'pmt_id': pmt_id,
+                        'total_runs': 21,
                         'interval_seconds': 5,
                         'job_ids': []
                     }
-                    save_config(config, "pmt2")
-                    # if not check_executor_running("pmt2"):
-                    #     ok, result = start_background_executor("pmt2")
-                    #     if ok:
-                    #         st.success(f"✅ Background executor started (PID: {result})")
-                    #     else:
-                    #         st.error(f"❌ Could not start executor: {result}")
-                    # else:
-                    #     st.info("ℹ️ Executor already running — config updated.")
-                    st.success("HV Check started for PMT 2!")
+                    save_config(config, pmt_id)
+
+                    st.success(f"Full scan started for {label}!")
                     time.sleep(2)
                     st.rerun()
-            
-            st.caption("This will run a 5-point HV Check for PMT 2")
-            # Stop button for PMT 2
-            with stylable_container(
-                "stop_button_hv_pmt2",
-                css_styles="""
-                button {
-                    background-color: #ff8c00;
-                    color: white;
-                    border-color: #ff8c00;
-                    height: 60px;
-                    font-size: 16px;
-                    font-weight: bold;
-                }
-                button:hover {
-                    border-color: #0066cc;
-                    opacity: 0.9;
-                }
-                """,
-            ):
-                if st.button("Stop HV Check (PMT 2)", type="primary", use_container_width=True, 
-                disabled=not is_running_pmt2, key="stop_hv_scan_pmt2"):
-        
-                    config_file = CONFIG_FILE_PMT2
-                    status_file = STATUS_FILE_PMT2
-                    
-                    if os.path.exists(config_file):
-                        config = load_status("pmt2")
-                        if config:
-                            config["running"] = False
-                            save_config(config, "pmt2")
-
-                    if os.path.exists(status_file):
-                        status = load_status("pmt2")
-                        if status:
-                            status["running"] = False
-                            status["message"] = "Stopped by user"
-                            with open(status_file, "w") as f:
-                                json.dump(status, f, indent=2)
 
-                    try:
-                        remote_user = st.session_state.hv_remote_host.split("@")[0]
-                        cancel_cmd = f"ssh {st.session_state.hv_remote_host} scancel -u {remote_user}"
-                        subprocess.run(cancel_cmd, shell=True, check=True, timeout=15)
-                        st.success("HV Check stopped and SLURM jobs cancelled")
-                    except subprocess.CalledProcessError:
-                        st.warning("HV Check stopped, but scancel failed")
+            st.caption(f"This will run a complete 21-point scan for {label}")
 
+            with stop_button_container(f"stop_button_{pmt_id}"):
+                if st.button(f"Stop Scan ({label})", type="primary", use_container_width=True,
+                             disabled=not IS_RUNNING[pmt_id], key=f"stop_scan_{pmt_id}"):
+                    stop_job(slot, st.session_state.remote_host, "Scan")
                     time.sleep(1)
                     st.rerun()
 
             st.divider()
-            
-            if st.button("Manual Sync (PMT 2)", type="secondary", key="manual_sync_pmt2"):
-                st.info("Syncing PMT 2 from server...")
-                
-                sn = st.session_state.serial_number_pmt2 if st.session_state.serial_number_pmt2.strip() else None
-                success, msg = sync_from_spartan(st.session_state.hv_remote_host, st.session_state.hv_remote_directory, serial_number=sn)
-                
-                if success:
-                    st.success(f"✅ {msg}")
-                else:
-                    st.warning(f"⚠️ {msg}")
-            
+
+            if st.button(f"Manual Sync ({label} Scan)", type="secondary", key=f"manual_sync_scan_{pmt_id}"):
+                sn = serial_number if serial_number.strip() else None
+                start_manual_sync(f"scan_{pmt_id}", 'scan', st.session_state.remote_host,
+                                  st.session_state.scan_remote_directory, sn)
+            display_manual_sync(f"scan_{pmt_id}", f"{label} Scan")
+
             st.divider()
-            
-            # Archive/Flag section for PMT 2 HV
-            st.write("**Data Management (PMT 2)**")
-            col_arch_pmt2, col_flag_pmt2 = st.columns(2)
-            
-            with col_arch_pmt2:
-                if st.button("📦 Archive Data (PMT 2)", type="secondary", use_container_width=True, key="archive_hv_pmt2"):
-                    st.info("Archiving PMT 2 HV data...")
-                    success, message = archive_HV_data_on_server(
-                        st.session_state.hv_remote_host,
-                        st.session_state.hv_remote_directory,
-                        st.session_state.hv_archive_directory
+
+            # Archive/Flag section
+            st.write(f"**Data Management ({label})**")
+            col_arch, col_flag = st.columns(2)
+
+            with col_arch:
+                if st.button(f"📦 Archive Data ({label})", type="secondary", use_container_width=True, key=f"archive_scan_{pmt_id}"):
+                    st.info(f"Archiving {label} scan data...")
+                    success, message = archive_data_on_server(
+                        st.session_state.remote_host,
+                        st.session_state.scan_remote_directory,
+                        st.session_state.archive_directory
                     )
-                    
+
                     if success:
                         st.success(f"✅ {message}")
                     else:
                         st.error(f"❌ {message}")
-            
-            with col_flag_pmt2:
-                if st.button("⚠️ Flag as Abnormal (PMT 2)", type="primary", use_container_width=True, key="flag_hv_pmt2"):
-                    st.info("Flagging PMT 2 HV data...")
-                    success, message = flag_HV_data_on_server(
-                        st.session_state.hv_remote_host,
-                        st.session_state.hv_remote_directory,
-                        st.session_state.hv_flag_directory
+
+            with col_flag:
+                if st.button(f"⚠️ Flag as Abnormal ({label})", type="primary", use_container_width=True, key=f"flag_scan_{pmt_id}"):
+                    st.info(f"Flagging {label} scan data...")
+                    success, message = flag_data_on_server(
+                        st.session_state.remote_host,
+                        st.session_state.scan_remote_directory,
+                        st.session_state.flag_directory
                     )
-                    
+
                     if success:
                         st.success(f"✅ {message}")
                     else:
                         st.error(f"❌ {message}")
-        
-        with col_right_pmt2:
-            st.subheader("Recent HV Data (PMT 2)")
-            st.caption("Shows recent HV Check results for PMT 2")
-            
-            if hasattr(st.session_state, 'hv_scan_values_pmt2') and st.session_state.hv_scan_values_pmt2 is not None:
-                display_hv_grid("pmt2", st.session_state.serial_number_pmt2, st.session_state.hv_scan_values_pmt2)
-                st.divider()
-                st.subheader("Required HV Determination(PMT 2)")
-                
-                # Find and display the summary plot
-                hv_value_file = find_hv_value_file("synced_data", st.session_state.serial_number_pmt2)
-                summary_plot = find_hv_summary_plot("synced_data", st.session_state.serial_number_pmt2)
-                
-                
-                if summary_plot and os.path.exists(summary_plot):
-                    import base64
-                    with open(summary_plot, "rb") as f:
-                        img_data = base64.b64encode(f.read()).decode()
-
-                    # Display HV value for gain = 1e7 if available
-                    if hv_value_file and os.path.exists(hv_value_file):
-                        try:
-                            with open(hv_value_file, 'r') as f:
-                                hv_required = f.read().strip()
-                            st.markdown(f"""
-                            <div style="text-align: center; padding: 15px; background-color: #f3e5f5; border-radius: 10px; margin: 15px 0;">
-                                <h3 style="color: #6a1b9a; margin: 0; font-weight: bold;">Required HV: {hv_required} V</h3>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        except:
-                            pass
-                    
-                    st.markdown(f"""
-                        <div style="width: 100%;">
-                            <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    st.caption(f"Last updated: {os.path.basename(summary_plot)}")
-                    
-                else:
-                    st.info("📊 Summary plot will appear here after HV Check completes")
-                    st.caption("Run the HV Check and wait for all 5 points to be collected")
 
+        with col_right:
+            st.subheader(f"Recent Scan Data ({label})")
+            st.caption(f"Shows recent 21-point scan results for {label}")
+
+            if serial_number.strip():
+                display_scan_grid(pmt_id, serial_number)
             else:
-                st.info("Enter a nominal HV value to see scan points")
-            
-            # # Display selected plot for PMT 2 if available
-            # if st.session_state.selected_hv_plot_pmt2:
-            #     st.divider()
-            #     if os.path.exists(st.session_state.selected_hv_plot_pmt2):
-            #         st.subheader("Selected Plot (PMT 2)")
-            #         import base64
-            #         with open(st.session_state.selected_hv_plot_pmt2, "rb") as f:
-            #             img_data = base64.b64encode(f.read()).decode()
-                    
-            #         st.markdown(f"""
-            #             <div style="width: 100%;">
-            #                 <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
-            #             </div>
-            #         """, unsafe_allow_html=True)
-                    
-            #         st.caption(os.path.basename(st.session_state.selected_hv_plot_pmt2))
-            #         if hasattr(st.session_state, 'selected_hv_gain_pmt2'):
-            #             st.info(st.session_state.selected_hv_gain_pmt2)
-                    
-            #         if st.button("Hide Plot", key="hide_plot_pmt2_inline", use_container_width=True):
-            #             st.session_state.selected_hv_plot_pmt2 = None
-            #             st.session_state.selected_hv_gain_pmt2 = None
-            #             st.rerun()
-    
-    st.markdown('</div>', unsafe_allow_html=True)
+                st.info("Set serial number to view scan data")
+
+# ============================================================================
+# TAB 1: HV Check (5 points per PMT)
+# ============================================================================
+with tab1:
+    st.write("High Voltage Check")
+
+    for i, slot in enumerate(VISIBLE_SLOTS):
+        if i:
+            st.divider()
+        render_hv_section(slot)
 
     # Display selected HV plots side by side
-    if st.session_state.selected_hv_plot_pmt1 or st.session_state.selected_hv_plot_pmt2:
-        st.divider()
-        st.subheader("Selected Plots")
-        
-        cols = st.columns(2)
-        
-        with cols[0]:
-            if st.session_state.selected_hv_plot_pmt1:
-                if os.path.exists(st.session_state.selected_hv_plot_pmt1):
-                    st.write("🔵 PMT 1")
-                    import base64
-                    with open(st.session_state.selected_hv_plot_pmt1, "rb") as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    st.markdown(f"""
-                        <div style="width: 100%;">
-                            <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
-                        </div>
-                    """, unsafe_allow_html=True)
-                    st.caption(os.path.basename(st.session_state.selected_hv_plot_pmt1))
-                    if hasattr(st.session_state, 'selected_hv_gain_pmt1'):
-                        st.info(st.session_state.selected_hv_gain_pmt1)
-                    if st.button("Hide Plot (PMT 1)", key="hide_hv_plot_pmt1_tab1"):
-                        st.session_state.selected_hv_plot_pmt1 = None
-                        st.session_state.selected_hv_gain_pmt1 = None
-                        st.rerun()
-        
-        with cols[1]:
-            if st.session_state.selected_hv_plot_pmt2:
-                if os.path.exists(st.session_state.selected_hv_plot_pmt2):
-                    st.write("🟣 PMT 2")
-                    import base64
-                    with open(st.session_state.selected_hv_plot_pmt2, "rb") as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    st.markdown(f"""
-                        <div style="width: 100%;">
-                            <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
-                        </div>
-                    """, unsafe_allow_html=True)
-                    st.caption(os.path.basename(st.session_state.selected_hv_plot_pmt2))
-                    if hasattr(st.session_state, 'selected_hv_gain_pmt2'):
-                        st.info(st.session_state.selected_hv_gain_pmt2)
-                    if st.button("Hide Plot (PMT 2)", key="hide_hv_plot_pmt2_tab1"):
-                        st.session_state.selected_hv_plot_pmt2 = None
-                        st.session_state.selected_hv_gain_pmt2 = None
-                        st.rerun()
+    display_selected_plots("hv", "hide_hv_plot_{}_tab1")
 
-    
-    
 # ============================================================================
-# TAB 2: FULL SCAN (21 points × 2 PMTs)
+# TAB 2: FULL SCAN (21 points per PMT)
 # ============================================================================
 with tab2:
     st.write("Full Scan")
-    st.caption("Run complete 21-point scans for both PMTs")
-    
-    # REPLACE the existing sidebar executor section with this:
+    st.caption("Run complete 21-point scans for every PMT on the station")
+
     st.sidebar.header("Background Executor")
     st.sidebar.caption("Runs continuously in the background — start once, leave running")
 
-    # executor_alive_pmt1 = check_executor_running("pmt1")
-    # executor_alive_pmt2 = check_executor_running("pmt2")
-
-    if executor_alive_pmt1 and executor_alive_pmt2:
-        st.sidebar.success("✅ Both executors running")
-    elif executor_alive_pmt1 or executor_alive_pmt2:
-        st.sidebar.warning(f"⚠️ PMT1: {'✅' if executor_alive_pmt1 else '❌'}  PMT2: {'✅' if executor_alive_pmt2 else '❌'}")
+    if EXECUTOR_ALIVE:
+        st.sidebar.success(f"✅ Executor running ({len(STATION)} PMT slots)")
     else:
-        st.sidebar.error("❌ Executors not running — click Start")
+        st.sidebar.error("❌ Executor not running — click Start")
 
-    if st.sidebar.button("▶️ Start Executors", 
-                        disabled=(executor_alive_pmt1 and executor_alive_pmt2),
+    if st.sidebar.button("▶️ Start Executor",
+                        disabled=EXECUTOR_ALIVE,
                         use_container_width=True,
                         key="start_exec_sidebar"):
-        for pmt_id in ["pmt1", "pmt2"]:
-            if not check_executor_running(pmt_id):
-                ok, result = start_background_executor(pmt_id)
-                if ok:
-                    st.sidebar.success(f"✅ {pmt_id.upper()} executor started (PID: {result})")
-                else:
-                    st.sidebar.error(f"❌ {pmt_id.upper()} failed: {result}")
+        if not check_executor_running():
+            ok, result = start_background_executor()
+            if ok:
+                st.sidebar.success(f"✅ Executor started (PID: {result})")
+            else:
+                st.sidebar.error(f"❌ Executor failed: {result}")
         time.sleep(1)
+        get_state_service().invalidate()
         st.rerun()
 
-    if st.sidebar.button("⏹️ Stop Executors",
-                        disabled=not (executor_alive_pmt1 or executor_alive_pmt2),
+    if st.sidebar.button("⏹️ Stop Executor",
+                        disabled=not EXECUTOR_ALIVE,
                         use_container_width=True,
                         key="stop_exec_sidebar"):
-        stop_background_executor("pmt1")
-        stop_background_executor("pmt2")
+        stop_background_executor()
         time.sleep(1)
+        get_state_service().invalidate()
         st.rerun()
 
-    if st.sidebar.button("🔄 Reset All", type="secondary", 
+    if st.sidebar.button("🔄 Reset All", type="secondary",
                         use_container_width=True, key="reset_sidebar"):
-        stop_background_executor("pmt1")
-        stop_background_executor("pmt2")
-        for file in [CONFIG_FILE_PMT1, CONFIG_FILE_PMT2,
-                    STATUS_FILE_PMT1, STATUS_FILE_PMT2,
-                    EXECUTOR_PID_FILE_PMT1, EXECUTOR_PID_FILE_PMT2]:
+        stop_background_executor()
+        for file in [EXECUTOR_PID_FILE, EXECUTOR_SOCKET]:
             if os.path.exists(file):
                 os.remove(file)
+        for slot in STATION:
+            # Checkpoints stay: starting the same scan again reattaches to its SLURM job
+            for file in [slot.config_file, slot.status_file]:
+                if os.path.exists(file):
+                    os.remove(file)
         st.sidebar.success("Reset complete!")
         time.sleep(1)
+        get_state_service().invalidate()
         st.rerun()
 
-    st.sidebar.divider()
-    # Server Configuration for Data Monitoring
-    # with st.expander("🔧 Data Monitoring Server Configuration"):
-    #     col_dm_config1, col_dm_config2 = st.columns(2)
-        
-    #     with col_dm_config1:
-    #         st.session_state.remote_host = st.text_input(
-    #             "Remote Host",
-    #             value=st.session_state.remote_host,
-    #             key="remote_host_tab2"
-    #         )
-    #         st.session_state.remote_directory = st.text_input(
-    #             "Remote Directory",
-    #             value=st.session_state.remote_directory,
-    #             key="remote_dir_tab2"
-    #         )
-        
-    #     with col_dm_config2:
-    #         st.session_state.remote_command = st.text_input(
-    #             "Command to Execute",
-    #             value=st.session_state.remote_command,
-    #             key="remote_cmd_tab2",
-    #             help="Use placeholder: {SN}"
-    #         )
-    #         st.caption("Available placeholder: {SN}")
-        
-    #     col_dm_arch1, col_dm_arch2 = st.columns(2)
-    #     with col_dm_arch1:
-    #         st.session_state.archive_directory = st.text_input(
-    #             "Archive Directory",
-    #             value=st.session_state.archive_directory,
-    #             key="archive_dir_tab2"
-    #         )
-        
-    #     with col_dm_arch2:
-    #         st.session_state.flag_directory = st.text_input(
-    #             "Flag Directory",
-    #             value=st.session_state.flag_directory,
-    #             key="flag_dir_tab2"
-    #         )
+    with st.sidebar.expander("📈 Executor metrics"):
+        snapshot = read_latest()
+        if snapshot is None:
+            st.caption("No metrics yet — the executor writes them every few seconds while it runs")
+        else:
+            numbers = headline(snapshot)
+
+            def fmt(value, unit, digits=1):
+                return "—" if value is None else f"{value:.{digits}f} {unit}"
+
+            c1, c2 = st.columns(2)
+            c1.metric("Sync", fmt(numbers['sync_seconds'], "s"))
+            c2.metric("Synced", fmt(numbers['sync_mb'], "MB"))
+            c1.metric("Per point", fmt(numbers['kb_per_point'], "kB", 0))
+            c2.metric("Sync per point", fmt(numbers['seconds_per_point'], "s", 2))
+            c1.metric("SSH round trip", fmt(numbers['ssh_seconds'], "s", 2))
+            c2.metric("Empty syncs", "—" if numbers['empty_syncs'] is None else f"{numbers['empty_syncs']:.0f}")
+            c1.metric("Between points", fmt(numbers['point_interval_seconds'], "s", 0))
+            c2.metric("Cluster → local", fmt(numbers['visibility_lag_seconds'], "s", 0))
+            c1.metric("Queue wait", fmt(numbers['queue_wait_seconds'], "s", 0))
+            c2.metric("Loop lag", fmt(numbers['loop_lag_seconds'], "s", 3))
+            st.caption(f"Means since the executor started · updated "
+                       f"{datetime.fromtimestamp(snapshot['ts']).strftime('%H:%M:%S')} · "
+                       f"full series at http://127.0.0.1:{METRICS_PORT}/metrics")
 
+    st.sidebar.divider()
     with st.sidebar.expander("Local Data Cleanup"):
         cleanup_hours = st.number_input(
             "Delete data files older than (hours)",
@@ -1830,35 +1509,54 @@ with tab2:
             key="cleanup_hours_tab2"
         )
         st.session_state.cleanup_time_hours = cleanup_hours
+        cleanup_max_mb = st.number_input(
+            "Keep at most (MB, 0 = no limit)",
+            min_value=0,
+            max_value=100000,
+            value=st.session_state.cleanup_max_mb,
+            step=50,
+            key="cleanup_max_mb_tab2",
+            help="Least recently used results are removed first once the limit is exceeded"
+        )
+        st.session_state.cleanup_max_mb = cleanup_max_mb
+        get_janitor(SYNC_DATA_DIR).configure(cleanup_hours, cleanup_max_mb * 1024 * 1024)
         
         if st.button("Clear Old Data Now", key="clear_old_tab2"):
-            deleted = cleanup_old_data("synced_data/", st.session_state.cleanup_time_hours)
-            if deleted > 0:
-                st.success(f"Deleted {deleted} old data file(s)")
-            else:
-                st.info("No old files to delete")
+            get_janitor(SYNC_DATA_DIR).trigger()
+            st.info("Cleanup sweep started in the background")
+
+        janitor_report = get_janitor(SYNC_DATA_DIR).last_report()
+        if janitor_report:
+            st.caption(
+                f"Last sweep {datetime.fromtimestamp(janitor_report['finished']).strftime('%H:%M:%S')}: "
+                f"removed {janitor_report['evicted_count']} file(s), "
+                f"{janitor_report['bytes_freed'] / 1e6:.1f} MB freed, "
+                f"{janitor_report.get('bytes_kept', 0) / 1e6:.1f} MB kept"
+            )
         
         if st.button("Clear ALL Data Now", type="primary", key="clear_all_tab2"):
             if os.path.exists("synced_data/"):
                 count = 0
                 
-                all_png_files = glob.glob("synced_data/**/*.png", recursive=True)
-                all_txt_files = glob.glob("synced_data/**/*.txt", recursive=True)
-                
-                for f in all_png_files:
-                    try:
-                        os.remove(f)
-                        count += 1
-                    except Exception as e:
-                        st.error(f"Error deleting {f}: {str(e)}")
-                
-                for f in all_txt_files:
+                # Charge artifacts too: the catalog would otherwise keep drawing each point from its JSON
+                all_files = (glob.glob("synced_data/**/*.png", recursive=True)
+                             + glob.glob("synced_data/**/*.txt", recursive=True)
+                             + glob.glob("synced_data/**/*_charge.json", recursive=True))
+                catalog = get_catalog(SYNC_DATA_DIR)
+                removed = []
+
+                for f in all_files:
                     try:
                         os.remove(f)
+                        catalog.discard_path(f)
+                        removed.append(os.path.relpath(f, SYNC_DATA_DIR).replace(os.sep, '/'))
                         count += 1
                     except Exception as e:
                         st.error(f"Error deleting {f}: {str(e)}")
-                
+
+                # Deliberately removed: later full syncs must not fetch them again
+                get_sync_ledger().record_evicted(removed)
+
                 try:
                     for root, dirs, files in os.walk("synced_data/", topdown=False):
                         for dir_name in dirs:
@@ -1875,479 +1573,14 @@ with tab2:
             else:
                 st.warning("Data directory doesn't exist")
 
-    for pmt_label, pmt_id, pmt_running in [
-        ("PMT 1", "pmt1", is_running_pmt1),
-        ("PMT 2", "pmt2", is_running_pmt2)
-    ]:
-        if pmt_running:
-            fresh_status = load_status(pmt_id)
-            if fresh_status:
-                st.info(f"{pmt_label}: {fresh_status.get('message', 'Processing...')}")
-                if fresh_status.get('total'):
-                    progress = fresh_status.get('completed', 0) / fresh_status['total']
-                    st.progress(progress)
-                    st.write(f"{pmt_label} Completed: {fresh_status.get('completed', 0)}/{fresh_status['total']}")
+    display_executor_status()
 
     st.divider()
 
-    # PMT 1 Section
-    # st.markdown('<div class="pmt-section pmt1-border">', unsafe_allow_html=True)
-    with stylable_container(
-        key="pmt1_scan_section",
-        css_styles="""
-            {
-                border: 2px solid #007bff;
-                border-radius: 10px;
-                padding: 15px;
-                margin-bottom: 20px;
-            }
-        """,
-    ):
-        st.subheader("🔵 PMT 1 - Full Scan Configuration")
-        
-        col_left_pmt1_scan, col_right_pmt1_scan = st.columns([1, 1.5])
-        
-        with col_left_pmt1_scan:
-            st.write(f"**Serial Number:** {st.session_state.serial_number_pmt1 or 'Not set'}")
-            
-            if not st.session_state.serial_number_pmt1.strip():
-                st.warning("⚠️ Please set serial number at the top of the page")
-            
-            st.divider()
-            
-            with stylable_container(
-                "scan_button_pmt1",
-                css_styles="""
-                button {
-                    background-color: #007bff;
-                    color: white;
-                    border-color: #007bff;
-                    height: 80px;
-                    font-size: 18px;
-                    font-weight: bold;
-                    white-space: pre-line;
-                    line-height: 1.3;
-                }
-                button:hover {
-                    border-color: #0056b3;
-                    opacity: 0.9;
-                }
-                """,
-            ):
-                button_disabled_scan_pmt1 = (is_running_pmt1 or not executor_alive_pmt1 or 
-                                            not st.session_state.serial_number_pmt1.strip())
-                
-                if st.button("PROCESS SCAN DATA  (PMT 1)\nAutomatically Process Data and Sync",
-                            type="primary",
-                            use_container_width=True,
-                            disabled=button_disabled_scan_pmt1,
-                            key="start_scan_pmt1"):
-
-                    st.info("Archiving existing data on server before starting...")
-                    success, message = archive_data_on_server(
-                        st.session_state.remote_host,
-                        st.session_state.scan_remote_directory,
-                        st.session_state.archive_directory
-                    )
-                    if success:
-                        st.success(f"✅ {message}")
-                    else:
-                        st.warning(f"⚠️ Archive warning: {message}")
-
-                    formatted_command = st.session_state.scan_remote_command.format(
-                        SN=st.session_state.serial_number_pmt1
-                    )
-
-                    config = {
-                        'running': True,
-                        'remote_host': st.session_state.remote_host,
-                        'scan_remote_directory': st.session_state.scan_remote_directory,
-                        'scan_remote_command': formatted_command,
-                        'serial_number': st.session_state.serial_number_pmt1,
-                        'pmt_id': 'pmt1',
-                        'total_runs': 21,
-                        'interval_seconds': 5,
-                        'job_ids': []
-                    }
-                    save_config(config, "pmt1")
-
-                    # *** START EXECUTOR IF NOT ALREADY RUNNING ***
-                    # if not check_executor_running("pmt1"):
-                    #     ok, result = start_background_executor("pmt1")
-                    #     if ok:
-                    #         st.success(f"✅ Background executor started (PID: {result})")
-                    #     else:
-                    #         st.error(f"❌ Could not start executor: {result}")
-                    # else:
-                    #     st.info("ℹ️ Executor already running — config updated.")
-
-                    st.success("Full scan started for PMT 1!")
-                    time.sleep(2)
-                    st.rerun()
-            
-            st.caption("This will run a complete 21-point scan for PMT 1")
-            
-            with stylable_container(
-                "stop_button_pmt1",
-                css_styles="""
-                button {
-                    background-color: #ff8c00;
-                    color: white;
-                    border-color: #ff8c00;
-                    height: 60px;
-                    font-size: 16px;
-                    font-weight: bold;
-                }
-                button:hover {
-                    border-color: #0066cc;
-                    opacity: 0.9;
-                }
-                """,
-            ):
-                if st.button("Stop Scan (PMT 1)", type="primary", use_container_width=True, disabled=not is_running_pmt1, key="stop_scan_pmt1"):
-                    if os.path.exists(CONFIG_FILE_PMT1):
-                        config = load_status("pmt1")
-                        if config:
-                            config["running"] = False
-                            save_config(config, "pmt1")
-                    if os.path.exists(STATUS_FILE_PMT1):
-                        status = load_status("pmt1")
-                        if status:
-                            status["running"] = False
-                            status["message"] = "Stopped by user"
-                            with open(STATUS_FILE_PMT1, "w") as f:
-                                json.dump(status, f, indent=2)
-
-                    try:
-                        remote_user = st.session_state.remote_host.split("@")[0]
-                        cancel_cmd = f"ssh {st.session_state.remote_host} scancel -u {remote_user}"
-                        subprocess.run(
-                            cancel_cmd,
-                            shell=True,
-                            check=True,
-                            timeout=15
-                        )
-                        st.success("Scan stopped and SLURM jobs cancelled")
-                    except subprocess.CalledProcessError as e:
-                        st.warning("Scan stopped, but scancel failed")
-
-                    time.sleep(1)
-                    st.rerun()
-            
-            st.divider()
-            
-            if st.button("Manual Sync (PMT 1 Scan)", type="secondary", key="manual_sync_scan_pmt1"):
-                st.info("Syncing PMT 1 scan data from server...")
-                
-                sn = st.session_state.serial_number_pmt1 if st.session_state.serial_number_pmt1.strip() else None
-                success, msg = sync_from_spartan(st.session_state.remote_host, st.session_state.scan_remote_directory, serial_number=sn)
-                
-                if success:
-                    st.success(f"✅ {msg}")
-                else:
-                    st.warning(f"⚠️ {msg}")
-            
-            st.divider()
-            
-            # Archive/Flag section for PMT 1 Scan
-            st.write("**Data Management (PMT 1)**")
-            col_arch_scan_pmt1, col_flag_scan_pmt1 = st.columns(2)
-            
-            with col_arch_scan_pmt1:
-                if st.button("📦 Archive Data (PMT 1)", type="secondary", use_container_width=True, key="archive_scan_pmt1"):
-                    st.info("Archiving PMT 1 scan data...")
-                    success, message = archive_data_on_server(
-                        st.session_state.remote_host,
-                        st.session_state.scan_remote_directory,
-                        st.session_state.archive_directory
-                    )
-                    
-                    if success:
-                        st.success(f"✅ {message}")
-                    else:
-                        st.error(f"❌ {message}")
-            
-            with col_flag_scan_pmt1:
-                if st.button("⚠️ Flag as Abnormal (PMT 1)", type="primary", use_container_width=True, key="flag_scan_pmt1"):
-                    st.info("Flagging PMT 1 scan data...")
-                    success, message = flag_data_on_server(
-                        st.session_state.remote_host,
-                        st.session_state.scan_remote_directory,
-                        st.session_state.flag_directory
-                    )
-                    
-                    if success:
-                        st.success(f"✅ {message}")
-                    else:
-                        st.error(f"❌ {message}")
-        
-        with col_right_pmt1_scan:
-            st.subheader("Recent Scan Data (PMT 1)")
-            st.caption("Shows recent 21-point scan results for PMT 1")
-            
-            if st.session_state.serial_number_pmt1.strip():
-                display_scan_grid("pmt1", st.session_state.serial_number_pmt1)
-            else:
-                st.info("Set serial number to view scan data")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        st.divider()
-    
-    # PMT 2 Section
-    # st.markdown('<div class="pmt-section pmt2-border">', unsafe_allow_html=True)
-    with stylable_container(
-        key="pmt2_scan_section",
-        css_styles="""
-            {
-                border: 2px solid #9C27B0;
-                border-radius: 10px;
-                padding: 15px;
-                margin-bottom: 20px;
-            }
-        """,
-    ):
-        st.subheader("🟣 PMT 2 - Full Scan Configuration")
-        
-        col_left_pmt2_scan, col_right_pmt2_scan = st.columns([1, 1.5])
-        
-        with col_left_pmt2_scan:
-            st.write(f"**Serial Number:** {st.session_state.serial_number_pmt2 or 'Not set'}")
-            
-            if not st.session_state.serial_number_pmt2.strip():
-                st.warning("⚠️ Please set serial number at the top of the page")
-            
+    for i, slot in enumerate(VISIBLE_SLOTS):
+        if i:
             st.divider()
-            
-            with stylable_container(
-                "scan_button_pmt2",
-                css_styles="""
-                button {
-                    background-color: #9C27B0;
-                    color: white;
-                    border-color: #9C27B0;
-                    height: 80px;
-                    font-size: 18px;
-                    font-weight: bold;
-                    white-space: pre-line;
-                    line-height: 1.3;
-                }
-                button:hover {
-                    border-color: #1e7e34;
-                    opacity: 0.9;
-                }
-                """,
-            ):
-                button_disabled_scan_pmt2 = (is_running_pmt2 or not executor_alive_pmt2 or 
-                                            not st.session_state.serial_number_pmt2.strip())
-                
-                if st.button("PROCESS SCAN DATA  (PMT 2)\nAutomatically Process Data and Sync",
-                            type="primary",
-                            use_container_width=True,
-                            disabled=button_disabled_scan_pmt2,
-                            key="start_scan_pmt2"):
-
-                    st.info("Archiving existing data on server before starting...")
-                    success, message = archive_data_on_server(
-                        st.session_state.remote_host,
-                        st.session_state.scan_remote_directory,
-                        st.session_state.archive_directory
-                    )
-                    if success:
-                        st.success(f"✅ {message}")
-                    else:
-                        st.warning(f"⚠️ Archive warning: {message}")
+        render_scan_section(slot)
 
-                    formatted_command = st.session_state.scan_remote_command.format(
-                        SN=st.session_state.serial_number_pmt2
-                    )
-
-                    config = {
-                        'running': True,
-                        'remote_host': st.session_state.remote_host,
-                        'scan_remote_directory': st.session_state.scan_remote_directory,
-                        'scan_remote_command': formatted_command,
-                        'serial_number': st.session_state.serial_number_pmt2,
-                        'pmt_id': 'pmt2',
-                        'total_runs': 21,
-                        'interval_seconds': 5,
-                        'job_ids': []
-                    }
-                    save_config(config, "pmt2")
-
-                    # *** START EXECUTOR IF NOT ALREADY RUNNING ***
-                    # if not check_executor_running("pmt2"):
-                    #     ok, result = start_background_executor("pmt2")
-                    #     if ok:
-                    #         st.success(f"✅ Background executor started (PID: {result})")
-                    #     else:
-                    #         st.error(f"❌ Could not start executor: {result}")
-                    # else:
-                    #     st.info("ℹ️ Executor already running — config updated.")
-
-                    st.success("Full scan started for PMT 2!")
-                    time.sleep(2)
-                    st.rerun()
-
-            
-            st.caption("This will run a complete 21-point scan for PMT 2")
-            
-            with stylable_container(
-                "stop_button_pmt2",
-                css_styles="""
-                button {
-                    background-color: #ff8c00;
-                    color: white;
-                    border-color: #ff8c00;
-                    height: 60px;
-                    font-size: 16px;
-                    font-weight: bold;
-                }
-                button:hover {
-                    border-color: #0066cc;
-                    opacity: 0.9;
-                }
-                """,
-            ):
-                if st.button("Stop Scan (PMT 2)", type="primary", use_container_width=True, disabled=not is_running_pmt2, key="stop_scan_pmt2"):
-                    if os.path.exists(CONFIG_FILE_PMT2):
-                        config = load_status("pmt2")
-                        if config:
-                            config["running"] = False
-                            save_config(config, "pmt2")
-                    if os.path.exists(STATUS_FILE_PMT2):
-                        status = load_status("pmt2")
-                        if status:
-                            status["running"] = False
-                            status["message"] = "Stopped by user"
-                            with open(STATUS_FILE_PMT2, "w") as f:
-                                json.dump(status, f, indent=2)
-
-                    try:
-                        remote_user = st.session_state.remote_host.split("@")[0]
-                        cancel_cmd = f"ssh {st.session_state.remote_host} scancel -u {remote_user}"
-                        subprocess.run(
-                            cancel_cmd,
-                            shell=True,
-                            check=True,
-                            timeout=15
-                        )
-                        st.success("Scan stopped and SLURM jobs cancelled")
-                    except subprocess.CalledProcessError as e:
-                        st.warning("Scan stopped, but scancel failed")
-
-                    time.sleep(1)
-                    st.rerun()
-            
-            st.divider()
-            
-            if st.button("Manual Sync (PMT 2 Scan)", type="secondary", key="manual_sync_scan_pmt2"):
-                st.info("Syncing PMT 2 scan data from server...")
-                
-                sn = st.session_state.serial_number_pmt2 if st.session_state.serial_number_pmt2.strip() else None
-                success, msg = sync_from_spartan(st.session_state.remote_host, st.session_state.scan_remote_directory, serial_number=sn)
-                
-                if success:
-                    st.success(f"✅ {msg}")
-                else:
-                    st.warning(f"⚠️ {msg}")
-            
-            st.divider()
-            
-            # Archive/Flag section for PMT 2 Scan
-            st.write("**Data Management (PMT 2)**")
-            col_arch_scan_pmt2, col_flag_scan_pmt2 = st.columns(2)
-            
-            with col_arch_scan_pmt2:
-                if st.button("📦 Archive Data (PMT 2)", type="secondary", use_container_width=True, key="archive_scan_pmt2"):
-                    st.info("Archiving PMT 2 scan data...")
-                    success, message = archive_data_on_server(
-                        st.session_state.remote_host,
-                        st.session_state.scan_remote_directory,
-                        st.session_state.archive_directory
-                    )
-                    
-                    if success:
-                        st.success(f"✅ {message}")
-                    else:
-                        st.error(f"❌ {message}")
-            
-            with col_flag_scan_pmt2:
-                if st.button("⚠️ Flag as Abnormal (PMT 2)", type="primary", use_container_width=True, key="flag_scan_pmt2"):
-                    st.info("Flagging PMT 2 scan data...")
-                    success, message = flag_data_on_server(
-                        st.session_state.remote_host,
-                        st.session_state.scan_remote_directory,
-                        st.session_state.flag_directory
-                    )
-                    
-                    if success:
-                        st.success(f"✅ {message}")
-                    else:
-                        st.error(f"❌ {message}")
-        
-        with col_right_pmt2_scan:
-            st.subheader("Recent Scan Data (PMT 2)")
-            st.caption("Shows recent 21-point scan results for PMT 2")
-            
-            if st.session_state.serial_number_pmt2.strip():
-                display_scan_grid("pmt2", st.session_state.serial_number_pmt2)
-            else:
-                st.info("Set serial number to view scan data")
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-    
     # Display selected plots side by side
-    if st.session_state.selected_scan_plot_pmt1 or st.session_state.selected_scan_plot_pmt2:
-        st.divider()
-        st.subheader("Selected Plots")
-        
-        cols = st.columns(2)
-        
-        # PMT 1 plot
-        with cols[0]:
-            if st.session_state.selected_scan_plot_pmt1:
-                if os.path.exists(st.session_state.selected_scan_plot_pmt1):
-                    st.write("🔵 PMT 1")
-                    import base64
-                    with open(st.session_state.selected_scan_plot_pmt1, "rb") as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    
-                    st.markdown(f"""
-                        <div style="width: 100%;">
-                            <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    st.caption(os.path.basename(st.session_state.selected_scan_plot_pmt1))
-                    if hasattr(st.session_state, 'selected_scan_gain_pmt1'):
-                        st.info(st.session_state.selected_scan_gain_pmt1)
-                    
-                    if st.button("Hide Plot (PMT 1)", key="hide_plot_pmt1_tab2"):
-                        st.session_state.selected_scan_plot_pmt1 = None
-                        st.session_state.selected_scan_gain_pmt1 = None
-                        st.rerun()
-        
-        # PMT 2 plot
-        with cols[1]:
-            if st.session_state.selected_scan_plot_pmt2:
-                if os.path.exists(st.session_state.selected_scan_plot_pmt2):
-                    st.write("🟣 PMT 2")
-                    import base64
-                    with open(st.session_state.selected_scan_plot_pmt2, "rb") as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    
-                    st.markdown(f"""
-                        <div style="width: 100%;">
-                            <img src="data:image/png;base64,{img_data}" style="width: 100%; display: block;">
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    st.caption(os.path.basename(st.session_state.selected_scan_plot_pmt2))
-                    if hasattr(st.session_state, 'selected_scan_gain_pmt2'):
-                        st.info(st.session_state.selected_scan_gain_pmt2)
-                    
-                    if st.button("Hide Plot (PMT 2)", key="hide_plot_pmt2_tab2"):
-                        st.session_state.selected_scan_plot_pmt2 = None
-                        st.session_state.selected_scan_gain_pmt2 = None
-                        st.rerun()
\ No newline at end of file
+    display_selected_plots("scan", "hide_plot_{}_tab2")
@@ -26,12 +26,15 @@ SN = sys.argv[1]
 print(f"Reading gain and HV values for SN={SN}")
 # print(f"Base directory: {base_dir}")
 
+# This job's HV_output_* directory (RUN_HV_CHECK.slurm exports its run ID),
+# else every HV output directory for this SN and the most recent one for the plot
+run_id = os.environ.get("R12860_RUN_ID")
+
 # Find all HV output directories for this SN
-search_pattern = os.path.join(f"HV_output_*/{SN}/data_HV_*")
+search_pattern = os.path.join(f"HV_output_{run_id}" if run_id else "HV_output_*", SN, "data_HV_*")
 hv_dirs = sorted(glob.glob(search_pattern))
 
-# Get the most recent HV_output_* directory
-most_recent_hv_output = sorted(glob.glob("HV_output_*"))[-1]
+most_recent_hv_output = f"HV_output_{run_id}" if run_id else sorted(glob.glob("HV_output_*"))[-1]
 
 # Create output directory as HV_output_*/{SN}
 output_dir = os.path.join(most_recent_hv_output, SN)
@@ -308,11 +311,13 @@ ax.legend(
 )
 
 plot_filename = os.path.join(output_dir, f"{SN}_gain_vs_hv_loglog.png")
-fig.savefig(
-    plot_filename,
-    dpi=150,
-    bbox_inches="tight",
-)
+# Palette PNG at R12860_PNG_DPI (../compact_png.py): a fraction of the bytes to sync
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from compact_png import save_figure
+    save_figure(fig, plot_filename, bbox_inches="tight")
+except ImportError:
+    fig.savefig(plot_filename, dpi=150, bbox_inches="tight")
 plt.close(fig)
 
 print(f"\nPlot saved to {plot_filename}")
@@ -324,4 +329,13 @@ if hv_at_target is not None:
         f.write(f"{hv_at_target:.1f}")
     print(f"HV value saved to {hv_filename}")
 
+# Announce the finished files to the live monitor (../artifact_manifest.py);
+# never let that fail the analysis, the monitor falls back to a full rsync
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from artifact_manifest import record
+    record(os.path.dirname(os.path.abspath(__file__)), SN, [plot_filename] + ([hv_filename] if hv_at_target is not None else []))
+except Exception as e:
+    print(f"Manifest not updated: {e}")
+
 print("Processing complete!")
\ No newline at end of file
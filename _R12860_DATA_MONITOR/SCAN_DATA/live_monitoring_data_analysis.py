@@ -8,6 +8,7 @@ import uproot
 import awkward as ak
 import glob
 import os
+import json
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import zoneinfo
@@ -17,8 +18,8 @@ import scipy.constants as const
 import re
 
 if len(sys.argv) < 4:
-    print("Usage: python script.py <SN> <theta> <phi>")
-    print("Example: python script.py SN12345 10 90")
+    print("Usage: python script.py <SN> <theta> <phi> [<run_id>]")
+    print("Example: python script.py SN12345 10 90 20260301_101500_123456")
     sys.exit(1)
 
 SN = sys.argv[1]
@@ -28,9 +29,14 @@ phi = sys.argv[3]
 JST = ZoneInfo("Asia/Tokyo")
 curr_datetime = datetime.now(JST).strftime('%Y%m%d_%H%M%S')
 curr_date = datetime.now(JST).strftime('%Y%m%d')
+# All points of one SLURM job share its run ID (and so one scan_output_* directory)
+run_id = sys.argv[4] if len(sys.argv) > 4 else os.environ.get("R12860_RUN_ID", curr_datetime)
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-output_dir = os.path.join(script_dir, f"scan_output_{curr_datetime}", SN, f"data_theta{theta}_phi{phi}")
+# The GUI draws the charge histogram from the _charge.json artifact; the PNG
+# is only a fallback for older GUIs and can be switched off with R12860_WRITE_PNG=0
+WRITE_PNG = os.environ.get("R12860_WRITE_PNG", "1") != "0"
+output_dir = os.path.join(script_dir, f"scan_output_{run_id}", SN, f"data_theta{theta}_phi{phi}")
 # output_dir = f'/data/gpfs/projects/punim1378/earles/Precal_GUI/scan_output_{SN}/{curr_date}/data_theta{theta}_phi{phi}/'
 
 os.makedirs(output_dir, exist_ok=True)
@@ -148,6 +154,7 @@ if len(PMT_PulseCharge_quer) < 10:
     print("Skipping fit and saving placeholder values.")
     gain_PMT = 0.0
     gain_PMT_err = 0.0
+    fit_params = None
 else:
     
     pmt_pc_min = np.min(PMT_PulseCharge_quer)
@@ -180,6 +187,16 @@ else:
     gain_PMT = (mu_1PE_val / elementary_charge) * 1e-12
     gain_PMT_err = (mean_err_1PE / elementary_charge) * 1e-12
 
+    fit_params = {
+        'mu_1PE':      mu_1PE_val,
+        'sigma_1PE':   float(result.params['sigma_1PE']["value"]),
+        'sigma_2PE':   float(result.params['sigma_2PE']["value"]),
+        'frac_1PE':    float(result.params['frac_1pe']["value"]),
+        'total_yield': float(result.params['total_yield']["value"]),
+        'lower':       float(pmt_pc_min),
+        'upper':       float(pmt_pc_max),
+    }
+
     print(f"Electron Charge: {elementary_charge} C")
     print("*---------------------------------------*")
     print(f"| GAIN: {gain_PMT:.3e} ± {gain_PMT_err:.3e}      |")
@@ -263,64 +280,110 @@ plt.rcParams["axes.prop_cycle"] = cycler(color=[
 
 timestamp = datetime.now(JST).strftime('%Y-%m-%d %H:%M:%S')
 
-fig, ax = plt.subplots(figsize=(6.69, 2.8))
-
 counts, bin_edges = np.histogram(PMT_PulseCharge_quer, bins=50)
 bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
 errors = np.sqrt(counts)
 
-ax.errorbar(
-    bin_centers,
-    counts,
-    yerr=errors,
-    fmt='o',
-    color="#ff4b4b",
-    ecolor="#ff4b4b",
-    markersize=4,
-    capsize=2,
-    alpha=0.9,
-    label="PMT charge",
-    linewidth=1.5,
-    capthick=1.5
-)
-
-ax.set_title(f"{timestamp} | SN: {SN} | θ={theta}°, φ={phi}°", color=fg, pad=10)
-ax.set_xlabel("Charge")
-ax.set_ylabel("Events")
-
-ax.minorticks_on()
-ax.tick_params(
-    axis="both",
-    which="both",
-    direction="in",
-    top=True,
-    right=True,
-    labelright=False,
-    labeltop=False,
-)
-
-ax.legend(
-    [f"PMT charge\nGain: {gain_PMT:.3e}"],
-    loc="upper right",
-    fontsize="small",
-    framealpha=0.85,
-    facecolor="#262730",
-    edgecolor=grid,
-)
-
-plot_filename = os.path.join(output_dir, f"live_data_{input_datetime}_{SN}_theta{theta}_phi{phi}_charge.png")
-fig.savefig(
-    plot_filename,
-    dpi=150,
-    bbox_inches="tight",
-)
-plt.close(fig)
-
-print(f"Plot saved to {plot_filename}")
+# Compare with the GOOD_DATA reference spectrum (../reference_compare.py);
+# the GUI shows the stored numbers, so a missing reference only leaves them out
+reference_comparison = None
+try:
+    sys.path.insert(0, os.path.dirname(script_dir))
+    from reference_compare import compare_charges
+    reference_comparison = compare_charges(PMT_PulseCharge_quer, gain_PMT)
+except Exception as e:
+    print(f"Reference comparison skipped: {e}")
+if reference_comparison:
+    print(f"Reference comparison: shape distance {reference_comparison['shape_distance']:.3f}, "
+          f"gain ratio {reference_comparison['gain_ratio']}")
+
+# Compact artifact the GUI charts directly (no image transfer/decoding)
+artifact_filename = os.path.join(output_dir, f"live_data_{input_datetime}_{SN}_theta{theta}_phi{phi}_charge.json")
+artifact = {
+    'sn':          SN,
+    'theta':       int(theta),
+    'phi':         int(phi),
+    'timestamp':   timestamp,
+    'n_events':    int(len(PMT_PulseCharge_quer)),
+    'bin_edges':   [round(float(x), 5) for x in bin_edges],
+    'counts':      [int(x) for x in counts],
+    'errors':      [round(float(x), 3) for x in errors],
+    'fit':         fit_params,
+    'gain':        float(gain_PMT),
+    'gain_err':    float(gain_PMT_err),
+    'reference':   reference_comparison,
+}
+with open(artifact_filename, 'w') as f:
+    json.dump(artifact, f, separators=(',', ':'))
+
+print(f"Histogram artifact saved to {artifact_filename}")
+
+if WRITE_PNG:
+    fig, ax = plt.subplots(figsize=(6.69, 2.8))
+
+    ax.errorbar(
+        bin_centers,
+        counts,
+        yerr=errors,
+        fmt='o',
+        color="#ff4b4b",
+        ecolor="#ff4b4b",
+        markersize=4,
+        capsize=2,
+        alpha=0.9,
+        label="PMT charge",
+        linewidth=1.5,
+        capthick=1.5
+    )
+
+    ax.set_title(f"{timestamp} | SN: {SN} | θ={theta}°, φ={phi}°", color=fg, pad=10)
+    ax.set_xlabel("Charge")
+    ax.set_ylabel("Events")
+
+    ax.minorticks_on()
+    ax.tick_params(
+        axis="both",
+        which="both",
+        direction="in",
+        top=True,
+        right=True,
+        labelright=False,
+        labeltop=False,
+    )
+
+    ax.legend(
+        [f"PMT charge\nGain: {gain_PMT:.3e}"],
+        loc="upper right",
+        fontsize="small",
+        framealpha=0.85,
+        facecolor="#262730",
+        edgecolor=grid,
+    )
+
+    plot_filename = os.path.join(output_dir, f"live_data_{input_datetime}_{SN}_theta{theta}_phi{phi}_charge.png")
+    # Palette PNG at R12860_PNG_DPI (../compact_png.py): a fraction of the bytes to sync
+    try:
+        sys.path.insert(0, os.path.dirname(script_dir))
+        from compact_png import save_figure
+        save_figure(fig, plot_filename, bbox_inches="tight")
+    except ImportError:
+        fig.savefig(plot_filename, dpi=150, bbox_inches="tight")
+    plt.close(fig)
+
+    print(f"Plot saved to {plot_filename}")
 
 gain_filename = os.path.join(output_dir, f"live_data_{input_datetime}_{SN}_theta{theta}_phi{phi}_GAIN.txt")
 with open(gain_filename, 'w') as f:
     f.write(f"{gain_PMT:.3e}")
 
 print(f"Gain saved to {gain_filename}")
+# Announce the finished files to the live monitor (../artifact_manifest.py);
+# never let that fail the analysis, the monitor falls back to a full rsync
+try:
+    sys.path.insert(0, os.path.dirname(script_dir))
+    from artifact_manifest import record
+    record(script_dir, SN, [artifact_filename, gain_filename] + ([plot_filename] if WRITE_PNG else []))
+except Exception as e:
+    print(f"Manifest not updated: {e}")
+
 print("Processing complete!")
\ No newline at end of file
@@ -84,7 +84,8 @@ print(f"\nTotal measurements: {len(gain_data)}")
 
 # Create output directory
 curr_datetime = datetime.now().strftime('%Y%m%d')
-output_dir = os.path.join(base_dir, f"scan_output_{curr_datetime}", SN)
+run_id = os.environ.get("R12860_RUN_ID", curr_datetime)    # set when run from a scan job
+output_dir = os.path.join(base_dir, f"scan_output_{run_id}", SN)
 os.makedirs(output_dir, exist_ok=True)
 
 # Dark mode friendly colors
@@ -242,7 +243,13 @@ plt.tight_layout()
 
 # Save plot
 plot_filename = os.path.join(output_dir, f"{SN}_gain_polar_map.png")
-fig.savefig(plot_filename, dpi=150, bbox_inches="tight", facecolor=bg)
+# Palette PNG at R12860_PNG_DPI (../compact_png.py): a fraction of the bytes to sync
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from compact_png import save_figure
+    save_figure(fig, plot_filename, bbox_inches="tight", facecolor=bg)
+except ImportError:
+    fig.savefig(plot_filename, dpi=150, bbox_inches="tight", facecolor=bg)
 plt.close(fig)
 
 print(f"\nPolar map saved to {plot_filename}")
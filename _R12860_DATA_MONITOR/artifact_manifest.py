@@ -0,0 +1,59 @@
+"""
+Per-serial-number manifest of finished analysis outputs.
+
+The live monitor used to find new outputs by having rsync expand
+scan_output_*/<SN> and HV_output_*/<SN> and walk every historical output
+directory on every sync.  The analysis scripts now append each file they
+have finished writing to
+
+    <base_dir>/manifests/<SN>.txt
+
+one path per line, relative to base_dir (the SCAN_DATA or HV_CHECK
+directory).  The line number is the cursor: the GUI's executor remembers how
+many lines it has already fetched, reads only the lines after that
+(`tail -n +N`) and transfers exactly those files with rsync --files-from.
+
+From Python:   record(script_dir, SN, [artifact_filename, plot_filename])
+From a shell:  python3 ../artifact_manifest.py <base_dir> <SN> <file> [<file> ...]
+"""
+
+import os
+import sys
+
+try:
+    import fcntl
+except ImportError:        # not on the cluster; appends are then unlocked
+    fcntl = None
+
+MANIFEST_DIR = "manifests"
+
+
+def manifest_path(base_dir, sn):
+    return os.path.join(base_dir, MANIFEST_DIR, f"{sn}.txt")
+
+
+def record(base_dir, sn, paths):
+    """Append finished files (absolute or relative to base_dir) to SN's manifest."""
+    base_dir = os.path.abspath(base_dir)
+    lines = []
+    for path in paths:
+        if path and os.path.isfile(path):
+            lines.append(os.path.relpath(os.path.abspath(path), base_dir) + "\n")
+    if not lines:
+        return
+    path = manifest_path(base_dir, sn)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)     # scan and overall scripts may append at once
+        f.write("".join(lines))
+        f.flush()
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: python3 artifact_manifest.py <base_dir> <SN> <file> [<file> ...]")
+        sys.exit(1)
+    record(sys.argv[1], sys.argv[2], sys.argv[3:])
@@ -0,0 +1,63 @@
+"""
+Size-optimised PNGs for the analysis plots.
+
+The plots were saved as 150-dpi full-colour PNGs, although a charge plot is
+a few dozen markers and some text on a flat dark background.  Every one of
+them crosses the slow link from the cluster to the test stand.
+save_figure() renders the figure once, reduces it to a small palette
+(PNG_COLORS entries, no dithering, so flat areas stay flat) and writes an
+optimised palette PNG at PNG_DPI.  The file name and format do not change,
+so the GUI and the sync need nothing new.
+
+Both settings can be changed per job without editing the scripts:
+
+    export R12860_PNG_DPI=120       # default 100
+    export R12860_PNG_COLORS=128    # default 64; 0 keeps full colour
+
+From Python:   save_figure(fig, plot_filename, bbox_inches="tight")
+
+(transfer_report.py in the monitor directory uses quantize_png() to show
+what these settings save on data already synced.)
+"""
+
+import io
+import os
+
+PNG_DPI    = int(os.environ.get("R12860_PNG_DPI", "100"))
+PNG_COLORS = int(os.environ.get("R12860_PNG_COLORS", "64"))
+
+MEDIANCUT, FASTOCTREE = 0, 2   # PIL quantize methods (plain ints for older Pillow)
+
+
+def quantize_png(data, colors=None, scale=1.0):
+    """PNG bytes as an optimised palette PNG (optionally resampled by scale); data if not smaller."""
+    from PIL import Image
+    colors = PNG_COLORS if colors is None else colors
+    image = Image.open(io.BytesIO(data))
+    if scale != 1.0:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                             Image.LANCZOS)
+    if colors:
+        if image.mode == "RGBA" and image.getextrema()[3][0] == 255:
+            image = image.convert("RGB")          # opaque: median cut gives the cleanest palette
+        method = MEDIANCUT if image.mode == "RGB" else FASTOCTREE
+        image = image.quantize(colors=colors, method=method, dither=0)
+    out = io.BytesIO()
+    image.save(out, format="PNG", optimize=True)
+    return out.getvalue() if out.tell() < len(data) or scale != 1.0 else data
+
+
+def save_figure(fig, path, dpi=None, colors=None, **savefig_kwargs):
+    """fig.savefig(path) as a palette PNG; falls back to the plain PNG if Pillow cannot."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi or PNG_DPI, **savefig_kwargs)
+    data = buffer.getvalue()
+    try:
+        data = quantize_png(data, colors)
+    except Exception as e:
+        print(f"Palette PNG not written ({e}); keeping full colour")
+    # Written whole and renamed, so a sync never picks up half a plot
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
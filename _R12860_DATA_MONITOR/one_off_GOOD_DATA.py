@@ -8,6 +8,7 @@ import uproot
 import awkward as ak
 import glob
 import os
+import json
 from datetime import datetime
 from cycler import cycler
 import zfit
@@ -302,4 +303,25 @@ with open(gain_filename, 'w') as f:
     f.write(f"{gain_PMT:.3e}")
 
 print(f"Gain saved to {gain_filename}")
+
+# Reference spectrum as a normalised binned array on fixed edges (the charge
+# cut window), compared numerically against every new point by the analysis
+# scripts and the GUI.  Copy it to example_data/ next to GOOD_DATA_charge.png.
+ref_edges = np.linspace(0.5, 4.5, 51)
+ref_counts, _ = np.histogram(PMT_PulseCharge_quer, bins=ref_edges)
+ref_total = max(int(ref_counts.sum()), 1)
+reference = {
+    'bin_edges': [round(float(x), 5) for x in ref_edges],
+    'fractions': [float(c) / ref_total for c in ref_counts],
+    'errors':    [float(np.sqrt(c)) / ref_total for c in ref_counts],
+    'n_events':  int(ref_counts.sum()),
+    'gain':      float(gain_PMT),
+    'gain_err':  float(gain_PMT_err),
+    'source':    os.path.basename(input_file[0]),
+}
+reference_filename = os.path.join(output_dir, "GOOD_DATA_reference.json")
+with open(reference_filename, 'w') as f:
+    json.dump(reference, f, separators=(',', ':'))
+
+print(f"Reference histogram saved to {reference_filename}")
 print("Processing complete!")
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Comparison of one point's charges with the GOOD_DATA reference spectrum.
+
+one_off_GOOD_DATA.py writes template_data/GOOD_DATA_reference.json (bin
+edges, per-bin fractions, gain).  The scan and HV analysis scripts histogram
+each point's charges on the reference's own edges and store two numbers in
+the point's _charge.json artifact under 'reference':
+
+    shape_distance — Hellinger distance between the two normalised spectra
+                     (0 = identical shape, 1 = no overlap)
+    gain_ratio     — point gain / reference gain
+
+The GUI shows the stored numbers as they are, so every point is compared
+once, on the cluster, against the same reference.
+
+From Python:   comparison = compare_charges(PMT_PulseCharge_quer, gain_PMT)
+"""
+
+import json
+import os
+
+import numpy as np
+
+REFERENCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "template_data", "GOOD_DATA_reference.json")
+
+
+def load_reference(path=REFERENCE_FILE):
+    """The reference dict, or None when it has not been written yet."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def shape_distance(p, q):
+    """Hellinger distance between two binned spectra on the same edges."""
+    p = np.asarray(p, dtype=float)
+    q = np.asarray(q, dtype=float)
+    p, q = p / p.sum(), q / q.sum()
+    return float(np.sqrt(max(0.0, 1.0 - np.sum(np.sqrt(p * q)))))
+
+
+def compare_charges(charges, gain, reference=None):
+    """{'shape_distance', 'gain_ratio'} for one point's charges, or None without a reference."""
+    reference = reference if reference is not None else load_reference()
+    if not reference or len(charges) == 0:
+        return None
+    point_counts, _ = np.histogram(charges, bins=reference['bin_edges'])
+    ref_fractions = np.asarray(reference['fractions'], dtype=float)
+    if point_counts.sum() <= 0 or ref_fractions.sum() <= 0:
+        return None
+    return {
+        'shape_distance': shape_distance(point_counts, ref_fractions),
+        'gain_ratio':     float(gain / reference['gain']) if reference.get('gain') else None,
+    }
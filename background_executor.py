@@ -2,27 +2,80 @@
 """
 Background executor script for auto-running commands on Spartan HPC.
 Stays alive until the main Streamlit app stops sending heartbeats.
-Picks up any config written with running=True and submits + monitors it.
+
+One asyncio process serves every PMT slot on the station.  Each job (an HV
+check or a scan for one slot) is a Job task with its own state machine:
+
+    submitting -> monitoring -> complete | incomplete | timeout | stopped | failed
+
+SSH and rsync run as asyncio subprocesses, so a slow sync for one PMT never
+holds up another PMT's progress, and the heartbeat check and config-file
+fallback are single shared timers however many slots there are.  When each
+job syncs next is decided by sync_scheduler.py from learned arrival times,
+and the SLURM state of every submitted job is polled in one batched squeue
+call per host (slurm_tracker.py): queued jobs are not synced and a job that
+died ends its monitoring straight away.  New points are taken from the
+files each rsync reports transferring (rsync_changes.py); the local tree is
+never rescanned.  Where the cluster keeps a per-SN manifest of finished
+outputs, only the files listed after our cursor are fetched (manifest_sync.py).
+Syncs go through sync_engine.py, shared with the GUI's Manual Sync: a job
+syncs only its own tree (scan or HV) and, once the SLURM job has published
+its run directory, only that directory; PMTs waiting on the same tree share
+one transfer.
+Each job checkpoints its SLURM job id, points seen and sync cursor, so an
+executor that is restarted reattaches to the running job instead of
+submitting it again.
+
+Jobs and stop requests arrive over the control socket (executor_channel.py);
+each slot's executor_config_<pmt>.json is also re-read every
+FILE_FALLBACK_SECONDS (every FILE_POLL_SECONDS if the socket is not up).
+Every event and status change is appended to the event journal
+(event_journal.py) and pushed to socket subscribers; executor_status_<pmt>.json
+is rewritten only when a job changes state.  All ssh/rsync traffic to a host
+shares one multiplexed connection with the GUI (ssh_pool.py).  Sync, SSH,
+SLURM queue and point timings are exported by executor_metrics.py.
 """
 
-import subprocess
+import asyncio
 import time
 import json
 import os
-import glob
 import re
+import signal
 from datetime import datetime
 import sys
 
-CONFIG_FILE  = sys.argv[1] if len(sys.argv) > 1 else "executor_config.json"
-STATUS_FILE  = sys.argv[2] if len(sys.argv) > 2 else "executor_status.json"
+from executor_channel import ControlChannel
+from event_journal import EventJournal
+from rsync_changes import point_key
+from ssh_pool import get_ssh_pool, ssh_command
+from manifest_sync import manifest_key, load_cursors, save_cursor
+from sync_engine import SyncEngine, Tree, run_shell, published_run, LOCAL_DIR
+from slurm_tracker import SlurmTracker, is_finished
+from sync_scheduler import ArrivalModel, SyncScheduler, job_type, MAX_WAIT_SECONDS
+from executor_metrics import get_metrics, serve_metrics, append_snapshot, METRICS_FILE_SECONDS
+from station import load_station, make_slot, EXECUTOR_SOCKET
+
+SOCKET_FILE = sys.argv[1] if len(sys.argv) > 1 else EXECUTOR_SOCKET
 
 HEARTBEAT_FILE    = "app_heartbeat.json"
 HEARTBEAT_TIMEOUT = 15   # seconds — app refreshes every 5 s, so 15 s is safe
 
+FILE_FALLBACK_SECONDS = 30    # config file re-read interval while the socket is up
+FILE_POLL_SECONDS     = 2     # ... and without it
+SLURM_POLL_SECONDS    = 30    # squeue/sacct cycle for all tracked jobs
+SLURM_STALE_SECONDS   = SLURM_POLL_SECONDS * 4   # a queued state older than this no longer holds off syncs
+CLOCK_SKEW_SECONDS    = 300   # cluster vs local clock slack when matching file times to a job
+
+SLOT_ID_RE = re.compile(r'^pmt(\d+)$')
+
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
+def now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
 def is_app_alive():
     if not os.path.exists(HEARTBEAT_FILE):
         return False
@@ -32,24 +85,32 @@ def is_app_alive():
         return False
 
 
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
+def read_json(path):
+    if not os.path.exists(path):
         return None
     try:
-        with open(CONFIG_FILE, 'r') as f:
+        with open(path, 'r') as f:
             return json.load(f)
     except Exception:
         return None
 
 
-def save_status(data):
+def write_json(path, data):
+    """Write via a temp file + rename so readers never see half a file."""
     try:
-        with open(STATUS_FILE, 'w') as f:
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
             json.dump(data, f, indent=2)
+        os.replace(tmp, path)
     except Exception:
         pass
 
 
+def slot_for(pmt_id):
+    """Slot files for 'pmtN', even if the station has shrunk since the job started."""
+    return make_slot(int(SLOT_ID_RE.match(pmt_id).group(1)) - 1)
+
+
 def get_remote_dir(config):
     """Return whichever remote directory key is present in this config."""
     return (config.get('hv_remote_directory')
@@ -66,254 +127,546 @@ def get_remote_command(config):
             or '')
 
 
-def execute_command(remote_host, remote_dir, remote_command):
+def sync_tree(config, run=None):
+    """The one remote output tree this job's results land in (just its run directory, if known)."""
+    return Tree(config['remote_host'], get_remote_dir(config), job_type(config), run)
+
+
+async def execute_command(remote_host, remote_dir, remote_command):
     """SSH to remote_host, cd to remote_dir and run remote_command."""
-    ssh_cmd = f"ssh {remote_host} 'cd {remote_dir} && {remote_command}'"
+    await asyncio.to_thread(get_ssh_pool().ensure, remote_host)
+    ssh_cmd = f"{ssh_command(remote_host)} 'cd {remote_dir} && {remote_command}'"
     print(f"  SSH: {ssh_cmd}")
+    started = time.monotonic()
     try:
-        result = subprocess.run(
-            ssh_cmd, shell=True, capture_output=True, text=True, timeout=120
-        )
-        job_id = None
-        if result.returncode == 0 and "Submitted batch job" in result.stdout:
-            job_id = result.stdout.strip().split()[-1]
-        return result.returncode == 0, result.stdout, result.stderr, job_id
-    except subprocess.TimeoutExpired:
-        return False, "", "SSH command timed out", None
-    except Exception as e:
+        rc, stdout, stderr = await run_shell(ssh_cmd)
+    except OSError as e:
         return False, "", str(e), None
+    get_metrics().observe('ssh_seconds', time.monotonic() - started, op='submit')
+    if rc is None:
+        return False, "", "SSH command timed out", None
+    if rc == 255:
+        get_ssh_pool().failed(remote_host)
+    job_id = None
+    if rc == 0 and "Submitted batch job" in stdout:
+        job_id = stdout.strip().split()[-1]
+    return rc == 0, stdout, stderr, job_id
 
 
-def count_data_points(local_dir="synced_data/"):
-    """Count unique scan/HV data points present locally."""
-    if not os.path.exists(local_dir):
-        return 0
-    png_files = glob.glob(f"{local_dir}/**/*_charge.png", recursive=True)
-    unique = set()
-    for f in png_files:
-        m = re.search(r'theta(\d+)_phi(\d+)', f)
-        if m:
-            unique.add(('scan', m.group(1), m.group(2)))
-            continue
-        m = re.search(r'HV_(\d+)_charge', f)
-        if m:
-            unique.add(('hv', m.group(1)))
-    return len(unique)
-
-
-def sync_from_remote(config):
-    """Rsync scan_output_* and HV_output_* from remote to local."""
-    remote_host = config['remote_host']
-    remote_dir  = get_remote_dir(config)
-    sn          = config.get('serial_number')
-    local_dir   = "synced_data/"
-
-    # Scan data
-    src = f"{remote_dir}/scan_output_*/{sn}" if sn else f"{remote_dir}/scan_output_*/"
-    cmd = (f"rsync -avz --include='*/' --include='*_charge.png' "
-           f"--include='*_GAIN.txt' --exclude='*' "
-           f"{remote_host}:{src} {local_dir}")
-    r = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=120)
-
-    # HV data
-    src_hv = f"{remote_dir}/HV_output_*/{sn}/" if sn else f"{remote_dir}/HV_output_*/"
-    cmd_hv = (f"rsync -avz --include='*/' --include='HV_output_*/' "
-              f"--include='*/data_HV_*/' --include='*_charge.png' "
-              f"--include='*_GAIN.txt' --include='*_gain_vs_hv_loglog.png' "
-              f"--include='*_HV_at_gain_*.txt' --exclude='*' "
-              f"{remote_host}:{src_hv} {local_dir}")
-    r_hv = subprocess.run(cmd_hv, shell=True, capture_output=True, text=True, timeout=120)
-
-    ok  = (r.returncode == 0 or r_hv.returncode == 0)
-    msg = "Sync OK" if ok else f"scan rc={r.returncode} hv rc={r_hv.returncode}"
-    return ok, msg
-
-
-def sleep_interruptible(seconds):
-    """
-    Sleep second-by-second, returning False early if:
-      - heartbeat is lost (app closed)
-      - config running flag flipped to False (user stopped)
-    Returns True if the full sleep completed normally.
-    """
-    for _ in range(seconds):
-        if not is_app_alive():
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Heartbeat lost during sleep.")
-            return False
-        cfg = load_config()
-        if not cfg or not cfg.get('running'):
-            return False
-        time.sleep(1)
-    return True
-
-
-# ── Main loop ─────────────────────────────────────────────────────────────────
-
-def main():
-    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
-          f"Background executor started  config={CONFIG_FILE}")
-    print(f"  Heartbeat timeout: {HEARTBEAT_TIMEOUT}s")
+# ── Checkpoints ──────────────────────────────────────────────────────────────
+# executor_checkpoint_<pmt>.json holds what a restarted executor needs to pick
+# a job up again: its SLURM job id, the points already seen and the sync cursor.
 
-    save_status({'running': False, 'completed': 0, 'total': 0,
-                 'message': 'Executor ready, waiting for commands'})
+def job_key(config):
+    """What identifies 'the same job' across executor restarts."""
+    return [config.get('remote_host'), get_remote_dir(config), get_remote_command(config),
+            config.get('serial_number'), config.get('total_runs', 21)]
 
-    while True:
-        try:
-            # ── Heartbeat check ──────────────────────────────────────────────
-            if not is_app_alive():
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] "
-                      f"No heartbeat — app has exited. Stopping.")
-                save_status({'running': False, 'completed': 0, 'total': 0,
-                             'message': 'Executor stopped: main app exited'})
-                break
 
-            config = load_config()
+def resumable(checkpoint, config):
+    return bool(checkpoint and checkpoint.get('job_id')
+                and checkpoint.get('key') == job_key(config)
+                and time.time() - checkpoint.get('updated', 0) < MAX_WAIT_SECONDS)
 
-            # ── Idle — no job yet ─────────────────────────────────────────────
-            if not (config and config.get('running')):
-                time.sleep(2)
-                continue
 
-            # ── Job received ──────────────────────────────────────────────────
-            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Job received")
-
-            remote_dir = get_remote_dir(config)
-            remote_cmd = get_remote_command(config)
-            total_runs = config.get('total_runs', 21)
-
-            print(f"  remote_dir : {remote_dir}")
-            print(f"  remote_cmd : {remote_cmd}")
-            print(f"  total_runs : {total_runs}")
-
-            # Guard against misconfigured job
-            if not remote_dir or not remote_cmd:
-                print("  ERROR: remote_dir or remote_cmd is empty — check config keys")
-                save_status({'running': False, 'completed': 0, 'total': total_runs,
-                             'message': 'ERROR: missing remote_dir or remote_cmd in config'})
-                config['running'] = False
-                with open(CONFIG_FILE, 'w') as f:
-                    json.dump(config, f, indent=2)
-                time.sleep(2)
+def points_since(local_dir, sn, since):
+    """
+    Points of serial number sn with local files from since onwards (rsync keeps
+    the cluster's mtimes).  Only walked once, when a job is resumed, to pick up
+    what a manual sync fetched while no executor was running.
+    """
+    points = set()
+    for root, _, files in os.walk(local_dir):
+        for name in files:
+            point = point_key(os.path.join(root, name), sn)
+            if point is None:
                 continue
-
-            save_status({'running': True, 'completed': 0, 'total': total_runs,
-                         'message': 'Submitting SLURM job…'})
-
+            try:
+                if os.path.getmtime(os.path.join(root, name)) >= since - CLOCK_SKEW_SECONDS:
+                    points.add(point)
+            except OSError:
+                pass
+    return points
+
+
+def visibility_lags(paths):
+    """Seconds each file took from being written on the cluster to landing here."""
+    lags = []
+    for path in paths:
+        try:
+            lags.append(max(0.0, time.time() - os.path.getmtime(os.path.join(LOCAL_DIR, path))))
+        except OSError:
+            pass
+    return lags
+
+
+# ── Jobs ─────────────────────────────────────────────────────────────────────
+
+class Job:
+    """One HV check or scan for one PMT slot."""
+
+    def __init__(self, executor, pmt_id, config):
+        self.executor     = executor
+        self.pmt_id       = pmt_id
+        self.config       = config
+        self.total        = config.get('total_runs', 21)
+        self.completed    = 0
+        self.points       = set()  # data points whose files have arrived since submission
+        self.next_arrival = None   # predicted time of the next point
+        self.job_id       = None   # SLURM job id, once submitted
+        self.run_dir      = None   # output directory the SLURM job published
+        self.slurm        = None   # latest JobState from the tracker
+        self.slurm_seen   = None   # when the tracker last reported this job
+        self.scheduler    = None
+        self.wake         = asyncio.Event()   # set when the SLURM state changes
+        self.submitted_at = None
+        self.keep_checkpoint = False          # executor shutting down: resume this job next time
+        self.resumed      = False             # taken over from a previous executor
+        self.state        = 'submitting'
+        self.stop_reason  = 'Stopped by user — ready for new commands'
+        self.task         = None
+
+    def log(self, message):
+        print(f"[{now()}] {self.pmt_id}: {message}")
+
+    def report(self, kind, running, message, completed=None, durable=False, **fields):
+        """Journal a status change; durable ones also rewrite the status file."""
+        self.executor.save_status(self.pmt_id, {
+            'running': running,
+            'completed': self.completed if completed is None else completed,
+            'total': self.total,
+            'message': message,
+            'next_arrival': self.next_arrival,
+            'slurm': self.slurm._asdict() if self.slurm else None,
+        }, kind, durable, **fields)
+
+    def add_files(self, paths):
+        """Files that just arrived locally (from our syncs or the GUI's): note their points."""
+        sn = self.config.get('serial_number')
+        for path in paths:
+            point = point_key(path, sn)
+            if point is not None:
+                self.points.add(point)
+
+    def on_slurm(self, slurm):
+        """New state from the tracker; wakes the monitoring loop if it changed."""
+        self.slurm_seen = time.time()
+        if self.slurm is not None and slurm.state == self.slurm.state:
+            self.slurm = slurm           # just the elapsed time moving on
+            return
+        if slurm.state == 'RUNNING' and self.submitted_at and \
+                (self.slurm.state == 'PENDING' if self.slurm else not self.resumed):
+            get_metrics().observe('queue_wait_seconds', time.time() - self.submitted_at)
+        if slurm.state == 'RUNNING' and self.scheduler is not None:
+            self.scheduler.restart()     # queue wait is not part of the first point's gap
+        self.slurm = slurm
+        where = f" on {slurm.node}" if slurm.node else ""
+        self.log(f"SLURM job {slurm.job_id}: {slurm.state}{where}")
+        self.report('slurm', True, f'SLURM job {slurm.job_id} {slurm.state}{where}')
+        self.wake.set()
+
+    async def sleep(self, delay):
+        """Sleep until the next sync, or until the SLURM state changes."""
+        self.wake.clear()
+        try:
+            await asyncio.wait_for(self.wake.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def finish(self, state, message, completed=None):
+        """Final state: report it and clear the slot's running flag."""
+        self.state = state
+        self.report(state, False, message, completed, durable=True)
+        self.config['running'] = False
+        self.executor.save_config(self.pmt_id, self.config)
+        self.clear_checkpoint()
+
+    def save_checkpoint(self):
+        config = self.config
+        cursor = load_cursors().get(manifest_key(config.get('remote_host'), get_remote_dir(config),
+                                                 config.get('serial_number')))
+        write_json(slot_for(self.pmt_id).checkpoint_file, {
+            'key': job_key(config),
+            'job_id': self.job_id,
+            'submitted_at': self.submitted_at,
+            'points': sorted(self.points),
+            'last_arrival': self.scheduler.last_arrival if self.scheduler else self.submitted_at,
+            'sync_cursor': cursor,
+            'run_dir': self.run_dir,
+            'updated': time.time(),
+        })
+
+    def clear_checkpoint(self):
+        try:
+            os.remove(slot_for(self.pmt_id).checkpoint_file)
+        except OSError:
+            pass
+
+    def restore(self, checkpoint):
+        """Take over a job a previous executor was monitoring."""
+        self.resumed = True
+        config = self.config
+        sn = config.get('serial_number')
+        self.job_id       = checkpoint['job_id']
+        self.submitted_at = checkpoint.get('submitted_at') or time.time()
+        self.points       = {tuple(point) for point in checkpoint.get('points', [])}
+        self.run_dir      = checkpoint.get('run_dir')
+        key = manifest_key(config.get('remote_host'), get_remote_dir(config), sn)
+        if checkpoint.get('sync_cursor') and key not in load_cursors():
+            save_cursor(key, checkpoint['sync_cursor'])
+
+    async def run(self):
+        try:
+            await self._run()
+        except asyncio.CancelledError:
+            self.log(self.stop_reason)
+            self.state = 'stopped'
+            self.report('stopped', False, self.stop_reason, durable=True)
+            if not self.keep_checkpoint:
+                self.clear_checkpoint()
+        except Exception as e:
+            self.log(f"Unhandled error: {e}")
+            import traceback
+            traceback.print_exc()
+            self.finish('failed', f'ERROR: {str(e)[:120]}')
+        finally:
+            self.executor.job_done(self)
+
+    async def _run(self):
+        config     = self.config
+        remote_dir = get_remote_dir(config)
+        remote_cmd = get_remote_command(config)
+        self.log(f"Job received  remote_dir={remote_dir}  remote_cmd={remote_cmd}  total_runs={self.total}")
+
+        # Guard against misconfigured job
+        if not remote_dir or not remote_cmd:
+            self.log("ERROR: remote_dir or remote_cmd is empty — check config keys")
+            self.finish('failed', 'ERROR: missing remote_dir or remote_cmd in config', completed=0)
+            return
+
+        checkpoint = read_json(slot_for(self.pmt_id).checkpoint_file)
+        if resumable(checkpoint, config):
+            # ── Reattach to the job a previous executor submitted ─────────────
+            self.restore(checkpoint)
+            self.points |= await asyncio.to_thread(points_since, LOCAL_DIR, config.get('serial_number'),
+                                                   self.submitted_at)
+            self.completed = len(self.points)
+            self.log(f"↻ Resuming SLURM job {self.job_id} at {self.completed}/{self.total} points")
+            self.report('resumed', True, f'Reattached to SLURM job {self.job_id} '
+                        f'({self.completed}/{self.total} points)', durable=True, job_id=self.job_id)
+            started = checkpoint.get('last_arrival') or self.submitted_at
+        else:
             # ── Submit SLURM job ──────────────────────────────────────────────
-            ok, stdout, stderr, job_id = execute_command(
-                config['remote_host'], remote_dir, remote_cmd
-            )
+            self.clear_checkpoint()
+            self.report('submitting', True, 'Submitting SLURM job…', completed=0, durable=True,
+                        serial_number=config.get('serial_number'))
+            ok, stdout, stderr, job_id = await execute_command(config['remote_host'], remote_dir, remote_cmd)
+            self.submitted_at = started = time.time()
 
             if ok:
-                print(f"  ✓ Job submitted  job_id={job_id}")
+                self.log(f"✓ Job submitted  job_id={job_id}")
                 if job_id:
+                    self.job_id = job_id
                     config.setdefault('job_ids', []).append(job_id)
-                    with open(CONFIG_FILE, 'w') as f:
-                        json.dump(config, f, indent=2)
-                save_status({'running': True, 'completed': 0, 'total': total_runs,
-                             'message': f'Job submitted (id={job_id}), waiting for data…'})
+                    self.executor.save_config(self.pmt_id, config)
+                self.report('submitted', True, f'Job submitted (id={job_id}), waiting for data…',
+                            completed=0, job_id=job_id)
             else:
-                print(f"  ✗ Job submission FAILED")
-                print(f"    stdout: {stdout.strip()}")
-                print(f"    stderr: {stderr.strip()}")
-                save_status({'running': True, 'completed': 0, 'total': total_runs,
-                             'message': f'Job submission failed: {stderr.strip()[:120]}'})
+                self.log(f"✗ Job submission FAILED  stdout: {stdout.strip()}  stderr: {stderr.strip()}")
+                self.report('submit_failed', True, f'Job submission failed: {stderr.strip()[:120]}',
+                            completed=0)
                 # Still enter monitoring — sbatch sometimes prints to stderr on success
-
-            # ── Monitoring loop ───────────────────────────────────────────────
-            # Baseline: snapshot existing local files so we only count NEW arrivals
-            baseline    = count_data_points()
-            sync_interval = 30
-            max_cycles  = 720   # 720 × 30 s = 6 hours max
-            wait_cycles = 0
-            new_pts     = 0
-
-            print(f"  Baseline local count: {baseline}  (only new arrivals counted)")
-
-            while True:
-                # Heartbeat check
-                if not is_app_alive():
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] "
-                          f"Heartbeat lost during monitoring.")
-                    save_status({'running': False, 'completed': new_pts,
-                                 'total': total_runs,
-                                 'message': 'Stopped: main app exited'})
-                    return  # exit the process entirely
-
-                # User-stop check
-                config = load_config()
-                if not config or not config.get('running'):
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Stopped by user.")
-                    save_status({'running': False, 'completed': new_pts,
-                                 'total': total_runs,
-                                 'message': 'Stopped by user — ready for new commands'})
-                    break   # back to outer idle loop
-
-                # Sync
-                remote_dir = get_remote_dir(config)
-                print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Syncing from {remote_dir}…")
-                sync_ok, sync_msg = sync_from_remote(config)
-                print(f"  {sync_msg}")
-
-                current = count_data_points()
-                new_pts = current - baseline
-
-                if new_pts > 0:
-                    wait_cycles = 0
-                    print(f"  ✓ {new_pts}/{total_runs} new points collected")
-                    save_status({'running': True, 'completed': new_pts,
-                                 'total': total_runs,
-                                 'message': f'Collected {new_pts}/{total_runs} points'})
-
-                    if new_pts >= total_runs:
-                        print(f"  ✓ All {total_runs} points collected — done!")
-                        sync_from_remote(config)  # final sync
-                        save_status({'running': False, 'completed': total_runs,
-                                     'total': total_runs,
-                                     'message': 'Complete — all data collected'})
-                        config['running'] = False
-                        with open(CONFIG_FILE, 'w') as f:
-                            json.dump(config, f, indent=2)
-                        break   # back to outer idle loop
+            self.save_checkpoint()
+
+        # ── Monitoring ────────────────────────────────────────────────────────
+        # Only points whose files rsync transfers after submission count
+        self.state  = 'monitoring'
+        scheduler   = self.scheduler = SyncScheduler(self.executor.arrivals, job_type(config),
+                                                     started, index=len(self.points))
+        wait_cycles = 0
+
+        while True:
+            slurm = self.slurm
+            if slurm is not None and slurm.state == 'PENDING':
+                if time.time() - self.slurm_seen < SLURM_STALE_SECONDS:
+                    # Nothing can arrive before the job has a node
+                    self.report('queued', True, f'SLURM job {slurm.job_id} queued, waiting for a node…')
+                    await self.sleep(SLURM_STALE_SECONDS)
+                    continue
+                # squeue/sacct have stopped answering for this job: the state may be
+                # long out of date, so sync (and let the timeout apply) as if running
+                self.log(f"SLURM job {slurm.job_id} last seen queued "
+                         f"{time.time() - self.slurm_seen:.0f}s ago — syncing anyway")
+
+            if self.job_id and not self.run_dir:
+                # Written by the job when it starts; until then the whole tree is searched
+                self.run_dir = await published_run(config['remote_host'], remote_dir, self.job_id)
+                if self.run_dir:
+                    self.log(f"SLURM job {self.job_id} writes to {self.run_dir}")
+
+            self.log(f"Syncing from {remote_dir}…")
+            started = time.time()
+            sync_ok, sync_msg, received = await self.executor.sync_engine.sync(
+                sync_tree(config, self.run_dir), config.get('serial_number'))
+            print(f"  {sync_msg}  ({len(received)} files)")
+            self.executor.journal.append(self.pmt_id, 'sync', ok=sync_ok, message=sync_msg,
+                                         seconds=round(time.time() - started, 2), files=len(received))
+
+            self.add_files(received)
+            new_pts = len(self.points)
+            arrived = new_pts - self.completed
+            gap = scheduler.record(arrived)
+            metrics = get_metrics()
+            if gap is not None:
+                for _ in range(arrived):
+                    metrics.observe('point_interval_seconds', gap, pmt_id=self.pmt_id)
+                for lag in visibility_lags([path for path in received
+                                            if point_key(path, config.get('serial_number'))]):
+                    metrics.observe('visibility_lag_seconds', lag, pmt_id=self.pmt_id)
+            scheduler.synced()
+            self.next_arrival = scheduler.predicted_arrival()
+
+            self.save_checkpoint()
+
+            if arrived > 0:
+                wait_cycles = 0
+                self.completed = new_pts
+                self.log(f"✓ {new_pts}/{self.total} new points collected")
+                self.report('points', True, f'Collected {new_pts}/{self.total} points',
+                            arrived=arrived)
+
+            if new_pts >= self.total:
+                self.log(f"✓ All {self.total} points collected — done!")
+                await self.executor.sync_engine.sync(sync_tree(config, self.run_dir),
+                                                     config.get('serial_number'))  # final sync
+                self.finish('complete', 'Complete — all data collected', completed=self.total)
+                return
+
+            if sync_ok and slurm is not None and is_finished(slurm.state):
+                # That sync was the last one that can bring anything new (after a failed
+                # sync the points may still be on the cluster: keep trying)
+                self.log(f"✗ SLURM job {slurm.job_id} ended ({slurm.state}) at {self.completed}/{self.total}")
+                if slurm.state == 'COMPLETED':
+                    self.finish('incomplete', f'SLURM job {slurm.job_id} completed with only '
+                                              f'{self.completed}/{self.total} points')
                 else:
-                    wait_cycles += 1
-                    print(f"  No new data yet "
-                          f"(cycle {wait_cycles}/{max_cycles}, baseline={baseline}, current={current})")
-                    save_status({'running': True, 'completed': 0,
-                                 'total': total_runs,
-                                 'message': f'Waiting for data… (cycle {wait_cycles}/{max_cycles})'})
-
-                    if wait_cycles >= max_cycles:
-                        print(f"  ⚠ Timeout after {max_cycles * sync_interval}s")
-                        save_status({'running': False, 'completed': new_pts,
-                                     'total': total_runs,
-                                     'message': f'Timeout — only {new_pts}/{total_runs} points'})
-                        config['running'] = False
-                        with open(CONFIG_FILE, 'w') as f:
-                            json.dump(config, f, indent=2)
-                        break
-
-                # Interruptible sleep
-                print(f"  Sleeping {sync_interval}s before next sync…")
-                if not sleep_interruptible(sync_interval):
-                    save_status({'running': False, 'completed': new_pts,
-                                 'total': total_runs,
-                                 'message': 'Stopped: app exited or user cancelled'})
-                    if not is_app_alive():
-                        return  # app died — exit process
-                    break       # user stopped — go idle
-
-        except KeyboardInterrupt:
-            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] KeyboardInterrupt — exiting.")
-            save_status({'running': False, 'completed': 0, 'total': 0,
-                         'message': 'Executor stopped'})
-            break
-        except Exception as e:
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Unhandled error: {e}")
-            import traceback
-            traceback.print_exc()
-            time.sleep(5)
+                    self.finish('failed', f'SLURM job {slurm.job_id} {slurm.state} — '
+                                          f'{self.completed}/{self.total} points')
+                return
+
+            if arrived <= 0:
+                wait_cycles += 1
+                metrics.inc('empty_syncs_total', pmt_id=self.pmt_id)
+                self.log(f"No new data yet (sync {wait_cycles}, {new_pts}/{self.total} points)")
+
+                if scheduler.timed_out():
+                    self.log(f"⚠ Timeout: no new point for {MAX_WAIT_SECONDS}s")
+                    self.finish('timeout', f'Timeout — only {self.completed}/{self.total} points')
+                    return
+
+            delay = scheduler.next_delay()
+            if arrived <= 0:
+                self.report('waiting', True, f'Waiting for data… (next sync in {delay:.0f}s)',
+                            cycle=wait_cycles, delay=round(delay, 1))
+            metrics.set('syncs_since_point', wait_cycles, pmt_id=self.pmt_id)
+            await self.sleep(delay)
+
+
+# ── Executor ─────────────────────────────────────────────────────────────────
+
+class Executor:
+    """Runs every slot's jobs on one event loop."""
+
+    def __init__(self, socket_file):
+        self.socket_file = socket_file
+        self.jobs        = {}      # pmt_id -> running Job
+        self.channel     = None
+        self.journal     = EventJournal()
+        self.arrivals    = ArrivalModel()   # learned point arrival times, shared by all jobs
+        self.slurm       = SlurmTracker(run_shell)
+        self.sync_engine = SyncEngine(LOCAL_DIR)   # shared, so PMTs syncing one tree share a transfer
+        self.stopping    = None    # asyncio.Event, created inside the loop
+
+    def save_status(self, pmt_id, data, kind='status', durable=True, **fields):
+        """Journal the status (and push it); durable=True also rewrites the status file."""
+        event = self.journal.append(pmt_id, kind, status=data, **fields)
+        if durable:
+            write_json(slot_for(pmt_id).status_file, data)
+        if self.channel:
+            self.channel.publish(pmt_id, data, event['seq'])
+
+    def save_config(self, pmt_id, config):
+        write_json(slot_for(pmt_id).config_file, config)
+
+    def start_job(self, pmt_id, config):
+        if pmt_id in self.jobs:
+            return False
+        job = Job(self, pmt_id, config)
+        self.jobs[pmt_id] = job
+        job.task = asyncio.create_task(job.run())
+        return True
+
+    def stop_job(self, pmt_id, reason=None, keep_checkpoint=False):
+        job = self.jobs.get(pmt_id)
+        if job is None:
+            return False
+        if reason:
+            job.stop_reason = reason
+        job.keep_checkpoint = keep_checkpoint
+        job.task.cancel()
+        return True
+
+    def job_done(self, job):
+        if self.jobs.get(job.pmt_id) is job:
+            del self.jobs[job.pmt_id]
+
+    def on_command(self, op, message):
+        """Control socket commands (see executor_channel.py)."""
+        pmt_id = message.get('pmt_id')
+        if op == 'jobs':
+            return {'ok': True, 'jobs': {pid: job.state for pid, job in self.jobs.items()}}
+        if op == 'artifacts':
+            # Files some other rsync (the GUI's manual sync) brought in
+            paths = [path for path in message.get('paths') or [] if isinstance(path, str)]
+            for job in self.jobs.values():
+                job.add_files(paths)
+            return {'ok': True}
+        if op not in ('submit', 'stop'):
+            return {'ok': False, 'error': f'unknown op {op!r}'}
+        if not isinstance(pmt_id, str) or not SLOT_ID_RE.match(pmt_id):
+            return {'ok': False, 'error': f'bad pmt_id {pmt_id!r}'}
+        if op == 'stop':
+            self.stop_job(pmt_id)
+            return {'ok': True}
+        config = message.get('config')
+        if not isinstance(config, dict):
+            return {'ok': False, 'error': 'submit needs a config'}
+        if not self.start_job(pmt_id, config):
+            return {'ok': False, 'error': f'{pmt_id} already has a running job'}
+        return {'ok': True}
+
+    # ── Shared timers ────────────────────────────────────────────────────────
+
+    async def heartbeat_timer(self):
+        """Also measures loop lag: how late its 1 s sleep comes back."""
+        while not self.stopping.is_set():
+            if not is_app_alive():
+                print(f"[{now()}] No heartbeat — app has exited. Stopping.")
+                self.stopping.set()
+                return
+            started = time.monotonic()
+            await asyncio.sleep(1)
+            get_metrics().set('loop_lag_seconds', round(max(0.0, time.monotonic() - started - 1), 4))
+
+    async def metrics_timer(self):
+        """Snapshot of the metrics into the rolling file the GUI reads."""
+        while not self.stopping.is_set():
+            await asyncio.sleep(METRICS_FILE_SECONDS)
+            await asyncio.to_thread(append_snapshot, get_metrics())
+
+    async def slurm_timer(self):
+        """One batched squeue (+ sacct for jobs that left the queue) per host per cycle."""
+        while not self.stopping.is_set():
+            by_host = {}
+            for job in self.jobs.values():
+                if job.job_id and not is_finished(job.slurm and job.slurm.state):
+                    by_host.setdefault(job.config.get('remote_host'), []).append(job)
+            for host in by_host:
+                await asyncio.to_thread(get_ssh_pool().ensure, host)
+            results = await asyncio.gather(
+                *(self.timed_poll(host, [job.job_id for job in jobs]) for host, jobs in by_host.items()),
+                return_exceptions=True)
+            for jobs, states in zip(by_host.values(), results):
+                if isinstance(states, Exception):
+                    print(f"[{now()}] SLURM poll failed: {states}")
+                    continue
+                for job in jobs:
+                    if job.job_id in states:
+                        job.on_slurm(states[job.job_id])
+            await asyncio.sleep(SLURM_POLL_SECONDS)
+
+    async def timed_poll(self, host, job_ids):
+        started = time.monotonic()
+        states = await self.slurm.poll(host, job_ids)
+        get_metrics().observe('ssh_seconds', time.monotonic() - started, op='squeue')
+        return states
+
+    async def config_timer(self):
+        """Fallback: start/stop jobs from the config files the GUI writes."""
+        while not self.stopping.is_set():
+            for slot in load_station():
+                config = read_json(slot.config_file)
+                running = bool(config and config.get('running'))
+                if running and slot.pmt_id not in self.jobs:
+                    self.start_job(slot.pmt_id, config)
+                elif not running and slot.pmt_id in self.jobs:
+                    self.stop_job(slot.pmt_id)
+            await asyncio.sleep(FILE_FALLBACK_SECONDS if self.channel else FILE_POLL_SECONDS)
+
+    async def run(self):
+        self.stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        for slot in load_station():
+            self.save_status(slot.pmt_id, {'running': False, 'completed': 0, 'total': 0,
+                                           'message': 'Executor ready, waiting for commands'}, 'ready')
+
+        # Socket first, then the first config read, so a job the GUI wrote before
+        # the socket existed is still picked up from the file
+        channel = ControlChannel(self.socket_file, self.on_command)
+        if await channel.start():
+            self.channel = channel
+            print(f"  Control socket: {self.socket_file}")
+
+        metrics_server = await serve_metrics(get_metrics())
+        if metrics_server:
+            print(f"  Metrics: http://127.0.0.1:{metrics_server.sockets[0].getsockname()[1]}/metrics")
+
+        timers = [asyncio.create_task(self.heartbeat_timer()),
+                  asyncio.create_task(self.config_timer()),
+                  asyncio.create_task(self.slurm_timer()),
+                  asyncio.create_task(self.metrics_timer())]
+        await self.stopping.wait()
+
+        # ── Shutdown ──────────────────────────────────────────────────────────
+        app_exited = not is_app_alive()
+        idle = [slot.pmt_id for slot in load_station() if slot.pmt_id not in self.jobs]
+        running = list(self.jobs.values())
+        for job in running:
+            # The SLURM job keeps running; the next executor reattaches from the checkpoint
+            self.stop_job(job.pmt_id, 'Stopped: main app exited' if app_exited else 'Executor stopped',
+                          keep_checkpoint=True)
+        await asyncio.gather(*(job.task for job in running), return_exceptions=True)
+        for task in timers:
+            task.cancel()
+        for pmt_id in idle:
+            self.save_status(pmt_id, {'running': False, 'completed': 0, 'total': 0,
+                                      'message': 'Executor stopped: main app exited'
+                                      if app_exited else 'Executor stopped'}, 'executor_stopped')
+        if self.channel:
+            await self.channel.close()
+        if metrics_server:
+            metrics_server.close()
+        append_snapshot(get_metrics())
+        self.journal.close()
+
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def main():
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
+          f"Background executor started  socket={SOCKET_FILE}")
+    print(f"  Heartbeat timeout: {HEARTBEAT_TIMEOUT}s")
+    try:
+        asyncio.run(Executor(SOCKET_FILE).run())
+    except KeyboardInterrupt:
+        print(f"\n[{now()}] KeyboardInterrupt — exiting.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
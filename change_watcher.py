@@ -0,0 +1,217 @@
+"""
+Change notifications for the GUI.
+
+A daemon thread watches synced_data/ (recursively) and the executor
+status/config JSON files, and bumps a version counter per topic:
+
+    'data'          — a file in synced_data/ appeared, was replaced or removed
+    'status_<pmt>'  — executor_status_<pmt>.json or executor_config_<pmt>.json changed
+
+The GUI polls versions() (a dict copy, no filesystem access) and only reruns
+when a counter moved.  On Linux the thread blocks on inotify (via ctypes);
+if inotify is unavailable it falls back to polling mtimes every
+POLL_INTERVAL seconds.
+"""
+
+import ctypes
+import ctypes.util
+import glob
+import os
+import re
+import select
+import struct
+import threading
+
+from data_catalog import get_catalog
+
+POLL_INTERVAL = 2   # seconds — fallback mode only
+
+STATE_FILE_RE = re.compile(r'^executor_(?:status|config)_(\w+)\.json$')
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED     = 0x00008000
+IN_ISDIR       = 0x40000000
+IN_NONBLOCK    = 0x00000800
+IN_CLOEXEC     = 0x00080000
+
+DATA_MASK  = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+STATE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if hasattr(libc, 'inotify_init1') and hasattr(libc, 'inotify_add_watch'):
+            return libc
+    except OSError:
+        pass
+    return None
+
+
+class ChangeWatcher:
+    """Background watcher that turns filesystem events into version bumps."""
+
+    def __init__(self, data_dir="synced_data", state_dir="."):
+        self.data_dir  = os.path.normpath(data_dir)
+        self.state_dir = os.path.normpath(state_dir)
+        self._lock     = threading.Lock()
+        self._versions = {'data': 0}
+        self._stop     = threading.Event()
+        self._thread   = None
+        self.mode      = None
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="change-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def versions(self):
+        """Snapshot of the per-topic version counters."""
+        with self._lock:
+            return dict(self._versions)
+
+    def version(self, topic):
+        with self._lock:
+            return self._versions.get(topic, 0)
+
+    def bump(self, topic):
+        with self._lock:
+            self._versions[topic] = self._versions.get(topic, 0) + 1
+
+    # ── Thread body ───────────────────────────────────────────────────────────
+
+    def _run(self):
+        libc = _load_libc()
+        if libc is not None:
+            try:
+                self._run_inotify(libc)
+                return
+            except OSError:
+                pass
+        self._run_polling()
+
+    def _state_topic(self, name):
+        m = STATE_FILE_RE.match(name)
+        return f"status_{m.group(1)}" if m else None
+
+    def _run_inotify(self, libc):
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.mode = "inotify"
+        watches = {}   # wd -> directory path
+
+        def add_watch(path, mask):
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), mask)
+            if wd >= 0:
+                watches[wd] = path
+            return wd
+
+        def add_tree(root):
+            for dirpath, _, _ in os.walk(root):
+                add_watch(dirpath, DATA_MASK)
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        state_wd = add_watch(self.state_dir, STATE_MASK)
+        if state_wd < 0:
+            os.close(fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+        add_tree(self.data_dir)
+
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready:
+                    if not os.path.isdir(self.data_dir):
+                        # Whole tree removed — recreate and re-watch
+                        os.makedirs(self.data_dir, exist_ok=True)
+                        add_tree(self.data_dir)
+                        self.bump('data')
+                    continue
+                try:
+                    buf = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+
+                offset = 0
+                while offset < len(buf):
+                    wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+                    offset += EVENT_HEADER.size
+                    name = buf[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+                    offset += length
+
+                    if mask & IN_IGNORED:
+                        watches.pop(wd, None)
+                        continue
+                    directory = watches.get(wd)
+                    if directory is None:
+                        continue
+
+                    if wd == state_wd and directory == self.state_dir:
+                        topic = self._state_topic(name)
+                        if topic:
+                            self.bump(topic)
+                        continue
+
+                    if mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            add_tree(os.path.join(directory, name))
+                            self.bump('data')
+                        elif mask & (IN_DELETE | IN_MOVED_FROM):
+                            self.bump('data')
+                        continue
+                    if mask & IN_CREATE or name.startswith('.'):
+                        continue   # wait for close/rename; skip rsync temp files
+                    self.bump('data')
+        finally:
+            os.close(fd)
+
+    def _run_polling(self):
+        self.mode = "polling"
+        catalog = get_catalog(self.data_dir)
+        seen = {}
+        while not self._stop.is_set():
+            current = {}
+            for path in glob.glob(os.path.join(self.state_dir, "executor_*_*.json")):
+                topic = self._state_topic(os.path.basename(path))
+                if topic:
+                    try:
+                        current[path] = (topic, os.path.getmtime(path))
+                    except OSError:
+                        pass
+            for path in set(seen) | set(current):
+                if seen.get(path) != current.get(path):
+                    self.bump((current.get(path) or seen.get(path))[0])
+            seen = current
+
+            if catalog.refresh(force=True):
+                self.bump('data')
+            self._stop.wait(POLL_INTERVAL)
+
+
+_watcher      = None
+_watcher_lock = threading.Lock()
+
+
+def get_watcher(data_dir="synced_data", state_dir="."):
+    """Process-wide watcher, started on first use."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = ChangeWatcher(data_dir, state_dir)
+            _watcher.start()
+        return _watcher
@@ -0,0 +1,87 @@
+"""
+Interactive charge histogram drawn from a _charge.json artifact.
+
+The analysis scripts write the binned charge spectrum (bin edges, counts,
+Poisson errors), the two-Gaussian fit parameters and the gain next to each
+_charge.png.  charge_chart() turns that into an Altair chart with the same
+colours as the server-side PNG, plus the fitted model, so the GUI does not
+need to transfer or decode an image to show a point.  Optionally the
+GOOD_DATA reference spectrum is overlaid, scaled to the point's event count.
+"""
+
+import math
+
+import altair as alt
+import pandas as pd
+
+from reference_histogram import reference_counts
+
+DATA_COLOR = "#ff4b4b"   # Streamlit red, as in the PNG
+FIT_COLOR  = "#00d4ff"   # Cyan blue
+REF_COLOR  = "#fbbf24"   # GOOD_DATA amber
+FIT_POINTS = 200
+
+
+def _gauss_in_range(x, mu, sigma, lower, upper):
+    """Gaussian density normalised over [lower, upper], like the zfit space."""
+    if sigma <= 0:
+        return 0.0
+    cdf = lambda v: 0.5 * (1.0 + math.erf((v - mu) / (sigma * math.sqrt(2.0))))
+    norm = cdf(upper) - cdf(lower)
+    if norm <= 0:
+        return 0.0
+    return math.exp(-0.5 * ((x - mu) / sigma) ** 2) / (sigma * math.sqrt(2.0 * math.pi) * norm)
+
+
+def fit_curve(fit, bin_width):
+    """Expected events per bin of the 1PE + 2PE model across the fit range."""
+    lower, upper = fit['lower'], fit['upper']
+    mu_1, mu_2 = fit['mu_1PE'], 2 * fit['mu_1PE']
+    frac, total = fit['frac_1PE'], fit['total_yield']
+    rows = []
+    for i in range(FIT_POINTS + 1):
+        x = lower + (upper - lower) * i / FIT_POINTS
+        pdf = (frac * _gauss_in_range(x, mu_1, fit['sigma_1PE'], lower, upper)
+               + (1 - frac) * _gauss_in_range(x, mu_2, fit['sigma_2PE'], lower, upper))
+        rows.append({'charge': x, 'events': total * bin_width * pdf})
+    return pd.DataFrame(rows)
+
+
+def charge_chart(artifact, reference=None):
+    """Altair chart for one decoded artifact (see result_reader.read_charge_artifact)."""
+    edges  = artifact['bin_edges']
+    counts = artifact['counts']
+    errors = artifact.get('errors') or [math.sqrt(c) for c in counts]
+    hist = pd.DataFrame({
+        'charge': [(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])],
+        'events': counts,
+        'low':    [c - e for c, e in zip(counts, errors)],
+        'high':   [c + e for c, e in zip(counts, errors)],
+    })
+
+    x = alt.X('charge:Q', title='Charge', scale=alt.Scale(zero=False))
+    tooltip = [alt.Tooltip('charge:Q', format='.3f'), alt.Tooltip('events:Q')]
+    points = alt.Chart(hist).mark_point(filled=True, size=25, color=DATA_COLOR).encode(
+        x=x, y=alt.Y('events:Q', title='Events'), tooltip=tooltip)
+    bars = alt.Chart(hist).mark_rule(color=DATA_COLOR).encode(x=x, y='low:Q', y2='high:Q')
+    layers = [bars, points]
+
+    fit = artifact.get('fit')
+    if fit and len(edges) > 1:
+        curve = fit_curve(fit, edges[1] - edges[0])
+        layers.append(alt.Chart(curve).mark_line(color=FIT_COLOR).encode(x=x, y='events:Q'))
+
+    if reference:
+        ref = pd.DataFrame({
+            'charge': hist['charge'],
+            'events': reference_counts(reference, edges, sum(counts)),
+        })
+        layers.append(alt.Chart(ref).mark_line(color=REF_COLOR, strokeDash=[4, 3],
+                                               interpolate='step').encode(x=x, y='events:Q'))
+
+    if 'theta' in artifact:
+        where = f"θ={artifact['theta']}°, φ={artifact['phi']}°"
+    else:
+        where = f"Voltage={artifact.get('hv')}"
+    title = f"{artifact.get('timestamp', '')} | SN: {artifact.get('sn')} | {where}"
+    return alt.layer(*layers).properties(title=title, height=280).interactive()
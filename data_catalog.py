@@ -0,0 +1,312 @@
+"""
+Persistent index of the local synced_data/ tree.
+
+The GUI used to glob the whole tree for every grid cell on every rerun.
+The catalog instead keeps, per directory, the list of files it saw last time
+together with the directory mtime.  A refresh only stats directories; a
+directory is re-listed only when its mtime moved (rsync, the janitor and
+"Clear ALL Data" all create/rename/unlink entries, which bumps it).  From
+those listings it keeps lookup tables keyed by
+
+    ('scan',     SN, theta, phi) -> {plot_path: mtime}
+    ('hv',       SN, hv)         -> {plot_path: mtime}
+    ('summary',  SN)             -> {png_path: mtime}
+    ('hv_value', SN)             -> {txt_path: mtime}
+
+so every find_* helper in the GUI is a dict lookup.  A point's plot is its
+_charge.png, or its _charge.json histogram artifact when no PNG was made.  The state is saved to
+CATALOG_FILE so a restart does not need a full walk either.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+CATALOG_FILE          = "synced_data_catalog.json"
+CATALOG_VERSION       = 1
+REFRESH_MIN_INTERVAL  = 2.0   # seconds — reruns closer together reuse the last refresh
+
+SCAN_DIR_RE     = re.compile(r'^data_theta(\d+)_phi(\d+)$')
+SCAN_PNG_RE     = re.compile(r'_theta(\d+)_phi(\d+)_charge\.(?:png|json)$')
+HV_PNG_RE       = re.compile(r'^.*?_\d+_\d+_(.+)_HV_(\d+)_charge\.(?:png|json)$')
+HV_DIR_RE       = re.compile(r'^data_HV_(\d+)$')
+SUMMARY_PNG_RE  = re.compile(r'^(.+?)_gain_vs_hv.*\.png$')
+HV_VALUE_RE     = re.compile(r'^(.+)_HV_at_gain_.*\.txt$')
+CHARGE_RE       = re.compile(r'_charge\.(?:png|json)$')
+
+
+def charge_stem(path):
+    """Path without the _charge.png / _charge.json suffix."""
+    return CHARGE_RE.sub('', path)
+
+
+def classify(path):
+    """
+    Return the lookup keys a file should be indexed under, or [] if the GUI
+    never looks it up.  Mirrors the glob patterns the find_* helpers used.
+    """
+    name   = os.path.basename(path)
+    parent = os.path.basename(os.path.dirname(path))
+    grand  = os.path.basename(os.path.dirname(os.path.dirname(path)))
+
+    if CHARGE_RE.search(name):
+        m_dir = SCAN_DIR_RE.match(parent)
+        m_png = SCAN_PNG_RE.search(name)
+        if m_dir and m_png and m_dir.groups() == m_png.groups():
+            theta, phi = int(m_dir.group(1)), int(m_dir.group(2))
+            return [('scan', grand, theta, phi), ('scan', None, theta, phi)]
+
+        m = HV_PNG_RE.match(name)
+        if m:
+            return [('hv', m.group(1), int(m.group(2)))]
+        m = HV_DIR_RE.match(parent)
+        if m and f"_HV_{m.group(1)}_" in name:
+            return [('hv', grand, int(m.group(1)))]
+        return []
+
+    m = SUMMARY_PNG_RE.match(name)
+    if m:
+        return [('summary', m.group(1))]
+
+    m = HV_VALUE_RE.match(name)
+    if m:
+        return [('hv_value', m.group(1))]
+
+    return []
+
+
+class DataCatalog:
+    """Incrementally maintained index of one synced_data directory."""
+
+    def __init__(self, root, catalog_file=CATALOG_FILE):
+        self.root         = os.path.normpath(root)
+        self.catalog_file = catalog_file
+        self._lock        = threading.RLock()
+        self._dirs        = {}   # dirpath -> {'mtime': ns, 'files': {name: mtime}, 'subdirs': [name]}
+        self._index       = {}   # key -> {path: mtime}
+        self._last_refresh = 0.0
+        self._load()
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def _load(self):
+        if not os.path.exists(self.catalog_file):
+            return
+        try:
+            with open(self.catalog_file, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if data.get('version') != CATALOG_VERSION or data.get('root') != self.root:
+            return
+        self._dirs = data.get('dirs', {})
+        for dirpath, entry in self._dirs.items():
+            for name, mtime in entry['files'].items():
+                self._index_file(os.path.join(dirpath, name), mtime)
+
+    def save(self):
+        """Write the directory listings to disk (atomic replace)."""
+        with self._lock:
+            data = {'version': CATALOG_VERSION, 'root': self.root, 'dirs': self._dirs}
+            tmp = self.catalog_file + ".tmp"
+            try:
+                with open(tmp, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.catalog_file)
+            except Exception:
+                pass
+
+    # ── Index maintenance ────────────────────────────────────────────────────
+
+    def _index_file(self, path, mtime):
+        for key in classify(path):
+            self._index.setdefault(key, {})[path] = mtime
+
+    def _unindex_file(self, path):
+        for key in classify(path):
+            entries = self._index.get(key)
+            if entries is not None:
+                entries.pop(path, None)
+                if not entries:
+                    del self._index[key]
+
+    def _drop_dir(self, dirpath):
+        entry = self._dirs.pop(dirpath, None)
+        if entry is None:
+            return
+        for name in entry['files']:
+            self._unindex_file(os.path.join(dirpath, name))
+        for sub in entry['subdirs']:
+            self._drop_dir(os.path.join(dirpath, sub))
+
+    def _rescan_dir(self, dirpath, dir_mtime):
+        """List one directory and apply the difference to the index."""
+        old = self._dirs.get(dirpath, {'files': {}, 'subdirs': []})
+        files, subdirs = {}, []
+        with os.scandir(dirpath) as it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.append(e.name)
+                    elif e.is_file():
+                        files[e.name] = e.stat().st_mtime
+                except OSError:
+                    continue
+
+        changed = False
+        for name, mtime in old['files'].items():
+            if files.get(name) != mtime:
+                self._unindex_file(os.path.join(dirpath, name))
+                changed = True
+        for name, mtime in files.items():
+            if old['files'].get(name) != mtime:
+                self._index_file(os.path.join(dirpath, name), mtime)
+                changed = True
+        for sub in set(old['subdirs']) - set(subdirs):
+            self._drop_dir(os.path.join(dirpath, sub))
+            changed = True
+
+        self._dirs[dirpath] = {'mtime': dir_mtime, 'files': files, 'subdirs': sorted(subdirs)}
+        return changed
+
+    def refresh(self, force=False):
+        """
+        Bring the index up to date with the filesystem.  Unchanged directories
+        cost one stat each.  Returns True if any indexed file appeared,
+        disappeared or changed.
+        """
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_refresh < REFRESH_MIN_INTERVAL:
+                return False
+            self._last_refresh = now
+
+            changed = False
+            if not os.path.isdir(self.root):
+                if self._dirs:
+                    self._drop_dir(self.root)
+                    changed = True
+            else:
+                stack = [self.root]
+                while stack:
+                    dirpath = stack.pop()
+                    try:
+                        dir_mtime = os.stat(dirpath).st_mtime_ns
+                    except OSError:
+                        self._drop_dir(dirpath)
+                        changed = True
+                        continue
+                    entry = self._dirs.get(dirpath)
+                    if entry is None or entry['mtime'] != dir_mtime:
+                        try:
+                            changed |= self._rescan_dir(dirpath, dir_mtime)
+                        except OSError:
+                            self._drop_dir(dirpath)
+                            changed = True
+                            continue
+                        entry = self._dirs[dirpath]
+                    stack.extend(os.path.join(dirpath, s) for s in entry['subdirs'])
+
+            if changed:
+                self.save()
+            return changed
+
+    def add_path(self, path):
+        """Record a file that the caller just wrote (e.g. a sync)."""
+        path = os.path.normpath(path)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+        with self._lock:
+            dirpath, name = os.path.split(path)
+            entry = self._dirs.get(dirpath)
+            if entry is None:
+                return   # unseen directory — the next refresh lists it
+            old = entry['files'].get(name)
+            if old is not None:
+                self._unindex_file(path)
+            entry['files'][name] = mtime
+            self._index_file(path, mtime)
+
+    def discard_path(self, path):
+        """Forget a file that the caller just deleted (e.g. the cleanup)."""
+        path = os.path.normpath(path)
+        with self._lock:
+            dirpath, name = os.path.split(path)
+            entry = self._dirs.get(dirpath)
+            if entry is not None and entry['files'].pop(name, None) is not None:
+                self._unindex_file(path)
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def _latest(self, key):
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                return None
+            return max(entries, key=entries.get)
+
+    def _has_file(self, path):
+        dirpath, name = os.path.split(path)
+        entry = self._dirs.get(dirpath)
+        return bool(entry and name in entry['files'])
+
+    def _with_gain(self, plot_file):
+        if not plot_file:
+            return None, None
+        stem = charge_stem(plot_file)
+        png_file, gain_file = stem + '_charge.png', stem + '_GAIN.txt'
+        with self._lock:
+            if self._has_file(png_file):
+                plot_file = png_file
+            return plot_file, (gain_file if self._has_file(gain_file) else None)
+
+    def artifact_file(self, plot_file):
+        """The _charge.json histogram artifact next to a plot, or None."""
+        if not plot_file:
+            return None
+        artifact = charge_stem(plot_file) + '_charge.json'
+        with self._lock:
+            return artifact if self._has_file(artifact) else None
+
+    def scan_files(self, theta, phi, serial_number=None):
+        """Latest (plot, gain) for a scan point, or (None, None)."""
+        return self._with_gain(self._latest(('scan', serial_number or None, int(theta), int(phi))))
+
+    def hv_files(self, serial_number, hv_value):
+        """Latest (plot, gain) for an HV point, or (None, None)."""
+        return self._with_gain(self._latest(('hv', serial_number, int(hv_value))))
+
+    def hv_summary_plot(self, serial_number):
+        return self._latest(('summary', serial_number))
+
+    def hv_value_file(self, serial_number):
+        return self._latest(('hv_value', serial_number))
+
+    def scan_points(self, serial_number=None):
+        """Set of (theta, phi) with a charge plot or artifact present."""
+        with self._lock:
+            return {(k[2], k[3]) for k in self._index
+                    if k[0] == 'scan' and k[1] == (serial_number or None)}
+
+    def hv_points(self, serial_number=None):
+        """Set of HV values with a charge plot or artifact present."""
+        with self._lock:
+            return {k[2] for k in self._index
+                    if k[0] == 'hv' and (serial_number is None or k[1] == serial_number)}
+
+
+_catalogs      = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(root="synced_data"):
+    """Process-wide catalog for root, loaded from disk on first use."""
+    root = os.path.normpath(root)
+    with _catalogs_lock:
+        if root not in _catalogs:
+            _catalogs[root] = DataCatalog(root)
+        return _catalogs[root]
@@ -0,0 +1,128 @@
+"""
+Append-only executor event journal.
+
+The executor used to report progress only by rewriting the whole
+executor_status_<pmt>.json several times per sync cycle; every reader
+re-parsed it and a reader racing the writer saw a half-written file (which
+load_status turned into a silent None).  Every status change and every
+submission, sync, point arrival, timeout and completion is now appended to
+JOURNAL_FILE as one JSON line:
+
+    {"seq": 42, "ts": 1767225600.0, "pmt_id": "pmt1", "kind": "sync",
+     "ok": true, "seconds": 1.8, "status": {...}}
+
+seq increases by one per event and carries on across executor restarts.
+A reader keeps a cursor (byte offset + last seq) and reads only what was
+appended since; a partial last line is left for the next read.  The status
+files are still written, atomically, but only when a job changes state.
+"""
+
+import json
+import os
+import threading
+import time
+
+JOURNAL_FILE      = "executor_events.jsonl"
+MAX_JOURNAL_BYTES = 5 * 1024 * 1024   # rotated to JOURNAL_FILE + ".1" past this
+
+
+def _last_seq(path):
+    """seq of the last complete line in path (0 if none)."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 64 * 1024))
+            lines = f.read().splitlines()
+    except OSError:
+        return 0
+    for line in reversed(lines):
+        try:
+            return int(json.loads(line)['seq'])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return 0
+
+
+class EventJournal:
+    """Writer side, used by background_executor.py (one writer per journal)."""
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path  = path
+        self._lock = threading.Lock()
+        self._seq  = max(_last_seq(path), _last_seq(path + ".1"))
+        self._file = None
+
+    def append(self, pmt_id, kind, **fields):
+        """Append one event and return it (with its seq and timestamp)."""
+        with self._lock:
+            self._seq += 1
+            event = dict(fields, seq=self._seq, ts=time.time(), pmt_id=pmt_id, kind=kind)
+            line = json.dumps(event) + "\n"
+            try:
+                self._open()
+                self._file.write(line)
+                self._file.flush()
+            except OSError as e:
+                print(f"  Journal write failed: {e}")
+            return event
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self):
+        # Reopen if the file was rotated or removed underneath us
+        if self._file is not None and not os.path.exists(self.path):
+            self._file.close()
+            self._file = None
+        if self._file is not None and self._file.tell() > MAX_JOURNAL_BYTES:
+            self._file.close()
+            self._file = None
+            os.replace(self.path, self.path + ".1")
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+
+class JournalReader:
+    """Cursor over the journal; read_new() returns only events appended since the last call."""
+
+    def __init__(self, path=JOURNAL_FILE, after_seq=0):
+        self.path     = path
+        self.last_seq = after_seq
+        self._offset  = 0
+        self._inode   = None
+
+    def read_new(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # New or rotated file: start over; the seq filter drops what we already had
+            self._inode, self._offset = st.st_ino, 0
+        if st.st_size == self._offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1          # only complete lines
+        self._offset += end
+        events = []
+        for line in data[:end].splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get('seq', 0) > self.last_seq:
+                events.append(event)
+                self.last_seq = event['seq']
+        return events
+
+
+def read_events(path=JOURNAL_FILE, after_seq=0):
+    """All events with seq > after_seq, and the cursor to resume from."""
+    reader = JournalReader(path, after_seq)
+    return reader.read_new(), reader.last_seq
@@ -0,0 +1,188 @@
+"""
+Local control channel between the GUI and the background executor.
+
+The executor used to learn about new jobs and stop requests only by
+re-reading executor_config_<pmt>.json (every 2 s idle, every 1 s while
+sleeping between syncs), and reported progress only by rewriting
+executor_status_<pmt>.json.  The executor now also listens on a Unix-domain
+socket (station.EXECUTOR_SOCKET) and speaks newline-delimited JSON; every
+message names the PMT slot it is about:
+
+    {"op": "submit", "pmt_id": "pmt1", "config": {...}}   start a job    -> {"ok": true}
+    {"op": "stop", "pmt_id": "pmt1"}                       stop that job  -> {"ok": true}
+    {"op": "status", "pmt_id": "pmt1"}                     latest status  -> {"ok": true, "status": {...}}
+    {"op": "jobs"}                                         job states     -> {"ok": true, "jobs": {...}}
+    {"op": "artifacts", "paths": [...]}                    files another rsync fetched -> {"ok": true}
+    {"op": "subscribe"}    stream of {"event": "progress", "pmt_id": ..., "status": {...}, "seq": N}
+
+seq is the event's sequence number in the event journal (event_journal.py).
+
+The files are still written — they are the durable record and the fallback
+whenever the socket is missing (platform without AF_UNIX, executor still
+starting up).
+"""
+
+import asyncio
+import json
+import os
+import socket
+import threading
+
+CONNECT_TIMEOUT   = 2.0    # seconds for a one-shot command
+RECONNECT_SECONDS = 3.0    # subscriber retry interval while the executor is down
+
+HAS_UNIX_SOCKETS = hasattr(socket, 'AF_UNIX')
+
+
+def _encode(message):
+    return (json.dumps(message) + "\n").encode()
+
+
+# ── Executor side ────────────────────────────────────────────────────────────
+
+class ControlChannel:
+    """asyncio socket server run inside background_executor.py."""
+
+    def __init__(self, path, on_command):
+        self.path         = path
+        self.on_command   = on_command      # (op, message) -> reply dict
+        self._subscribers = set()
+        self._status      = {}              # pmt_id -> latest status
+        self._server      = None
+
+    async def start(self):
+        """Bind the socket; returns False (file mode only) if that is not possible."""
+        if not HAS_UNIX_SOCKETS:
+            return False
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)        # left behind by a killed executor
+            self._server = await asyncio.start_unix_server(self._client, path=self.path)
+        except OSError as e:
+            print(f"  Control socket unavailable ({e}) — using config files only")
+            self._server = None
+            return False
+        return True
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._subscribers):
+            writer.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def publish(self, pmt_id, status, seq=None):
+        """Send a progress event (seq = its journal sequence number) to every subscriber."""
+        self._status[pmt_id] = (status, seq)
+        data = _encode({'event': 'progress', 'pmt_id': pmt_id, 'status': status, 'seq': seq})
+        for writer in list(self._subscribers):
+            if writer.is_closing():
+                self._subscribers.discard(writer)
+            else:
+                writer.write(data)
+
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    writer.write(_encode({'ok': False, 'error': 'bad json'}))
+                    continue
+                op = message.get('op')
+                if op == 'subscribe':
+                    self._subscribers.add(writer)
+                    for pmt_id, (status, seq) in self._status.items():
+                        writer.write(_encode({'event': 'progress', 'pmt_id': pmt_id,
+                                              'status': status, 'seq': seq}))
+                elif op == 'status':
+                    status, seq = self._status.get(message.get('pmt_id'), (None, None))
+                    writer.write(_encode({'ok': True, 'status': status, 'seq': seq}))
+                else:
+                    writer.write(_encode(self.on_command(op, message)))
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+
+# ── GUI side ─────────────────────────────────────────────────────────────────
+
+def send_command(path, op, timeout=CONNECT_TIMEOUT, **fields):
+    """
+    One request/reply on the executor's socket.  Returns the reply dict, or
+    None if the executor is not listening (caller relies on the files then).
+    """
+    if not HAS_UNIX_SOCKETS or not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(_encode(dict(fields, op=op)))
+            with sock.makefile('r') as reader:
+                line = reader.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+
+
+class StatusSubscriber:
+    """Keeps a subscribe connection open and calls on_status(pmt_id, status, seq) per event."""
+
+    def __init__(self, path, on_status):
+        self.path       = path
+        self.on_status  = on_status
+        self.connected  = False
+        self._stop      = threading.Event()
+        self._sock      = None
+        self._thread    = threading.Thread(target=self._run, name=f"subscribe-{path}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            if HAS_UNIX_SOCKETS and os.path.exists(self.path):
+                try:
+                    self._listen()
+                except (OSError, ValueError):
+                    pass
+                self.connected = False
+            self._stop.wait(RECONNECT_SECONDS)
+
+    def _listen(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(self.path)
+            sock.sendall(_encode({'op': 'subscribe'}))
+            sock.settimeout(None)
+            self._sock = sock
+            self.connected = True
+            try:
+                with sock.makefile('r') as reader:
+                    for line in reader:
+                        if self._stop.is_set():
+                            break
+                        message = json.loads(line)
+                        if message.get('event') == 'progress':
+                            self.on_status(message.get('pmt_id'), message.get('status'), message.get('seq'))
+            finally:
+                self._sock = None
@@ -0,0 +1,218 @@
+"""
+Executor metrics: where the time of a scan goes.
+
+The executor's print lines go to /dev/null when the GUI starts it, so there
+was no way to tell whether a slow scan was waiting in the SLURM queue, in
+pyrate and the fit, or in the sync.  The executor now records:
+
+    r12860_sync_seconds             summary  per sync (mode = manifest | full)
+    r12860_sync_bytes_total         counter  bytes received by rsync
+    r12860_bytes_per_point          summary  bytes received per new data point, per sync
+    r12860_seconds_per_point        summary  sync time per new data point
+    r12860_ssh_seconds              summary  ssh round trips (op = submit | squeue)
+    r12860_empty_syncs_total        counter  syncs that brought no new point
+    r12860_syncs_since_point        gauge    current run of empty syncs
+    r12860_point_interval_seconds   summary  time between consecutive points (cluster side:
+                                             queue/pyrate/fit/analysis + our sync delay)
+    r12860_visibility_lag_seconds   summary  file written on the cluster -> visible locally
+    r12860_queue_wait_seconds       summary  submission -> SLURM job RUNNING
+    r12860_loop_lag_seconds         gauge    how late the executor's 1 s timer fired
+
+and exposes them two ways:
+
+  - Prometheus text format at http://127.0.0.1:METRICS_PORT/metrics while the
+    executor runs
+  - a snapshot appended every METRICS_FILE_SECONDS to METRICS_FILE (one JSON
+    line, rotated to METRICS_FILE + ".1" past MAX_METRICS_BYTES), which the
+    GUI sidebar reads
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+
+METRICS_PORT         = 9464
+METRICS_FILE         = "executor_metrics.jsonl"
+METRICS_FILE_SECONDS = 15
+MAX_METRICS_BYTES    = 2 * 1024 * 1024
+RECENT               = 200     # observations kept per summary for its quantiles
+
+PREFIX = "r12860_"
+HELP = {
+    'sync_seconds':           ('summary', 'Duration of one sync'),
+    'sync_bytes_total':       ('counter', 'Bytes received by rsync'),
+    'bytes_per_point':        ('summary', 'Bytes received per new data point'),
+    'seconds_per_point':      ('summary', 'Sync seconds per new data point'),
+    'ssh_seconds':            ('summary', 'SSH round trip to the cluster'),
+    'empty_syncs_total':      ('counter', 'Syncs that brought no new data point'),
+    'syncs_since_point':      ('gauge',   'Syncs since the last new data point'),
+    'point_interval_seconds': ('summary', 'Seconds between consecutive data points'),
+    'visibility_lag_seconds': ('summary', 'Seconds from file written on the cluster to visible locally'),
+    'queue_wait_seconds':     ('summary', 'Seconds from submission until the SLURM job ran'),
+    'loop_lag_seconds':       ('gauge',   'Executor event loop lag'),
+}
+
+
+def _quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+
+class Metrics:
+    """In-process registry; every method is safe to call from any thread."""
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._values = {}     # (name, labels) -> number, for counters and gauges
+        self._series = {}     # (name, labels) -> [count, sum, deque of recent]
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.setdefault(key, [0, 0.0, deque(maxlen=RECENT)])
+            series[0] += 1
+            series[1] += value
+            series[2].append(value)
+
+    def render(self):
+        """Prometheus text exposition format."""
+        with self._lock:
+            values = dict(self._values)
+            series = {key: (count, total, list(recent)) for key, (count, total, recent) in self._series.items()}
+        lines = []
+        for name, (kind, text) in HELP.items():
+            lines.append(f"# HELP {PREFIX}{name} {text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{PREFIX}{name}{_labels(labels)} {value:g}")
+            for (metric, labels), (count, total, recent) in sorted(series.items()):
+                if metric != name:
+                    continue
+                for q in (0.5, 0.9):
+                    lines.append(f"{PREFIX}{name}{_labels(labels + (('quantile', q),))} "
+                                 f"{_quantile(recent, q):g}")
+                lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {total:g}")
+                lines.append(f"{PREFIX}{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """{name: [{labels, value} | {labels, count, sum, p50, p90, last}]} for the metrics file."""
+        with self._lock:
+            out = {}
+            for (name, labels), value in self._values.items():
+                out.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+            for (name, labels), (count, total, recent) in self._series.items():
+                out.setdefault(name, []).append({
+                    'labels': dict(labels), 'count': count, 'sum': round(total, 3),
+                    'p50': round(_quantile(recent, 0.5), 3), 'p90': round(_quantile(recent, 0.9), 3),
+                    'last': round(recent[-1], 3)})
+            return out
+
+
+_metrics      = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Process-wide registry."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
+
+
+# ── HTTP endpoint ────────────────────────────────────────────────────────────
+
+async def serve_metrics(metrics, port=METRICS_PORT):
+    """Serve GET /metrics on localhost; returns the server, or None if the port is taken."""
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass                      # headers
+            if request.split()[1:2] == [b'/metrics']:
+                body, status = metrics.render().encode(), "200 OK"
+            else:
+                body, status = b"see /metrics\n", "404 Not Found"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (ConnectionError, OSError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    try:
+        return await asyncio.start_server(handle, '127.0.0.1', port)
+    except OSError as e:
+        print(f"  Metrics endpoint unavailable on port {port}: {e}")
+        return None
+
+
+# ── Rolling file ─────────────────────────────────────────────────────────────
+
+def append_snapshot(metrics, path=METRICS_FILE):
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > MAX_METRICS_BYTES:
+            os.replace(path, path + ".1")
+        with open(path, 'a') as f:
+            f.write(json.dumps({'ts': time.time(), 'metrics': metrics.snapshot()}) + "\n")
+    except OSError as e:
+        print(f"  Metrics write failed: {e}")
+
+
+def read_latest(path=METRICS_FILE):
+    """Newest snapshot in the metrics file, or None."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 64 * 1024))
+            lines = f.read().splitlines()
+        return json.loads(lines[-1]) if lines else None
+    except (OSError, ValueError):
+        return None
+
+
+def headline(snapshot):
+    """The few numbers the GUI sidebar shows, aggregated over slots."""
+    metrics = (snapshot or {}).get('metrics', {})
+
+    def mean(name):
+        entries = metrics.get(name, [])
+        count = sum(e.get('count', 0) for e in entries)
+        return sum(e.get('sum', 0) for e in entries) / count if count else None
+
+    def total(name):
+        entries = metrics.get(name, [])
+        return sum(e.get('value', 0) for e in entries) if entries else None
+
+    return {
+        'sync_seconds':           mean('sync_seconds'),
+        'sync_mb':                None if total('sync_bytes_total') is None else total('sync_bytes_total') / 1e6,
+        'kb_per_point':           None if mean('bytes_per_point') is None else mean('bytes_per_point') / 1e3,
+        'seconds_per_point':      mean('seconds_per_point'),
+        'ssh_seconds':            mean('ssh_seconds'),
+        'empty_syncs':            total('empty_syncs_total'),
+        'point_interval_seconds': mean('point_interval_seconds'),
+        'visibility_lag_seconds': mean('visibility_lag_seconds'),
+        'queue_wait_seconds':     mean('queue_wait_seconds'),
+        'loop_lag_seconds':       total('loop_lag_seconds'),
+    }
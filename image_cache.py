@@ -0,0 +1,114 @@
+"""
+In-memory cache of base64-encoded plots for the GUI viewers.
+
+Entries are keyed by (path, mtime) so a re-synced plot is picked up
+automatically, and the total size is capped at MAX_BYTES with least
+recently used entries dropped first.  prefetch() encodes plots on a small
+thread pool so a newly arrived grid cell is already cached by the time
+someone clicks "View".
+"""
+
+import base64
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BYTES        = 64 * 1024 * 1024   # encoded bytes kept in memory
+PREFETCH_WORKERS = 2
+
+
+class ImageCache:
+    """LRU cache of base64 data keyed by (path, mtime)."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries  = OrderedDict()   # (path, mtime_ns) -> str
+        self._size     = 0
+        self._lock     = threading.Lock()
+        self._pool     = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS,
+                                            thread_name_prefix="image-prefetch")
+        self._pending  = set()
+        self.hits      = 0
+        self.misses    = 0
+
+    def _key(self, path):
+        try:
+            return (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            return None
+
+    def _store(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._size += len(data)
+            # Drop stale versions of the same file and anything over the cap
+            for old in [k for k in self._entries if k[0] == key[0] and k != key]:
+                self._size -= len(self._entries.pop(old))
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, dropped = self._entries.popitem(last=False)
+                self._size -= len(dropped)
+
+    def _load(self, key):
+        with open(key[0], "rb") as f:
+            data = base64.b64encode(f.read()).decode()
+        self._store(key, data)
+        return data
+
+    def get_base64(self, path):
+        """Base64 of the file at path, or None if it cannot be read."""
+        key = self._key(path)
+        if key is None:
+            return None
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        try:
+            return self._load(key)
+        except OSError:
+            return None
+
+    def prefetch(self, path):
+        """Encode path in the background if it is not cached yet."""
+        key = self._key(path)
+        if key is None:
+            return
+        with self._lock:
+            if key in self._entries or key in self._pending:
+                return
+            self._pending.add(key)
+
+        def work():
+            try:
+                self._load(key)
+            except OSError:
+                pass
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        self._pool.submit(work)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+_cache      = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """Process-wide image cache shared by all sessions."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache()
+        return _cache
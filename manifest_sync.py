@@ -0,0 +1,200 @@
+"""
+Fetch exactly the files a job has published since the last sync.
+
+The analysis scripts on the cluster append every finished output to
+<remote_dir>/manifests/<SN>.txt (_R12860_DATA_MONITOR/artifact_manifest.py),
+one path per line relative to remote_dir.  Instead of letting rsync expand
+scan_output_*/<SN> and HV_output_*/<SN> and walk all of history, a sync:
+
+  1. reads the manifest's line count and the lines after our cursor in one
+     remote call (`wc -l; tail -n +<cursor+1>`)
+  2. hands exactly those paths to rsync --files-from
+  3. moves the cursor (kept per host/dir/SN in CURSOR_FILE) once that worked
+
+If there is no manifest (older analysis scripts, or nothing finished yet)
+the caller falls back to the full include/exclude rsync.
+
+Paths keep the local layout of the old syncs: scan files land under
+<SN>/data_theta*_phi*/ and HV files under data_HV_*/, which rsync's "/./"
+marker in each files-from line takes care of.
+
+With host "" everything runs locally, so a plain directory can stand in for
+the cluster:
+
+    python manifest_sync.py "" /tmp/fake_cluster/SCAN_DATA SN123 /tmp/synced
+"""
+
+import json
+import os
+import shlex
+import sys
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from rsync_changes import COMPRESS_OPTION, ITEMIZE_OPTION, STATS_OPTION, received_files
+from ssh_pool import ssh_command, rsync_ssh
+
+CURSOR_FILE   = "manifest_cursors.json"
+MANIFEST_DIR  = "manifests"
+RSYNC_PARTIAL = {23, 24}   # some listed files vanished (archived/flagged since): skip them
+
+_cursor_lock = threading.Lock()
+
+
+def manifest_key(host, remote_dir, sn):
+    return f"{host}:{os.path.normpath(remote_dir)}:{sn}"
+
+
+def load_cursors(path=CURSOR_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_cursor(key, cursor, path=CURSOR_FILE):
+    save_cursors({key: cursor}, path)
+
+
+def save_cursors(updates, path=CURSOR_FILE):
+    """Merge {key: cursor} into the cursor file (the GUI and the executor both write it)."""
+    with _cursor_lock:
+        try:
+            with open(f"{path}.lock", 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                cursors = load_cursors(path)
+                cursors.update(updates)
+                tmp = f"{path}.tmp"
+                with open(tmp, 'w') as f:
+                    json.dump(cursors, f, indent=2)
+                os.replace(tmp, path)
+        except Exception:
+            pass
+
+
+def read_command(host, remote_dir, sn, cursor):
+    """Remote (or local) shell command printing the line count, then the lines after cursor."""
+    manifest = shlex.quote(f"{remote_dir}/{MANIFEST_DIR}/{sn}.txt")
+    command = f"wc -l < {manifest} && tail -n +{cursor + 1} {manifest}"
+    return f"{ssh_command(host)} {shlex.quote(command)}" if host else command
+
+
+def parse_listing(output, cursor):
+    """(new_cursor, paths) from read_command's output, or None if it is not a listing."""
+    lines = output.split("\n")
+    try:
+        total = int(lines[0].strip())
+    except ValueError:
+        return None
+    if total < cursor:
+        return total, []
+    # Only the lines wc counted: a line still being appended is left for next time
+    listed = lines[1:1 + total - cursor]
+    return cursor + len(listed), [line for line in listed if line.strip()]
+
+
+def transfer_path(path):
+    """files-from entry with rsync's /./ marker so the local layout matches the old syncs."""
+    parts = path.split('/')
+    if parts[0].startswith('scan_output') and len(parts) > 2:
+        keep = 1          # scan_output_*/ dropped -> <SN>/data_theta*_phi*/...
+    elif parts[0].startswith('HV_output') and len(parts) >= 3:
+        keep = 2          # HV_output_*/<SN>/ dropped -> data_HV_*/... or the SN's summaries
+    else:
+        keep = 0
+    return '/'.join(parts[:keep] + ['.'] + parts[keep:]) if keep else path
+
+
+def local_path(path):
+    """Where a manifest path lands under local_dir."""
+    return transfer_path(path).split('/./', 1)[-1]
+
+
+def rsync_command(host, remote_dir, list_file, local_dir):
+    source = f"{host}:{remote_dir}/" if host else f"{remote_dir}/"
+    shell = f"{rsync_ssh()} " if host else ""
+    return (f"rsync -a {COMPRESS_OPTION} {shell}{ITEMIZE_OPTION} {STATS_OPTION} --files-from={shlex.quote(list_file)} "
+            f"{source} {local_dir}")
+
+
+async def read_new(run_shell, host, remote_dir, sn, cursor_file=CURSOR_FILE):
+    """
+    (key, new_cursor, paths) for SN's lines after our cursor, or None if the
+    remote has no manifest for SN.  The cursor is not moved: save it once the
+    paths have been transferred.
+    run_shell is the caller's async (cmd) -> (returncode, stdout, stderr).
+    """
+    key = manifest_key(host, remote_dir, sn)
+    cursor = load_cursors(cursor_file).get(key, 0)
+    rc, out, err = await run_shell(read_command(host, remote_dir, sn, cursor))
+    listing = parse_listing(out, cursor) if rc == 0 else None
+    if listing is None:
+        return None
+    new_cursor, paths = listing
+    if new_cursor < cursor:
+        # Manifest was recreated: start again from its first line
+        save_cursor(key, 0, cursor_file)
+        return await read_new(run_shell, host, remote_dir, sn, cursor_file)
+    return key, new_cursor, paths
+
+
+async def transfer(run_shell, host, remote_dir, paths, local_dir):
+    """rsync exactly paths (relative to remote_dir); returns (ok, rsync output)."""
+    fd, list_file = tempfile.mkstemp(prefix="manifest_", suffix=".txt")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write("".join(transfer_path(path) + "\n" for path in paths))
+        rc, out, err = await run_shell(rsync_command(host, remote_dir, list_file, local_dir))
+    finally:
+        os.remove(list_file)
+    return rc == 0 or rc in RSYNC_PARTIAL, out or ""
+
+
+async def fetch_new(run_shell, host, remote_dir, sn, local_dir, cursor_file=CURSOR_FILE):
+    """
+    Transfer SN's files published since the last call.  Returns (ok, message, files),
+    or None if the remote has no manifest for SN (caller does a full sync).
+    """
+    listing = await read_new(run_shell, host, remote_dir, sn, cursor_file)
+    if listing is None:
+        return None
+    key, new_cursor, paths = listing
+    if not paths:
+        save_cursor(key, new_cursor, cursor_file)
+        return True, "Manifest: nothing new", []
+    ok, out = await transfer(run_shell, host, remote_dir, paths, local_dir)
+    if ok:
+        save_cursor(key, new_cursor, cursor_file)
+        return True, f"Manifest: {len(paths)} new (cursor {new_cursor})", received_files(out)
+    return False, "Manifest rsync failed", received_files(out)
+
+
+# ── Command line: one sync against a real or stand-in cluster ────────────────
+
+if __name__ == "__main__":
+    import asyncio
+    import subprocess
+
+    if len(sys.argv) < 5:
+        print("usage: python manifest_sync.py <host or \"\"> <remote_dir> <SN> <local_dir>")
+        sys.exit(1)
+
+    async def run(cmd):
+        result = await asyncio.to_thread(subprocess.run, cmd, shell=True, capture_output=True, text=True)
+        return result.returncode, result.stdout, result.stderr
+
+    result = asyncio.run(fetch_new(run, *sys.argv[1:5]))
+    if result is None:
+        print("No manifest — a full sync would be needed")
+    else:
+        ok, message, files = result
+        print(message)
+        for path in files:
+            print(f"  {path}")
@@ -0,0 +1,45 @@
+"""
+GOOD_DATA reference spectrum on the GUI side.
+
+The analysis scripts compare every point with the reference on the cluster
+(_R12860_DATA_MONITOR/reference_compare.py) and store the shape distance and
+gain ratio in the point's _charge.json artifact; the GUI shows those stored
+numbers (comparison_label).  The local copy of GOOD_DATA_reference.json is
+only needed to overlay the reference spectrum on the selected plots, scaled
+onto each point's bins by interpolating its cumulative distribution.
+"""
+
+import numpy as np
+
+from result_reader import read_charge_artifact
+
+REFERENCE_FILE        = "example_data/GOOD_DATA_reference.json"
+SHAPE_DISTANCE_LIMIT  = 0.15   # above this the spectrum is flagged as unlike the reference
+
+
+def load_reference(path=REFERENCE_FILE):
+    """Decoded reference (dict with bin_edges, fractions, gain), or None."""
+    reference = read_charge_artifact(path)
+    if not reference or 'bin_edges' not in reference or 'fractions' not in reference:
+        return None
+    return reference
+
+
+def reference_counts(reference, edges, n_events):
+    """Reference spectrum scaled to n_events on the given bin edges (for overlays)."""
+    ref_edges = np.asarray(reference['bin_edges'], dtype=float)
+    fractions = np.asarray(reference['fractions'], dtype=float)
+    cdf = np.concatenate(([0.0], np.cumsum(fractions) / fractions.sum()))
+    return np.diff(np.interp(np.asarray(edges, dtype=float), ref_edges, cdf)) * n_events
+
+
+def comparison_label(comparison):
+    """Short grid-cell text, e.g. 'Δshape 0.04 · ×1.01'."""
+    if not comparison:
+        return ""
+    label = f"Δshape {comparison['shape_distance']:.2f}"
+    if comparison['shape_distance'] > SHAPE_DISTANCE_LIMIT:
+        label = "⚠ " + label
+    if comparison['gain_ratio'] is not None:
+        label += f" · ×{comparison['gain_ratio']:.2f}"
+    return label
@@ -0,0 +1,103 @@
+"""
+Memoised reader for the small result files synced from the server.
+
+Every grid cell used to open its _GAIN.txt twice per rerun (once for the
+label, once for the colour).  read_gain_result() parses a file once per
+mtime into a GainResult shared by every consumer; read_text_value() does
+the same for single-value files such as <SN>_HV_at_gain_*.txt and
+read_charge_artifact() for the _charge.json histogram artifacts.  The memo
+holds at most MAX_ENTRIES files and drops the least recently used.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+MAX_ENTRIES        = 512
+GAIN_NORMAL_RANGE  = (0.999e7, 1.049e7)
+
+STATUS_TEXT = {
+    'green':  'Healthy',
+    'yellow': 'No Data',
+    'red':    'Poor',
+}
+
+# value/error are floats or None; status is 'green', 'red' or 'yellow';
+# label is the text shown in the grid ("Gain: 1.00e+07")
+GainResult = namedtuple('GainResult', ['value', 'error', 'status', 'label'])
+
+NO_RESULT = GainResult(None, None, 'yellow', 'Gain: N/A')
+
+_memo      = OrderedDict()   # (kind, path) -> (mtime_ns, parsed)
+_memo_lock = threading.Lock()
+
+
+def classify_gain(value, normal_range=GAIN_NORMAL_RANGE):
+    """'green' inside normal_range, 'red' outside, 'yellow' without a value."""
+    if value is None:
+        return 'yellow'
+    min_normal, max_normal = normal_range
+    return 'green' if min_normal <= value <= max_normal else 'red'
+
+
+def _parse_gain(text):
+    lines = text.strip().split('\n')
+    try:
+        value = float(lines[0])
+    except ValueError:
+        return GainResult(None, None, 'yellow', f"Gain: {text.strip()}")
+    try:
+        error = float(lines[1]) if len(lines) > 1 else None
+    except ValueError:
+        error = None
+    label = f"Gain: {value:.2e}" if error is None else f"Gain: {value:.2e} ± {error:.1e}"
+    return GainResult(value, error, classify_gain(value), label)
+
+
+def _read(kind, path, parser):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    key = (kind, path)
+    with _memo_lock:
+        hit = _memo.get(key)
+        if hit is not None and hit[0] == mtime:
+            _memo.move_to_end(key)
+            return hit[1]
+    try:
+        with open(path, 'r') as f:
+            parsed = parser(f.read())
+    except (OSError, UnicodeDecodeError, ValueError):
+        return None
+    with _memo_lock:
+        _memo[key] = (mtime, parsed)
+        _memo.move_to_end(key)
+        while len(_memo) > MAX_ENTRIES:
+            _memo.popitem(last=False)
+    return parsed
+
+
+def read_gain_result(gain_file_path):
+    """Parsed GainResult for a _GAIN.txt file (NO_RESULT if missing)."""
+    if not gain_file_path:
+        return NO_RESULT
+    result = _read('gain', gain_file_path, _parse_gain)
+    if result is None:
+        return NO_RESULT if not os.path.exists(gain_file_path) else GainResult(None, None, 'yellow', 'Gain: Error')
+    return result
+
+
+def read_text_value(path):
+    """Stripped contents of a single-value text file, or None."""
+    if not path:
+        return None
+    return _read('text', path, lambda text: text.strip())
+
+
+def read_charge_artifact(path):
+    """Decoded _charge.json histogram artifact (dict), or None."""
+    if not path:
+        return None
+    return _read('artifact', path, json.loads)
@@ -0,0 +1,240 @@
+"""
+Background retention janitor for synced_data/.
+
+Replaces the cleanup_old_data() call that used to run on every page load.
+A daemon thread walks the tree incrementally — each pass stops after
+PASS_BUDGET seconds and the walk resumes where it left off on the next
+pass — and evicts:
+
+  - files older than max_age_hours, counted from when the sync fetched
+    them (sync_ledger.py) or from their mtime if that is later
+  - once a full walk has finished and max_bytes is set, the least recently
+    used results (by max(atime, mtime)) until the tree fits the size budget
+
+A result is a plot, its histogram artifact and its text records sharing a
+name stem, so a point is never left with a gain file and no plot.  Empty
+directories are removed as the walk meets them.  Each finished sweep is
+summarised in REPORT_FILE and returned by last_report(); evictions are
+passed on to the data catalog and recorded in the sync ledger, so the sync
+does not fetch them again.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from data_catalog import get_catalog
+from sync_ledger import get_sync_ledger
+
+SWEEP_INTERVAL = 300    # seconds between full sweeps
+PASS_BUDGET    = 0.05   # seconds of work per incremental pass
+PASS_PAUSE     = 1.0    # seconds between passes of one sweep
+REPORT_FILE    = "janitor_report.json"
+REPORT_MAX_EVICTIONS = 50   # evicted paths listed in the report
+
+RETAINED_RE = re.compile(r'(_charge\.png|_charge\.json|_GAIN\.txt|\.png)$')
+
+
+def result_stem(path):
+    """Group key for files that belong to the same result."""
+    return RETAINED_RE.sub('', path)
+
+
+class RetentionJanitor:
+    """Incremental age + size based eviction for one data directory."""
+
+    def __init__(self, root, max_age_hours=24, max_bytes=None):
+        self.root          = os.path.normpath(root)
+        self.max_age_hours = max_age_hours
+        self.max_bytes     = max_bytes
+        self._lock         = threading.Lock()
+        self._wake         = threading.Event()
+        self._stop         = threading.Event()
+        self._thread       = None
+        self._report       = self._load_report()
+        self._reset_sweep()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def configure(self, max_age_hours, max_bytes=None):
+        """Update the retention limits; picked up by the next pass."""
+        with self._lock:
+            self.max_age_hours = max_age_hours
+            self.max_bytes     = max_bytes or None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="retention-janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self):
+        """Start a sweep now instead of waiting for the schedule."""
+        self._wake.set()
+
+    def last_report(self):
+        with self._lock:
+            return dict(self._report) if self._report else None
+
+    # ── Sweep state ───────────────────────────────────────────────────────────
+
+    def _reset_sweep(self):
+        self._stack      = [self.root]
+        self._results    = {}    # stem -> [lru_ts, bytes, [paths]]
+        self._evicted    = []
+        self._stats      = {'files_seen': 0, 'bytes_seen': 0, 'evicted_count': 0,
+                            'bytes_freed': 0, 'passes': 0}
+        self._started_at = time.time()
+        self._fetched    = get_sync_ledger().fetched_times()   # rel path -> time fetched
+
+    def _relpath(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def _fetched_at(self, path):
+        """When the sync fetched path (0 if it did not); rsync keeps the cluster's mtime."""
+        rel = self._relpath(path)
+        return self._fetched.get(rel) or get_sync_ledger().fetched_at(rel) or 0
+
+    def _evict(self, paths, reason):
+        catalog = get_catalog(self.root)
+        evicted = []
+        for path in paths:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            catalog.discard_path(path)
+            evicted.append(self._relpath(path))
+            self._stats['evicted_count'] += 1
+            self._stats['bytes_freed']   += size
+            if len(self._evicted) < REPORT_MAX_EVICTIONS:
+                self._evicted.append({'path': path, 'reason': reason, 'bytes': size})
+        get_sync_ledger().record_evicted(evicted)
+
+    def _visit_dir(self, dirpath, cutoff):
+        try:
+            entries = list(os.scandir(dirpath))
+        except OSError:
+            return
+        if not entries and dirpath != self.root:
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+            return
+
+        expired = []
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    self._stack.append(e.path)
+                    continue
+                if not e.is_file() or not RETAINED_RE.search(e.name):
+                    continue
+                st = e.stat()
+            except OSError:
+                continue
+            self._stats['files_seen'] += 1
+            if st.st_mtime < cutoff and self._fetched_at(e.path) < cutoff:
+                expired.append(e.path)
+                continue
+            self._stats['bytes_seen'] += st.st_size
+            result = self._results.setdefault(result_stem(e.path), [0.0, 0, []])
+            result[0] = max(result[0], st.st_atime, st.st_mtime)
+            result[1] += st.st_size
+            result[2].append(e.path)
+        if expired:
+            self._evict(expired, 'age')
+
+    def _apply_size_budget(self, max_bytes):
+        total = self._stats['bytes_seen']
+        if max_bytes and total > max_bytes:
+            for lru_ts, size, paths in sorted(self._results.values(), key=lambda r: r[0]):
+                if total <= max_bytes:
+                    break
+                self._evict(paths, 'size')
+                total -= size
+        self._stats['bytes_kept'] = total
+
+    def _finish_sweep(self, max_bytes):
+        self._apply_size_budget(max_bytes)
+        report = dict(self._stats)
+        report.update({
+            'started':  self._started_at,
+            'finished': time.time(),
+            'max_age_hours': self.max_age_hours,
+            'max_bytes': max_bytes,
+            'evicted': self._evicted,
+        })
+        with self._lock:
+            self._report = report
+        try:
+            with open(REPORT_FILE, 'w') as f:
+                json.dump(report, f, indent=2)
+        except Exception:
+            pass
+        self._reset_sweep()
+
+    def run_pass(self, budget=PASS_BUDGET):
+        """
+        Do up to `budget` seconds of the current sweep.  Returns True when the
+        sweep finished (and the report was updated) during this pass.
+        """
+        with self._lock:
+            max_age_hours, max_bytes = self.max_age_hours, self.max_bytes
+        cutoff = time.time() - max_age_hours * 3600
+        deadline = time.monotonic() + budget
+        self._stats['passes'] += 1
+
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root, exist_ok=True)
+            self._stack = []
+        while self._stack:
+            self._visit_dir(self._stack.pop(), cutoff)
+            if time.monotonic() >= deadline:
+                return False
+        self._finish_sweep(max_bytes)
+        return True
+
+    def _load_report(self):
+        if not os.path.exists(REPORT_FILE):
+            return None
+        try:
+            with open(REPORT_FILE, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                finished = self.run_pass()
+            except Exception:
+                self._reset_sweep()
+                finished = True
+            if finished:
+                self._wake.wait(SWEEP_INTERVAL)
+                self._wake.clear()
+            else:
+                self._stop.wait(PASS_PAUSE)
+
+
+_janitor      = None
+_janitor_lock = threading.Lock()
+
+
+def get_janitor(root="synced_data", max_age_hours=24, max_bytes=None):
+    """Process-wide janitor, started on first use."""
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = RetentionJanitor(root, max_age_hours, max_bytes)
+            _janitor.start()
+        return _janitor
@@ -0,0 +1,76 @@
+"""
+New-artifact events from rsync's itemized change list.
+
+Every sync used to be followed by count_data_points(), which globbed all of
+synced_data/**/*_charge.png|json and regex-parsed every path to rebuild the
+set of points, so each cycle cost more the more had ever been synced.  The
+syncs now run rsync with
+
+    --out-format='%i %n'
+
+which prints one line per item actually transferred:
+
+    >f+++++++++ SN1/data_theta30_phi90/live_data_SN1_theta30_phi90_charge.png
+    cd+++++++++ SN1/data_theta30_phi90/
+
+received_files() picks the files out of that, and point_key() says which
+scan/HV point a file belongs to, so callers keep their point sets up to date
+from what was transferred without listing the local tree.
+"""
+
+import os
+import re
+from collections import namedtuple
+
+ITEMIZE_OPTION = "--out-format='%i %n'"
+STATS_OPTION   = "--stats"      # adds the transfer totals bytes_received() reads
+# Compress on the wire per file type: the JSON/TXT records shrink several-fold,
+# the already-compressed plots would only cost CPU on both ends
+COMPRESS_OPTION = "-z --skip-compress=png/webp/jpg/jpeg/gif/gz/zst/zip"
+
+Artifact = namedtuple('Artifact', 'path point')   # point: ('scan', theta, phi) | ('hv', volts)
+
+_ITEM_RE = re.compile(r"^([<>ch.*])([fdLDS])[.+?a-zA-Z]{7,9} (.+)$")
+_RECEIVED_RE = re.compile(r"^Total bytes received: ([\d,.]+)", re.MULTILINE)
+
+
+def received_files(output):
+    """Paths (relative to the destination) of regular files rsync transferred."""
+    files = []
+    for line in output.splitlines():
+        m = _ITEM_RE.match(line.rstrip('\n'))
+        if m and m.group(1) == '>' and m.group(2) == 'f':
+            files.append(m.group(3))
+    return files
+
+
+def bytes_received(output):
+    """Bytes rsync pulled over the wire, from its --stats summary (0 if absent)."""
+    m = _RECEIVED_RE.search(output or "")
+    return int(m.group(1).replace(',', '').replace('.', '')) if m else 0
+
+
+def point_key(path, sn=None):
+    """The data point a *_charge file belongs to (only serial number sn's), else None."""
+    name = os.path.basename(path)
+    if not (name.endswith('_charge.png') or name.endswith('_charge.json')):
+        return None
+    if sn and f"_{sn}_" not in name:
+        return None
+    m = re.search(r'theta(\d+)_phi(\d+)', path)
+    if m:
+        return ('scan', m.group(1), m.group(2))
+    m = re.search(r'HV_(\d+)_charge', path)
+    if m:
+        return ('hv', m.group(1))
+    return None
+
+
+def new_artifacts(output, sn=None):
+    """Artifacts for the data points among the files in one rsync run's itemized output."""
+    artifacts = []
+    for path in received_files(output):
+        point = point_key(path, sn)
+        if point is not None:
+            artifacts.append(Artifact(path, point))
+    return artifacts
@@ -0,0 +1,128 @@
+"""
+SLURM job state for every job the executor has submitted.
+
+The executor used to keep the "Submitted batch job N" ids and never look at
+them again, so a job that failed in the queue showed "Waiting for data…"
+until the six-hour timeout.  SlurmTracker asks the cluster about all tracked
+jobs on a host in one batched call per cycle:
+
+    squeue -h -o '%i|%T|%M|%N' -j 101,102,103
+
+and jobs that have already left the queue are looked up once with sacct
+(same columns).  Array tasks (101_4) are folded into their parent id.
+
+The squeue/sacct commands can be replaced through the SLURM_SQUEUE and
+SLURM_SACCT environment variables, e.g. with a stub script that prints canned
+lines in the format above:
+
+    SLURM_SQUEUE=./stub_squeue python slurm_tracker.py spartan 101 102
+"""
+
+import asyncio
+import os
+import shlex
+import sys
+from collections import namedtuple
+
+from ssh_pool import ssh_command
+
+SQUEUE = os.environ.get('SLURM_SQUEUE', 'squeue')
+SACCT  = os.environ.get('SLURM_SACCT', 'sacct')
+QUERY_TIMEOUT = 30   # seconds for one squeue/sacct round trip
+
+JobState = namedtuple('JobState', 'job_id state elapsed node')
+
+ACTIVE_STATES = {'PENDING', 'CONFIGURING', 'RUNNING', 'COMPLETING', 'SUSPENDED',
+                 'REQUEUED', 'RESIZING', 'SIGNALING', 'STAGE_OUT', 'REQUEUE_HOLD'}
+
+
+def is_finished(state):
+    """True once the job can no longer produce data."""
+    return state is not None and state not in ACTIVE_STATES
+
+
+def squeue_command(job_ids):
+    return f"{SQUEUE} -h -o '%i|%T|%M|%N' -j {','.join(job_ids)}"
+
+
+def sacct_command(job_ids):
+    return f"{SACCT} -n -P -X -o JobID,State,Elapsed,NodeList -j {','.join(job_ids)}"
+
+
+def parse_states(output):
+    """'id|STATE|elapsed|node' lines -> {job_id: JobState}, array tasks folded into their job."""
+    tasks = {}
+    for line in output.splitlines():
+        fields = line.strip().split('|')
+        if len(fields) < 2 or not fields[0]:
+            continue
+        job_id = fields[0].split('_')[0]
+        state  = fields[1].split()[0] if fields[1].split() else 'UNKNOWN'   # "CANCELLED by 123"
+        state  = state.rstrip('+')
+        tasks.setdefault(job_id, []).append(JobState(
+            job_id, state,
+            fields[2] if len(fields) > 2 else '',
+            fields[3] if len(fields) > 3 and fields[3] not in ('None assigned', '(null)') else ''))
+    return {job_id: _combine(states) for job_id, states in tasks.items()}
+
+
+def _combine(states):
+    """One state for a job from its array tasks: running beats pending beats finished."""
+    for wanted in ('RUNNING', 'COMPLETING', 'PENDING'):
+        for state in states:
+            if state.state == wanted:
+                return state
+    for state in states:
+        if state.state != 'COMPLETED':     # a failed (or suspended) task decides
+            return state
+    return states[0]
+
+
+class SlurmTracker:
+    """Batched squeue/sacct queries over ssh, run with the executor's async shell helper."""
+
+    def __init__(self, run_shell):
+        self.run_shell = run_shell   # async (cmd, timeout) -> (returncode, stdout, stderr)
+
+    async def _query(self, host, command):
+        rc, stdout, _ = await self.run_shell(f"{ssh_command(host)} {shlex.quote(command)}", QUERY_TIMEOUT)
+        if rc is None or rc == 255:       # timeout / ssh itself failed: nothing learned
+            return None
+        return parse_states(stdout)
+
+    async def poll(self, host, job_ids):
+        """{job_id: JobState} for the job_ids on host; ids SLURM has never heard of are left out."""
+        job_ids = sorted(set(job_ids))
+        if not job_ids:
+            return {}
+        states = await self._query(host, squeue_command(job_ids))
+        if states is None:
+            return {}
+        gone = [job_id for job_id in job_ids if job_id not in states]
+        if gone:
+            finished = await self._query(host, sacct_command(gone))
+            states.update(finished or {})
+        return {job_id: state for job_id, state in states.items() if job_id in job_ids}
+
+
+# ── Command line: print the state of some jobs ───────────────────────────────
+
+async def _shell(cmd, timeout):
+    proc = await asyncio.create_subprocess_shell(
+        cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        return None, "", "timed out"
+    return proc.returncode, stdout.decode(errors='replace'), stderr.decode(errors='replace')
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python slurm_tracker.py <host> <job_id> [<job_id> ...]")
+        sys.exit(1)
+    found = asyncio.run(SlurmTracker(_shell).poll(sys.argv[1], sys.argv[2:]))
+    for job_id in sys.argv[2:]:
+        state = found.get(job_id)
+        print(f"{job_id}: {state.state} {state.elapsed} {state.node}" if state else f"{job_id}: not found")
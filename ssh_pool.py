@@ -0,0 +1,123 @@
+"""
+One multiplexed SSH connection per cluster host.
+
+Every remote action (job submission, both rsyncs, squeue, the archive/flag
+mkdir+mv pairs, scancel) used to open a fresh SSH session with a full
+handshake and key exchange against the login node.  All of them now go
+through OpenSSH connection sharing:
+
+    ssh -o ControlMaster=auto -o ControlPath=<CONTROL_DIR>/%C ...
+
+so after the first connection each command is one round trip over the
+existing master.  The control sockets live in CONTROL_DIR, which the GUI and
+the background executor share, so both ride on the same master.
+
+SshPool.ensure(host) is called before remote work: it checks the master
+(`ssh -O check`) at most every CHECK_SECONDS, and starts a new one if it has
+gone (network drop, login node reboot, idle timeout).  A command that fails
+with ssh's own exit status 255 can report it via failed(host) so the next
+ensure() re-checks straight away.
+"""
+
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+# Unix socket paths are limited to ~100 characters, so not under the (possibly
+# deep) working directory; %C is a short hash of user, host and port
+CONTROL_DIR     = os.path.join(tempfile.gettempdir(), f"r12860-ssh-{os.getuid()}" if hasattr(os, 'getuid') else "r12860-ssh")
+CONTROL_PERSIST = 600     # seconds an idle master started by a plain command stays up
+CHECK_SECONDS   = 30      # a master checked this recently is trusted
+MASTER_TIMEOUT  = 30      # seconds to authenticate a new master
+
+
+def ssh_options():
+    """Options that make ssh (and rsync's ssh) reuse the host's master connection."""
+    os.makedirs(CONTROL_DIR, mode=0o700, exist_ok=True)
+    return (f"-o ControlMaster=auto -o ControlPath={CONTROL_DIR}/%C "
+            f"-o ControlPersist={CONTROL_PERSIST} "
+            f"-o ServerAliveInterval=15 -o ServerAliveCountMax=3")
+
+
+def ssh_command(host):
+    """'ssh <options> host' — append the quoted remote command."""
+    return f"ssh {ssh_options()} {host}"
+
+
+def rsync_ssh():
+    """rsync -e option for the shared connection."""
+    return f"-e 'ssh {ssh_options()}'"
+
+
+class SshPool:
+    """Health checks and re-establishment of the per-host masters."""
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._checked = {}      # host -> time of the last good check
+
+    def check(self, host):
+        """True if a master for host is up and answering."""
+        try:
+            result = subprocess.run(
+                ['ssh', '-o', f'ControlPath={CONTROL_DIR}/%C', '-O', 'check', host],
+                stdin=subprocess.DEVNULL, capture_output=True, timeout=10)
+            return result.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+
+    def start(self, host):
+        """Start a background master for host; True once it answers."""
+        # ssh -f forks after authentication; its output must not be a pipe we wait on
+        try:
+            subprocess.run(f"ssh -f -N {ssh_options()} {host}", shell=True,
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=MASTER_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"  SSH master for {host} failed: {e}")
+            return False
+        return self.check(host)
+
+    def ensure(self, host):
+        """Make sure host has a working master (cheap when it was checked recently)."""
+        if not host:
+            return False
+        if time.time() - self._checked.get(host, 0) < CHECK_SECONDS:
+            return True
+        with self._lock:
+            if time.time() - self._checked.get(host, 0) < CHECK_SECONDS:
+                return True
+            ok = self.check(host) or self.start(host)
+            if ok:
+                self._checked[host] = time.time()
+            else:
+                self._checked.pop(host, None)
+            return ok
+
+    def failed(self, host):
+        """A command to host failed at the ssh level: re-check before the next one."""
+        self._checked.pop(host, None)
+
+    def close(self, host):
+        """Stop host's master."""
+        self._checked.pop(host, None)
+        try:
+            subprocess.run(['ssh', '-o', f'ControlPath={CONTROL_DIR}/%C', '-O', 'exit', host],
+                           stdin=subprocess.DEVNULL, capture_output=True, timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
+_pool      = None
+_pool_lock = threading.Lock()
+
+
+def get_ssh_pool():
+    """Process-wide pool (the masters themselves are shared across processes)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SshPool()
+        return _pool
@@ -0,0 +1,241 @@
+"""
+Process-wide state service shared by every browser session.
+
+Each open session used to write the heartbeat, read every executor's config
+and status file, probe every executor PID and refresh the data catalog on
+its own timer, so three viewers meant three times the filesystem and PID
+load.  A StateService lives once per Streamlit server (the GUI holds it with
+st.cache_resource) and does that work on one daemon thread:
+
+  - the heartbeat file is written at most once per HEARTBEAT_INTERVAL, and
+    only while some session has checked in within SESSION_TIMEOUT, so the
+    executors still exit when the last browser closes
+  - config files are re-read only when the change watcher's counter for
+    that slot moved; the executor PID probe runs once per poll for all
+    sessions
+  - executor status comes from the event journal (event_journal.py), read
+    incrementally from a cursor, which also gives each slot a timeline of its
+    last TIMELINE_LENGTH events; a slot's status file is only used until the
+    journal has something for it
+  - the data catalog is refreshed when the watcher saw a data change (and at
+    least every FULL_REFRESH_SECONDS as a safety net)
+
+While the executor's control socket is up it also pushes each status to the
+service (executor_channel.StatusSubscriber) so it shows without waiting for
+the next poll; pushes and journal lines carry the same sequence number, so
+whichever arrives second is ignored.
+
+Sessions call touch() and snapshot(); a snapshot is an immutable dict with a
+sequence number that only moves when something changed.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from change_watcher import get_watcher
+from data_catalog import get_catalog
+from event_journal import JournalReader, JOURNAL_FILE
+from executor_channel import StatusSubscriber
+from station import EXECUTOR_PID_FILE, EXECUTOR_SOCKET
+from heartbeat import write_heartbeat
+
+POLL_INTERVAL        = 1.0    # seconds between polls while sessions are connected
+HEARTBEAT_INTERVAL   = 2.0    # seconds between heartbeat writes
+SESSION_TIMEOUT      = 10.0   # seconds without a touch() before the page counts as closed
+FULL_REFRESH_SECONDS = 30.0   # catalog refresh even without a watcher event
+TIMELINE_LENGTH      = 50     # journal events kept per slot for the GUI
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _pid_alive(pid_file):
+    try:
+        with open(pid_file, 'r') as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+class StateService:
+    """Polls executor state and the data tree once for all sessions."""
+
+    def __init__(self, data_dir="synced_data"):
+        self.data_dir        = data_dir
+        self._lock           = threading.Lock()
+        self._poll_lock      = threading.Lock()   # one poll at a time
+        self._slots          = {}     # pmt_id -> PmtSlot
+        self._seen_versions  = {}     # topic -> watcher version last read
+        self._slot_state     = {}     # pmt_id -> {'config', 'running', 'file_status'}
+        self._status         = {}     # pmt_id -> (journal seq, status)
+        self._timelines      = {}     # pmt_id -> deque of journal events
+        self._journal        = JournalReader(JOURNAL_FILE)
+        self._executor_alive = False
+        self._seq            = 0
+        self._snapshot       = {'seq': 0, 'slots': {}, 'executor_alive': False, 'data_version': 0}
+        self._last_touch     = 0.0
+        self._last_heartbeat = 0.0
+        self._last_full      = 0.0
+        self._wake           = threading.Event()
+        self._stop           = threading.Event()
+        self._thread         = threading.Thread(target=self._run, name="state-service", daemon=True)
+        self._thread.start()
+        self._subscriber     = StatusSubscriber(EXECUTOR_SOCKET, self._on_progress)
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def touch(self):
+        """A session is alive; keeps the heartbeat going (written at most once per interval)."""
+        now = time.time()
+        with self._lock:
+            self._last_touch = now
+            due = now - self._last_heartbeat >= HEARTBEAT_INTERVAL
+            if due:
+                self._last_heartbeat = now
+        if due:
+            write_heartbeat()
+
+    def track(self, slots):
+        """Make sure every slot is polled; new slots are read before returning."""
+        with self._lock:
+            new = [slot for slot in slots if slot.pmt_id not in self._slots]
+            for slot in new:
+                self._slots[slot.pmt_id] = slot
+        if new:
+            self.poll()
+
+    def invalidate(self):
+        """Re-read everything on the next poll (after starting/stopping executors)."""
+        with self._lock:
+            self._seen_versions.clear()
+        self.poll()
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    # ── Polling ───────────────────────────────────────────────────────────────
+
+    def _on_progress(self, pmt_id, status, seq):
+        """Status pushed by the executor over its socket."""
+        with self._lock:
+            if self._apply_status(pmt_id, status, seq):
+                self._publish()
+
+    def _apply_status(self, pmt_id, status, seq):
+        """Newest status wins by journal seq; call with the lock held."""
+        if seq is None or seq <= self._status.get(pmt_id, (0, None))[0]:
+            return False
+        self._status[pmt_id] = (seq, status)
+        return True
+
+    def _publish(self):
+        """New snapshot from the current state; call with the lock held."""
+        slots = {}
+        for pmt_id, state in self._slot_state.items():
+            status = self._status.get(pmt_id, (0, state['file_status']))[1]
+            slots[pmt_id] = {
+                'config': state['config'],
+                'running': state['running'],
+                'status': status,
+                'events': tuple(self._timelines.get(pmt_id, ())),
+            }
+        self._seq += 1
+        self._snapshot = {
+            'seq': self._seq,
+            'slots': slots,
+            'executor_alive': self._executor_alive,
+            'journal_seq': self._journal.last_seq,
+            'data_version': self._seen_versions.get('data', 0),
+        }
+
+    def poll(self):
+        """One pass over the data tree and every tracked slot."""
+        with self._poll_lock:
+            self._poll()
+
+    def _poll(self):
+        watcher = get_watcher(self.data_dir)
+        versions = watcher.versions()
+        now = time.time()
+
+        with self._lock:
+            slots = list(self._slots.values())
+            data_seen = self._seen_versions.get('data')
+            full_due = now - self._last_full >= FULL_REFRESH_SECONDS
+
+        changed = False
+        if data_seen != versions.get('data', 0) or full_due:
+            get_catalog(self.data_dir).refresh(force=True)
+            with self._lock:
+                self._seen_versions['data'] = versions.get('data', 0)
+                if full_due:
+                    self._last_full = now
+            changed = data_seen != versions.get('data', 0)
+
+        alive = _pid_alive(EXECUTOR_PID_FILE)
+        if alive != self._executor_alive:
+            self._executor_alive = alive
+            changed = True
+
+        events = self._journal.read_new()
+        if events:
+            with self._lock:
+                for event in events:
+                    pmt_id = event.get('pmt_id')
+                    self._timelines.setdefault(pmt_id, deque(maxlen=TIMELINE_LENGTH)).append(event)
+                    if 'status' in event:
+                        self._apply_status(pmt_id, event['status'], event['seq'])
+            changed = True
+
+        for slot in slots:
+            topic = f"status_{slot.pmt_id}"
+            with self._lock:
+                previous = self._slot_state.get(slot.pmt_id)
+                stale = self._seen_versions.get(topic) != versions.get(topic, 0) or previous is None
+                journaled = slot.pmt_id in self._status
+            if not stale:
+                continue
+            config = _read_json(slot.config_file)
+            state = {
+                'config': config,
+                'running': bool(config and config.get('running', False)),
+                'file_status': None if journaled else _read_json(slot.status_file),
+            }
+            with self._lock:
+                self._seen_versions[topic] = versions.get(topic, 0)
+                if state != previous:
+                    self._slot_state[slot.pmt_id] = state
+                    changed = True
+
+        if changed:
+            with self._lock:
+                self._publish()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                active = time.time() - self._last_touch < SESSION_TIMEOUT
+            if active:
+                try:
+                    self.poll()
+                except Exception:
+                    pass
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
@@ -0,0 +1,93 @@
+"""
+Station model: how many PMT slots the test stand has and what each one is
+called, coloured and backed by on disk.
+
+The GUI and the executors used to hard-code exactly two PMTs.  A station is
+now a list of PmtSlot built from the slot count in STATION_FILE, and
+everything per PMT — GUI sections, session keys, executor config, status
+and checkpoint files — is generated from it.  Slot ids stay 'pmt1', 'pmt2',
+... so existing files and session keys keep working.  One background executor serves every
+slot; its PID file and control socket (see executor_channel.py) are
+station-wide.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+STATION_FILE  = "station_config.json"
+DEFAULT_SLOTS = 2
+MAX_SLOTS     = 8
+
+EXECUTOR_PID_FILE = "executor_pid.txt"
+EXECUTOR_SOCKET   = "executor.sock"
+
+# icon, border colour, summary background, summary text colour
+SLOT_STYLES = [
+    ("🔵", "#007bff", "#cce5ff", "#004085"),
+    ("🟣", "#9C27B0", "#f3e5f5", "#6a1b9a"),
+    ("🟢", "#28a745", "#d4edda", "#155724"),
+    ("🟠", "#fd7e14", "#ffe5d0", "#8a4300"),
+    ("🔴", "#dc3545", "#f8d7da", "#721c24"),
+    ("🟡", "#e0a800", "#fff3cd", "#856404"),
+    ("🟤", "#795548", "#efebe9", "#3e2723"),
+    ("⚫", "#343a40", "#e2e3e5", "#1b1e21"),
+]
+
+PmtSlot = namedtuple('PmtSlot', ['pmt_id', 'label', 'icon', 'color', 'summary_bg', 'summary_fg',
+                                 'config_file', 'status_file', 'checkpoint_file'])
+
+
+def make_slot(index, label=None):
+    """Slot number index (0-based) with its files and colours."""
+    pmt_id = f"pmt{index + 1}"
+    icon, color, summary_bg, summary_fg = SLOT_STYLES[index % len(SLOT_STYLES)]
+    return PmtSlot(
+        pmt_id=pmt_id,
+        label=label or f"PMT {index + 1}",
+        icon=icon,
+        color=color,
+        summary_bg=summary_bg,
+        summary_fg=summary_fg,
+        config_file=f"executor_config_{pmt_id}.json",
+        status_file=f"executor_status_{pmt_id}.json",
+        checkpoint_file=f"executor_checkpoint_{pmt_id}.json",
+    )
+
+
+def load_station(slot_count=None, station_file=STATION_FILE):
+    """
+    List of PmtSlot for the station.  slot_count wins if given; otherwise
+    STATION_FILE ({"slots": 4, "labels": ["PMT A", ...]}) is read, falling
+    back to DEFAULT_SLOTS.
+    """
+    labels = []
+    if os.path.exists(station_file):
+        try:
+            with open(station_file, 'r') as f:
+                data = json.load(f)
+            labels = list(data.get('labels', []))
+            if slot_count is None:
+                slot_count = data.get('slots')
+        except Exception:
+            pass
+    try:
+        slot_count = int(slot_count or DEFAULT_SLOTS)
+    except (TypeError, ValueError):
+        slot_count = DEFAULT_SLOTS
+    slot_count = max(1, min(MAX_SLOTS, slot_count))
+    return [make_slot(i, labels[i] if i < len(labels) else None) for i in range(slot_count)]
+
+
+def save_station(slot_count, station_file=STATION_FILE):
+    """Persist the slot count, keeping any custom labels."""
+    data = {}
+    if os.path.exists(station_file):
+        try:
+            with open(station_file, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+    data['slots'] = int(slot_count)
+    with open(station_file, 'w') as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,472 @@
+"""
+Hermetic end-to-end benchmark of the executor loop and the GUI's sync path.
+
+Nothing used to let us measure polling or sync changes without the cluster.
+This runs the real background_executor.py (and, with --gui-every, the GUI's
+Manual Sync path through sync_engine.get_background_syncs()) against a local
+stand-in:
+
+  - sync_bench_bin/ holds shims for ssh, rsync, sbatch, squeue, sacct and
+    scancel that act on <bench>/remote instead of the cluster (see
+    sync_bench_bin/shim.py); they are put first on PATH
+  - a driver process plays the SLURM jobs: a submitted job waits --queue
+    seconds, publishes its run directory (runs/<job id>) like the .slurm
+    scripts, then drops one scan/HV point's charge JSON, plot and GAIN.txt
+    every --interval seconds (and appends them to the SN's manifest with
+    --manifest)
+  - this process plays the GUI: heartbeat, job submission over the control
+    socket and, with --gui-every, manual syncs whose results go to the
+    executor as 'artifacts'
+
+When every job has finished (or --timeout passes) it reports:
+
+  - point arrival -> local visibility: from the driver finishing a point on
+    the "cluster" to its files landing in synced_data/ (file ctime), and to
+    the executor reporting the point in its journal
+  - sync CPU time: the executor's and the GUI side's own CPU, and that of the
+    rsync/ssh/squeue shims per tool (shim CPU is Python's, not real rsync's;
+    compare runs with each other, not with the cluster)
+  - file-system operations: audited open/listdir/scandir/rename/... calls and
+    spawned processes of the executor and the GUI's sync thread, plus what
+    each rsync examined and wrote
+
+Usage (every run gets a fresh bench directory; --dir must be new or empty):
+
+    python sync_bench.py --scan 2 --hv 1 --interval 5 --queue 3
+    python sync_bench.py --scan 1 --manifest --gui-every 20
+
+The summary is printed and written to <bench>/bench_report.json.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import random
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+REPO_DIR    = os.path.dirname(os.path.abspath(__file__))
+SHIM_DIR    = os.path.join(REPO_DIR, "sync_bench_bin")
+MONITOR_DIR = os.path.join(REPO_DIR, "_R12860_DATA_MONITOR")
+PLOT_FILE   = os.path.join(REPO_DIR, "example_data", "GOOD_DATA_charge.png")
+
+REMOTE_HOST     = "bench"
+SCAN_POINTS     = [(0, 0)] + [(theta, phi) for theta in (10, 20, 30, 40, 50) for phi in (0, 90, 180, 270)]
+HV_VALUES       = [1500, 1550, 1600, 1650, 1700]
+DRIVER_TICK     = 0.05     # seconds between the driver's looks at the job table
+HEARTBEAT_EVERY = 2
+
+DROPS_FILE     = "drops.jsonl"
+CALLS_FILE     = "shim_calls.jsonl"
+REPORT_FILE    = "bench_report.json"
+ROLE_FILE      = "bench_{role}.json"
+FINAL_STATES   = ('complete', 'incomplete', 'failed', 'timeout', 'stopped')
+
+FS_EVENTS = {'open', 'os.listdir', 'os.scandir', 'os.remove', 'os.rename', 'os.mkdir', 'os.rmdir',
+             'os.utime', 'os.chmod', 'os.truncate', 'os.link', 'os.symlink', 'glob.glob'}
+
+
+# ── Counting ─────────────────────────────────────────────────────────────────
+
+_quiet = threading.local()      # threads of the harness itself set .on and are not counted
+
+
+def count_operations():
+    """Count this process's audited file-system calls and spawned processes from now on."""
+    counts = {}
+
+    def hook(event, args):
+        if (event in FS_EVENTS or event == 'subprocess.Popen') and not getattr(_quiet, 'on', False):
+            counts[event] = counts.get(event, 0) + 1
+    sys.addaudithook(hook)
+    return counts
+
+
+def role_summary(counts):
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'cpu_seconds':          round(usage.ru_utime + usage.ru_stime, 3),
+        'children_cpu_seconds': round(children.ru_utime + children.ru_stime, 3),
+        'fs_operations':        sum(n for event, n in counts.items() if event in FS_EVENTS),
+        'fs_by_call':           {event: n for event, n in sorted(counts.items()) if event in FS_EVENTS},
+        'processes_spawned':    counts.get('subprocess.Popen', 0),
+    }
+
+
+def write_role(role, counts):
+    _quiet.on = True
+    with open(ROLE_FILE.format(role=role), 'w') as f:
+        json.dump(role_summary(counts), f, indent=2)
+
+
+# ── Roles run as child processes ─────────────────────────────────────────────
+
+def run_executor():
+    """background_executor.main() with its operations counted."""
+    counts = count_operations()
+    atexit.register(write_role, 'executor', counts)
+    sys.argv = sys.argv[:1]          # the executor reads its socket path from argv
+    import background_executor
+    background_executor.main()
+
+
+def charge_record(sn, index, rng):
+    """A charge JSON the size and shape of the analysis scripts' artifact."""
+    edges = [round(-0.5 + 0.05 * i, 5) for i in range(121)]
+    counts = [int(rng.gauss(800, 300) * max(0.0, 1 - abs(i - 40) / 60)) for i in range(120)]
+    return json.dumps({'sn': sn, 'point': index, 'timestamp': datetime.now().isoformat(),
+                       'n_events': sum(counts), 'bin_edges': edges, 'counts': counts,
+                       'gain': round(rng.gauss(1.0e7, 1.0e6), -3)}, separators=(',', ':'))
+
+
+def write_atomic(path, data):
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def drop_point(job, index, plot, manifest, rng):
+    """Write one point's outputs into the job's run directory like the analysis does."""
+    sn, stamp = job['sn'], job['run'].split('_', 2)[-1]
+    run_dir = os.path.join(job['dir'], job['run'])
+    if job['kind'] == 'scan':
+        theta, phi = SCAN_POINTS[index]
+        point_dir = os.path.join(run_dir, sn, f"data_theta{theta}_phi{phi}")
+        stem = f"live_data_{stamp}_{sn}_theta{theta}_phi{phi}"
+        local_base = run_dir                          # synced as <SN>/data_theta*_phi*/...
+    else:
+        volts = job['hv'][index]
+        point_dir = os.path.join(run_dir, sn, f"data_HV_{volts}")
+        stem = f"hv_check_{stamp}_{sn}_HV_{volts}"
+        local_base = os.path.join(run_dir, sn)        # synced as data_HV_*/...
+    os.makedirs(point_dir, exist_ok=True)
+    paths = []
+    for suffix, data in (("_charge.json", charge_record(sn, index, rng).encode()),
+                         ("_charge.png", plot),
+                         ("_GAIN.txt", f"{rng.gauss(1.0e7, 1.0e6):.3e}".encode())):
+        paths.append(os.path.join(point_dir, stem + suffix))
+        write_atomic(paths[-1], data)
+    if manifest:
+        from artifact_manifest import record
+        record(job['dir'], sn, paths)
+    return [os.path.relpath(path, local_base) for path in paths]
+
+
+def run_driver(options):
+    """Play the SLURM jobs the shims' sbatch queued until terminated."""
+    sys.path.insert(0, SHIM_DIR)
+    sys.path.insert(0, MONITOR_DIR)
+    from shim import update_jobs
+    rng = random.Random(options.seed)
+    with open(options.plot, 'rb') as f:
+        plot = f.read()
+    playing = {}                                      # job id -> what the driver knows of it
+
+    def advance(jobs):
+        now, due = time.time(), []
+        for job_id, job in jobs['jobs'].items():
+            if job['state'] == 'PENDING' and now - job['submitted'] >= options.queue:
+                args = job['script'].split()
+                kind = 'hv' if 'HV' in args[0] else 'scan'
+                run = f"{'scan_output' if kind == 'scan' else 'HV_output'}_" \
+                      f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id}"
+                os.makedirs(os.path.join(job['dir'], "runs"), exist_ok=True)
+                with open(os.path.join(job['dir'], "runs", job_id), 'w') as f:
+                    f.write(run + "\n")
+                job.update(state='RUNNING', started=now)
+                playing[job_id] = {'dir': job['dir'], 'run': run, 'kind': kind,
+                                   'sn': args[1] if len(args) > 1 else "SN0",
+                                   'hv': [int(v) for v in args[2:]] or HV_VALUES,
+                                   'next': 0, 'due': now + options.interval}
+            elif job['state'] == 'RUNNING' and job_id in playing:
+                state = playing[job_id]
+                total = len(SCAN_POINTS[:options.scan_points]) if state['kind'] == 'scan' else len(state['hv'])
+                if state['next'] >= total:
+                    job.update(state='COMPLETED', ended=now)
+                elif now >= state['due']:
+                    due.append(job_id)
+        return due
+
+    while True:
+        for job_id in update_jobs(advance):
+            state = playing[job_id]
+            files = drop_point(state, state['next'], plot, options.manifest, rng)
+            with open(DROPS_FILE, 'a') as f:
+                f.write(json.dumps({'job_id': job_id, 'sn': state['sn'], 'kind': state['kind'],
+                                    'point': state['next'], 'ts': time.time(), 'files': files}) + "\n")
+            state['next'] += 1
+            state['due'] = time.time() + options.interval * rng.uniform(1 - options.jitter, 1 + options.jitter)
+        time.sleep(DRIVER_TICK)
+
+
+# ── The GUI's side ───────────────────────────────────────────────────────────
+
+def job_configs(options, remote):
+    """executor_config_<pmt>.json contents as the GUI writes them, one slot per job."""
+    configs = []
+    for i in range(options.scan):
+        sn = f"BENCHS{i + 1:02d}"
+        configs.append({'running': True, 'remote_host': REMOTE_HOST,
+                        'scan_remote_directory': os.path.join(remote, "SCAN_DATA"),
+                        'scan_remote_command': f"sbatch ./RUN_PMT_SCAN_DATA_MONITOR.slurm {sn}",
+                        'serial_number': sn, 'total_runs': len(SCAN_POINTS[:options.scan_points]),
+                        'interval_seconds': 5, 'job_ids': []})
+    for i in range(options.hv):
+        sn = f"BENCHH{i + 1:02d}"
+        configs.append({'running': True, 'remote_host': REMOTE_HOST,
+                        'hv_remote_directory': os.path.join(remote, "HV_CHECK"),
+                        'hv_remote_command': f"sbatch ./RUN_HV_CHECK.slurm {sn} "
+                                             + " ".join(map(str, HV_VALUES)),
+                        'serial_number': sn, 'hv_scan_values': HV_VALUES, 'total_runs': len(HV_VALUES),
+                        'interval_seconds': 5, 'job_ids': []})
+    for pmt_index, config in enumerate(configs):
+        config['pmt_id'] = f"pmt{pmt_index + 1}"
+    return configs
+
+
+def keep_heartbeat(stop):
+    from heartbeat import write_heartbeat
+    _quiet.on = True
+    while not stop.is_set():
+        write_heartbeat()
+        stop.wait(HEARTBEAT_EVERY)
+
+
+def manual_syncs(configs, every, stop):
+    """The Manual Sync buttons, pressed for every slot each `every` seconds."""
+    from sync_engine import get_background_syncs, Tree
+    from executor_channel import send_command
+    from station import EXECUTOR_SOCKET
+    from data_catalog import get_catalog
+    from sync_engine import LOCAL_DIR
+    _quiet.on = True
+
+    def finish(result):           # as R12860_LIVE_MONITORING.finish_manual_sync
+        get_catalog(LOCAL_DIR).refresh(force=True)
+        if result.files:
+            send_command(EXECUTOR_SOCKET, 'artifacts', paths=result.files)
+
+    syncs = get_background_syncs()
+    while not stop.wait(every):
+        for config in configs:
+            kind = 'hv' if 'hv_remote_directory' in config else 'scan'
+            remote_dir = config.get('hv_remote_directory') or config.get('scan_remote_directory')
+            syncs.start(f"{kind}_{config['pmt_id']}", Tree(config['remote_host'], remote_dir, kind),
+                        config['serial_number'], on_done=finish)
+
+
+def read_jsonl(path):
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
+
+
+def finished_jobs(journal_file):
+    return {event['pmt_id'] for event in read_jsonl(journal_file) if event.get('kind') in FINAL_STATES}
+
+
+# ── Report ───────────────────────────────────────────────────────────────────
+
+def spread(values):
+    from sync_scheduler import quantile
+    if not values:
+        return None
+    return {'n': len(values), 'mean': round(sum(values) / len(values), 3),
+            'p50': round(quantile(values, 0.5), 3), 'p90': round(quantile(values, 0.9), 3),
+            'max': round(max(values), 3)}
+
+
+def build_report(configs, local_dir, journal_file, gui, elapsed):
+    pmt_for_sn = {config['serial_number']: config['pmt_id'] for config in configs}
+    reported = {}
+    for event in read_jsonl(journal_file):
+        if event.get('kind') == 'points':
+            reported.setdefault(event['pmt_id'], []).append(event['ts'])
+
+    landed, announced, missing = [], [], 0
+    for drop in read_jsonl(DROPS_FILE):
+        try:
+            visible = max(os.stat(os.path.join(local_dir, path)).st_ctime for path in drop['files'])
+        except OSError:
+            missing += 1
+            continue
+        landed.append(max(0.0, visible - drop['ts']))
+        later = [ts for ts in reported.get(pmt_for_sn.get(drop['sn']), []) if ts >= visible - 0.5]
+        if later:
+            announced.append(max(0.0, min(later) - drop['ts']))
+
+    tools = {}
+    for call in read_jsonl(CALLS_FILE):
+        tool = tools.setdefault(call['tool'], {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+        tool['calls'] += 1
+        tool['wall_seconds'] = round(tool['wall_seconds'] + call['wall'], 3)
+        tool['cpu_seconds'] = round(tool['cpu_seconds'] + call['cpu'], 3)
+        if call['tool'] == 'rsync':
+            for field in ('examined', 'written', 'bytes'):
+                tool[field] = tool.get(field, 0) + call.get(field, 0)
+            mode = f"{call.get('mode')}_calls"
+            tool[mode] = tool.get(mode, 0) + 1
+        if call['tool'] == 'ssh':
+            what = f"ssh_{call.get('command') or call.get('control')}"
+            tool[what] = tool.get(what, 0) + 1
+
+    try:
+        with open(ROLE_FILE.format(role='executor')) as f:
+            executor = json.load(f)
+    except (OSError, ValueError):
+        executor = None
+    return {
+        'elapsed_seconds':          round(elapsed, 1),
+        'points_dropped':           len(landed) + missing,
+        'points_not_visible':       missing,
+        'arrival_to_local_seconds': spread(landed),
+        'arrival_to_report_seconds': spread(announced),
+        'executor':                 executor,
+        'gui':                      gui,
+        'shims':                    tools,
+    }
+
+
+def print_report(report, bench):
+    print(f"\n── Sync benchmark ({report['elapsed_seconds']} s, {bench}) ──")
+    print(f"Points dropped: {report['points_dropped']}  not visible locally: {report['points_not_visible']}")
+    for key, label in (('arrival_to_local_seconds', 'arrival → local file'),
+                       ('arrival_to_report_seconds', 'arrival → executor report')):
+        stats = report[key]
+        print(f"  {label:26}" + (" —" if not stats else
+              f" mean {stats['mean']:.2f}  p50 {stats['p50']:.2f}  p90 {stats['p90']:.2f}  max {stats['max']:.2f} s"))
+    for role in ('executor', 'gui'):
+        summary = report[role]
+        if summary:
+            print(f"  {role:9} CPU {summary['cpu_seconds']:.2f} s (+{summary['children_cpu_seconds']:.2f} s shims)  "
+                  f"fs ops {summary['fs_operations']}  processes {summary['processes_spawned']}")
+    for tool, stats in sorted(report['shims'].items()):
+        extra = ""
+        if tool == 'rsync':
+            extra = (f"  examined {stats.get('examined', 0)}  wrote {stats.get('written', 0)}  "
+                     f"{stats.get('bytes', 0) / 1e3:.0f} kB")
+        print(f"  {tool:9} {stats['calls']:5} calls  wall {stats['wall_seconds']:.2f} s  "
+              f"CPU {stats['cpu_seconds']:.2f} s{extra}")
+    print(f"Full report: {os.path.join(bench, REPORT_FILE)}")
+
+
+def run_bench(options):
+    bench = os.path.abspath(options.dir or tempfile.mkdtemp(prefix="r12860_bench_"))
+    if os.path.isdir(bench) and os.listdir(bench):
+        # An old journal, drops, checkpoints or synced_data/ would make a bogus report
+        print(f"{bench} is not empty: give a new or empty --dir")
+        return
+    remote = os.path.join(bench, "remote")
+    for sub in ("SCAN_DATA", "HV_CHECK"):
+        os.makedirs(os.path.join(remote, sub), exist_ok=True)
+    os.chdir(bench)
+    os.environ['PATH'] = SHIM_DIR + os.pathsep + os.environ.get('PATH', '')
+    os.environ['R12860_BENCH_DIR'] = bench
+    os.environ['PYTHONPATH'] = REPO_DIR + os.pathsep + os.environ.get('PYTHONPATH', '')
+
+    configs = job_configs(options, remote)
+    if not configs:
+        print("Nothing to run: give --scan and/or --hv")
+        return
+    from station import STATION_FILE, EXECUTOR_SOCKET, MAX_SLOTS
+    if len(configs) > MAX_SLOTS:
+        print(f"At most {MAX_SLOTS} jobs (station slots)")
+        return
+    with open(STATION_FILE, 'w') as f:
+        json.dump({'slots': max(2, len(configs))}, f)
+
+    from executor_channel import send_command
+    from event_journal import JOURNAL_FILE
+    _quiet.on = True
+    gui_counts = count_operations()
+    stop = threading.Event()
+    threading.Thread(target=keep_heartbeat, args=(stop,), daemon=True).start()
+    time.sleep(0.2)
+
+    me = os.path.abspath(__file__)
+    log = open("executor.log", 'a')
+    executor = subprocess.Popen([sys.executable, me, '--role', 'executor'], stdout=log, stderr=subprocess.STDOUT)
+    driver = subprocess.Popen([sys.executable, me, '--role', 'driver'] + sys.argv[1:],
+                              stdout=open("driver.log", 'a'), stderr=subprocess.STDOUT)
+    started = time.time()
+    print(f"Bench directory {bench}: {len(configs)} job(s), executor pid {executor.pid}")
+    try:
+        while not os.path.exists(EXECUTOR_SOCKET) and time.time() - started < 10:
+            time.sleep(0.1)
+        for config in configs:
+            with open(f"executor_config_{config['pmt_id']}.json", 'w') as f:
+                json.dump(config, f, indent=2)
+            reply = send_command(EXECUTOR_SOCKET, 'submit', pmt_id=config['pmt_id'], config=config)
+            print(f"  {config['pmt_id']} {config['serial_number']}: submitted ({reply})")
+        if options.gui_every:
+            threading.Thread(target=manual_syncs, args=(configs, options.gui_every, stop),
+                             daemon=True).start()
+
+        timeout = options.timeout or options.queue + 60 + 1.5 * options.interval * max(
+            len(SCAN_POINTS[:options.scan_points]) if options.scan else 0, len(HV_VALUES) if options.hv else 0)
+        wanted = {config['pmt_id'] for config in configs}
+        while time.time() - started < timeout and executor.poll() is None:
+            if wanted <= finished_jobs(JOURNAL_FILE):
+                break
+            time.sleep(0.5)
+        else:
+            print("Timed out before every job finished" if executor.poll() is None
+                  else f"Executor exited early (rc={executor.returncode}), see executor.log")
+        gui = role_summary(gui_counts)       # before the executor and driver count as our children
+    finally:
+        stop.set()
+        for proc in (executor, driver):
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+        for proc in (executor, driver):
+            try:
+                proc.wait(30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    from sync_engine import LOCAL_DIR
+    report = build_report(configs, LOCAL_DIR, JOURNAL_FILE, gui, time.time() - started)
+    with open(REPORT_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report, bench)
+
+
+def parse_options(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the executor's sync loop against a local cluster stand-in")
+    parser.add_argument('--scan', type=int, default=1, help="scan jobs to run (one PMT slot each)")
+    parser.add_argument('--hv', type=int, default=0, help="HV check jobs to run")
+    parser.add_argument('--scan-points', type=int, default=len(SCAN_POINTS), help="points per scan (max 21)")
+    parser.add_argument('--interval', type=float, default=10.0, help="seconds between a job's points")
+    parser.add_argument('--jitter', type=float, default=0.2, help="relative spread of the interval")
+    parser.add_argument('--queue', type=float, default=5.0, help="seconds a job stays PENDING")
+    parser.add_argument('--manifest', action='store_true', help="record outputs in the SN manifests")
+    parser.add_argument('--gui-every', type=float, default=0, help="seconds between manual syncs (0: none)")
+    parser.add_argument('--timeout', type=float, default=0, help="give up after this many seconds")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--plot', default=PLOT_FILE, help="PNG dropped as each point's plot")
+    parser.add_argument('--dir', help="new or empty bench directory (default: a new temporary one)")
+    parser.add_argument('--role', choices=('bench', 'executor', 'driver'), default='bench',
+                        help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    options = parse_options(sys.argv[1:])
+    if options.role == 'executor':
+        run_executor()
+    elif options.role == 'driver':
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        run_driver(options)
+    else:
+        run_bench(options)
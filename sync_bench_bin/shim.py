@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for ssh, rsync, sbatch, squeue, sacct and scancel (sync_bench.py).
+
+Each command in this directory is a symlink to this file, which acts on the
+bench directory named by R12860_BENCH_DIR instead of the cluster:
+
+    ssh      runs the remote command with sh -c here; -O check/exit and
+             master starts (-N) succeed at once
+    rsync    the subset the monitor uses: -a, -z/--skip-compress, --stats,
+             --out-format='%i %n', --include/--exclude(-from), --files-from,
+             host:path sources (globs expanded as the remote shell would)
+    sbatch   queues a job in <bench>/slurm.json (the driver runs it)
+    squeue   -h -o '%i|%T|%M|%N' -j ids: pending/running jobs
+    sacct    -n -P ... -j ids: jobs that have left the queue
+    scancel  ids or -u user: cancels pending/running jobs
+
+Every call is appended to <bench>/shim_calls.jsonl with its wall time, CPU
+time and, for rsync, how many entries it examined and files it wrote.
+"""
+
+import fnmatch
+import glob
+import json
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+BENCH_DIR  = os.environ.get("R12860_BENCH_DIR", ".")
+SLURM_FILE = os.path.join(BENCH_DIR, "slurm.json")
+CALLS_FILE = os.path.join(BENCH_DIR, "shim_calls.jsonl")
+
+ACTIVE = ("PENDING", "RUNNING")
+
+
+def log_call(tool, started, rc, **fields):
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = sum(u.ru_utime + u.ru_stime for u in (self_usage, child_usage))
+    entry = dict(fields, tool=tool, ts=time.time(), wall=round(time.monotonic() - started, 4),
+                 cpu=round(cpu, 4), rc=rc)
+    with open(CALLS_FILE, 'a') as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+# ── ssh ──────────────────────────────────────────────────────────────────────
+
+def ssh(args):
+    i, control = 0, None
+    while i < len(args) and args[i].startswith('-'):
+        flag = args[i]
+        if flag == '-O':
+            control = args[i + 1]
+            i += 2
+        elif flag in ('-o', '-p', '-l', '-i', '-F', '-S'):
+            i += 2
+        else:
+            i += 1
+    host, command = (args[i] if i < len(args) else ""), " ".join(args[i + 1:])
+    if control or not command:
+        return 0, {'host': host, 'control': control or 'master'}
+    rc = subprocess.run(['sh', '-c', command]).returncode
+    return rc, {'host': host, 'command': command.split()[0]}
+
+
+# ── rsync ────────────────────────────────────────────────────────────────────
+
+def _pattern_re(pattern):
+    out, i = "", 0
+    while i < len(pattern):
+        if pattern.startswith('**', i):
+            out, i = out + ".*", i + 2
+        elif pattern[i] == '*':
+            out, i = out + "[^/]*", i + 1
+        elif pattern[i] == '?':
+            out, i = out + "[^/]", i + 1
+        else:
+            out, i = out + re.escape(pattern[i]), i + 1
+    return out
+
+
+def _matches(pattern, rel, is_dir):
+    """rsync's filter pattern rules, as far as the monitor's filters use them."""
+    if pattern.endswith('/'):
+        if not is_dir:
+            return False
+        pattern = pattern.rstrip('/')
+    if pattern.startswith('/'):
+        return re.fullmatch(_pattern_re(pattern[1:]), rel) is not None
+    if '/' in pattern:
+        return re.fullmatch("(.*/)?" + _pattern_re(pattern), rel) is not None
+    return fnmatch.fnmatchcase(os.path.basename(rel), pattern)
+
+
+def _included(rules, rel, is_dir):
+    for sign, pattern in rules:
+        if _matches(pattern, rel, is_dir):
+            return sign == '+'
+    return True
+
+
+def rsync(args):
+    rules, files_from, compress, skip, stats, itemize = [], None, False, set(), False, False
+    positional, i = [], 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '-e':
+            i += 1                               # the transport is local
+        elif arg.startswith('--include='):
+            rules.append(('+', arg.split('=', 1)[1]))
+        elif arg.startswith('--exclude='):
+            rules.append(('-', arg.split('=', 1)[1]))
+        elif arg.startswith('--exclude-from='):
+            with open(arg.split('=', 1)[1]) as f:
+                rules += [('-', line.strip()) for line in f if line.strip()]
+        elif arg.startswith('--files-from='):
+            files_from = arg.split('=', 1)[1]
+        elif arg.startswith('--skip-compress='):
+            skip = set(arg.split('=', 1)[1].split('/'))
+        elif arg == '--stats':
+            stats = True
+        elif arg.startswith('--out-format='):
+            itemize = True
+        elif arg.startswith('--'):
+            pass
+        elif arg.startswith('-'):
+            compress = compress or 'z' in arg
+        else:
+            positional.append(arg)
+        i += 1
+    dest, rc = positional[-1], 0
+    examined = written = received = 0
+    items = []                                   # (source path, path relative to dest)
+
+    def strip_host(source):
+        head, sep, tail = source.partition(':')
+        return tail if sep and '/' not in head else source
+
+    for source in map(strip_host, positional[:-1]):
+        if files_from:
+            with open(files_from) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        rel = line.split('/./', 1)[-1]
+                        items.append((os.path.join(source, line.replace('/./', '/')), rel))
+            continue
+        matched = sorted(glob.glob(source.rstrip('/') or '/'))
+        if not matched:
+            print(f'rsync: link_stat "{source}" failed: No such file or directory (2)', file=sys.stderr)
+            rc = 23
+        for root in matched:
+            top = "" if source.endswith('/') else os.path.basename(root)
+            if top and not _included(rules, top, True):
+                continue
+            for dirpath, dirnames, filenames in os.walk(root):
+                base = os.path.relpath(dirpath, root)
+                base = top if base == '.' else os.path.join(top, base) if top else base
+                examined += len(dirnames) + len(filenames)
+                dirnames[:] = [d for d in dirnames if _included(rules, os.path.join(base, d), True)]
+                items += [(os.path.join(dirpath, name), os.path.join(base, name))
+                          for name in filenames if _included(rules, os.path.join(base, name), False)]
+
+    for source, rel in items:
+        try:
+            stat = os.stat(source)
+        except OSError:
+            print(f'rsync: link_stat "{source}" failed: No such file or directory (2)', file=sys.stderr)
+            rc = 23
+            continue
+        target = os.path.join(dest, rel)
+        try:
+            local = os.stat(target)
+            if local.st_size == stat.st_size and int(local.st_mtime) == int(stat.st_mtime):
+                continue                         # rsync's quick check
+            change = ">f.st......"
+        except OSError:
+            change = ">f+++++++++"
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.bench")
+        shutil.copy2(source, tmp)
+        os.replace(tmp, target)
+        with open(source, 'rb') as f:
+            data = f.read()
+        ext = os.path.splitext(rel)[1].lstrip('.').lower()
+        received += len(zlib.compress(data, 6)) if compress and ext not in skip else len(data)
+        written += 1
+        if itemize:
+            print(f"{change} {rel}")
+    if stats:
+        print(f"\nNumber of files: {examined or len(items)}")
+        print(f"Number of regular files transferred: {written}")
+        print(f"Total bytes received: {received:,}")
+    return rc, {'examined': examined + len(items), 'written': written, 'bytes': received,
+                'mode': 'files-from' if files_from else 'filter'}
+
+
+# ── SLURM ────────────────────────────────────────────────────────────────────
+
+def update_jobs(change):
+    """change(jobs) under the lock the driver also takes; returns its result."""
+    with open(SLURM_FILE + ".lock", 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(SLURM_FILE) as f:
+                jobs = json.load(f)
+        except (OSError, ValueError):
+            jobs = {'next_id': 1000, 'jobs': {}}
+        result = change(jobs)
+        tmp = SLURM_FILE + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(jobs, f, indent=1)
+        os.replace(tmp, SLURM_FILE)
+        return result
+
+
+def _elapsed(job):
+    if not job.get('started'):
+        return 0
+    return int((job.get('ended') or time.time()) - job['started'])
+
+
+def _job_ids(args):
+    ids = []
+    for i, arg in enumerate(args):
+        if arg == '-j' and i + 1 < len(args):
+            ids += args[i + 1].split(',')
+        elif arg.startswith('-j') and len(arg) > 2:
+            ids += arg[2:].split(',')
+    return ids
+
+
+def sbatch(args):
+    def submit(jobs):
+        job_id = str(jobs['next_id'])
+        jobs['next_id'] += 1
+        jobs['jobs'][job_id] = {'state': 'PENDING', 'submitted': time.time(), 'dir': os.getcwd(),
+                                'script': " ".join(args)}
+        return job_id
+    job_id = update_jobs(submit)
+    print(f"Submitted batch job {job_id}")
+    return 0, {'job_id': job_id}
+
+
+def squeue(args):
+    ids = _job_ids(args)
+    jobs = update_jobs(lambda jobs: jobs['jobs'])
+    for job_id in ids or sorted(jobs):
+        job = jobs.get(job_id)
+        if job and job['state'] in ACTIVE:
+            elapsed = _elapsed(job)
+            node = "bench1" if job['state'] == 'RUNNING' else ""
+            print(f"{job_id}|{job['state']}|{elapsed // 60}:{elapsed % 60:02d}|{node}")
+    return 0, {'jobs': len(ids)}
+
+
+def sacct(args):
+    ids = _job_ids(args)
+    jobs = update_jobs(lambda jobs: jobs['jobs'])
+    for job_id in ids:
+        job = jobs.get(job_id)
+        if job:
+            elapsed = _elapsed(job)
+            print(f"{job_id}|{job['state']}|{elapsed // 3600:02d}:{elapsed // 60 % 60:02d}:"
+                  f"{elapsed % 60:02d}|{'bench1' if job.get('started') else 'None assigned'}")
+    return 0, {'jobs': len(ids)}
+
+
+def scancel(args):
+    ids = [arg for arg in args if not arg.startswith('-')]
+    everything = '-u' in args
+
+    def cancel(jobs):
+        cancelled = 0
+        for job_id, job in jobs['jobs'].items():
+            if job['state'] in ACTIVE and (everything or job_id in ids):
+                job['state'], job['ended'] = 'CANCELLED', time.time()
+                cancelled += 1
+        return cancelled
+    return 0, {'cancelled': update_jobs(cancel)}
+
+
+TOOLS = {'ssh': ssh, 'rsync': rsync, 'sbatch': sbatch, 'squeue': squeue, 'sacct': sacct,
+         'scancel': scancel}
+
+
+if __name__ == "__main__":
+    tool = os.path.basename(sys.argv[0])
+    if tool not in TOOLS:
+        print(f"usage: symlink this file as one of {', '.join(TOOLS)}")
+        sys.exit(2)
+    started = time.monotonic()
+    rc, fields = TOOLS[tool](sys.argv[1:])
+    sys.stdout.flush()
+    log_call(tool, started, rc, **fields)
+    sys.exit(rc)
@@ -0,0 +1,363 @@
+"""
+One sync engine for the background executor and the GUI's Manual Sync.
+
+Before this, background_executor.sync_from_remote and the GUI's
+sync_from_spartan were two copies of the same logic.  Both ran the scan
+rsync and then the HV rsync on every call, whatever the job was, and the
+PMT executors and the Manual Sync buttons could all write into synced_data/
+at once, with the button blocking the page for up to 240 s.
+
+A sync is now asked for per tree: Tree(host, remote_dir, kind, run), with
+kind 'scan' (scan_output_*/<SN>) or 'hv' (HV_output_*/<SN>).  A SLURM job
+writes all its points into one run directory and publishes its name in
+<remote_dir>/runs/<job id> (see published_run); with run set, the fallback
+rsync reads only that directory, however many runs the cluster holds.
+Requests are merged per (host, remote_dir, kind), whatever their run: the
+merged rsync lists the union of the requested run directories.
+Only the tree the job needs is synced, and:
+
+  - different trees sync concurrently; each tree's writers to the local
+    directory take that tree's lock file (<local_dir>.<kind>.lock, flock),
+    so the executor and the GUI never rsync the same tree at the same time
+  - requests for a tree that arrive while its sync is waiting for the lock
+    join that sync: PMT1 and PMT2 asking for their SNs of one tree get a
+    single manifest round plus one rsync with both SNs' files
+  - where the cluster keeps manifests (manifest_sync.py) only the listed
+    files are fetched; SNs without one fall back to one include/exclude
+    rsync over all their directories
+  - results the retention janitor evicted are never fetched again, and
+    everything fetched is noted for it (sync_ledger.py)
+
+BackgroundSyncs runs the engine on its own event loop thread for callers
+that are not async (the GUI), with per-request progress: the phase and the
+number of files received so far.
+"""
+
+import asyncio
+import os
+import re
+import shlex
+import signal
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from functools import partial
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from executor_metrics import get_metrics
+from manifest_sync import CURSOR_FILE, RSYNC_PARTIAL, read_new, transfer, save_cursors, local_path
+from rsync_changes import COMPRESS_OPTION, ITEMIZE_OPTION, STATS_OPTION, received_files, bytes_received, point_key
+from ssh_pool import get_ssh_pool, ssh_command, rsync_ssh
+from sync_ledger import get_sync_ledger
+
+LOCAL_DIR               = "synced_data/"
+COMMAND_TIMEOUT         = 120        # seconds for one ssh/rsync call
+RSYNC_CONNECTION_ERRORS = {12, 255}  # rsync exit codes for a lost ssh connection
+LOCK_POLL_SECONDS       = 0.2
+RUNS_DIR                = "runs"
+
+# kind: 'scan' | 'hv'; run: the job's scan_output_<id> / HV_output_<id> directory, if known
+Tree       = namedtuple('Tree', 'host remote_dir kind run', defaults=(None,))
+SyncResult = namedtuple('SyncResult', 'ok message files')
+
+FILTERS = {
+    'scan': ("--include='*/' --include='*_charge.png' --include='*_charge.json' "
+             "--include='*_GAIN.txt' --exclude='*'"),
+    'hv':   ("--include='*/' --include='HV_output_*/' --include='*/data_HV_*/' "
+             "--include='*_charge.png' --include='*_charge.json' --include='*_GAIN.txt' "
+             "--include='*_gain_vs_hv_loglog.png' --include='*_HV_at_gain_*.txt' --exclude='*'"),
+}
+
+
+# ── Subprocesses ─────────────────────────────────────────────────────────────
+
+def kill_group(proc):
+    """Kill the shell and everything it started."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+async def run_shell(cmd, timeout=COMMAND_TIMEOUT, on_line=None):
+    """
+    Run cmd in an async subprocess; returns (returncode, stdout, stderr),
+    returncode None on timeout.  on_line(line) sees stdout as it is written.
+    """
+    proc = await asyncio.create_subprocess_shell(
+        cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        start_new_session=True
+    )
+
+    async def read_stdout():
+        lines = []
+        async for raw in proc.stdout:
+            line = raw.decode(errors='replace')
+            lines.append(line)
+            if on_line:
+                on_line(line)
+        return "".join(lines)
+
+    try:
+        stdout, stderr, _ = await asyncio.wait_for(
+            asyncio.gather(read_stdout(), proc.stderr.read(), proc.wait()), timeout)
+    except asyncio.TimeoutError:
+        kill_group(proc)
+        await proc.wait()
+        return None, "", "timed out"
+    except asyncio.CancelledError:
+        kill_group(proc)       # caller stopped mid-command: don't leave ssh/rsync behind
+        raise
+    return proc.returncode, stdout, stderr.decode(errors='replace')
+
+
+# ── Commands ─────────────────────────────────────────────────────────────────
+
+_RUN_RE = re.compile(r'^(scan_output|HV_output)_[\w.-]+$')
+
+
+async def published_run(host, remote_dir, job_id):
+    """The run directory SLURM job job_id published under remote_dir/runs/, or None."""
+    command = f"cat {shlex.quote(f'{remote_dir}/{RUNS_DIR}/{job_id}')}"
+    rc, out, _ = await run_shell(f"{ssh_command(host)} {shlex.quote(command)}" if host else command)
+    run = out.strip() if rc == 0 else ""
+    return run if _RUN_RE.match(run) else None
+
+
+def sources(tree, sns, runs=None):
+    """
+    Remote rsync sources for the SNs (None: every SN) of one tree.  runs maps
+    an SN to the run directories asked for it (None among them: search them
+    all); without it tree.run applies to every SN.
+    """
+    every_run = 'scan_output_*' if tree.kind == 'scan' else 'HV_output_*'
+    slash = "" if tree.kind == 'scan' else "/"
+    paths = []
+    for sn in sns:
+        wanted = runs.get(sn, {None}) if runs is not None else {tree.run}
+        for outputs in sorted({every_run} if None in wanted else wanted):
+            path = f"{tree.remote_dir}/{outputs}/{sn}{slash}" if sn else f"{tree.remote_dir}/{outputs}/"
+            if path not in paths:
+                paths.append(path)
+    return " ".join(f"{tree.host}:{path}" if tree.host else path for path in paths)
+
+
+def rsync_command(tree, sns, local_dir, exclude_file=None, runs=None):
+    """One include/exclude rsync over every listed SN's directories (minus exclude_file's paths)."""
+    shell = f"{rsync_ssh()} " if tree.host else ""
+    # Excludes first: rsync stops at the first matching rule
+    excludes = f"--exclude-from={shlex.quote(exclude_file)} " if exclude_file else ""
+    return (f"rsync -a {COMPRESS_OPTION} {shell}{ITEMIZE_OPTION} {STATS_OPTION} {excludes}{FILTERS[tree.kind]} "
+            f"{sources(tree, sns, runs)} {local_dir}")
+
+
+@asynccontextmanager
+async def tree_lock(local_dir, kind):
+    """Exclusive, cross-process lock for writing one tree into local_dir."""
+    with open(f"{local_dir.rstrip('/')}.{kind}.lock", 'a') as f:
+        while fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(LOCK_POLL_SECONDS)    # polled, so a waiting caller can be cancelled
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ── Engine ───────────────────────────────────────────────────────────────────
+
+class _Batch:
+    """Requests for one tree that will share a transfer."""
+
+    def __init__(self):
+        self.sns      = set()
+        self.runs     = {}     # sn -> run directories asked for (None: search them all)
+        self.progress = []
+        self.future   = asyncio.get_running_loop().create_future()
+
+    def report(self, message, files):
+        for callback in self.progress:
+            try:
+                callback(message, files)
+            except Exception:
+                pass
+
+
+class SyncEngine:
+    """Per-tree syncs into local_dir, merged and serialised as described above."""
+
+    def __init__(self, local_dir=LOCAL_DIR, cursor_file=CURSOR_FILE, ledger=None):
+        self.local_dir   = local_dir
+        self.cursor_file = cursor_file
+        self.ledger      = ledger or get_sync_ledger()
+        self._pending    = {}      # (host, remote_dir, kind) -> _Batch still waiting for its lock
+        self._tasks      = set()
+
+    async def sync(self, tree, sn=None, progress=None):
+        """Sync SN's files (every SN if None) of tree; progress(message, files) as it goes."""
+        # Keyed without the run: PMTs on different SLURM jobs of one tree still share a batch
+        tree, run = tree._replace(run=None), tree.run
+        batch = self._pending.get(tree)
+        if batch is None:
+            batch = self._pending[tree] = _Batch()
+            task = asyncio.create_task(self._run(tree, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.sns.add(sn)
+        batch.runs.setdefault(sn, set()).add(run)
+        if progress:
+            batch.progress.append(progress)
+        # One requester giving up does not cancel the transfer the others wait for
+        return await asyncio.shield(batch.future)
+
+    async def _run(self, tree, batch):
+        try:
+            batch.report("Waiting for other syncs…", 0)
+            async with tree_lock(self.local_dir, tree.kind):
+                del self._pending[tree]      # later requests start the next batch
+                result = await self._transfer(tree, batch)
+        except Exception as e:
+            if self._pending.get(tree) is batch:
+                del self._pending[tree]
+            result = SyncResult(False, f"Sync error: {e}", [])
+        if not batch.future.done():
+            batch.future.set_result(result)
+
+    async def _transfer(self, tree, batch):
+        if tree.host:
+            await asyncio.to_thread(get_ssh_pool().ensure, tree.host)
+        received = []
+
+        def on_line(line):
+            if received_files(line):
+                received.append(line)
+                batch.report(f"Receiving {tree.kind} files…", len(received))
+
+        run = partial(run_shell, on_line=on_line)
+        files, ok, notes = [], True, []
+        evicted = set(self.ledger.excluded())
+
+        # Exactly the files published since the last sync, where the SN has a manifest
+        full = [None] if None in batch.sns else []
+        if not full:
+            batch.report("Reading manifests…", 0)
+            sns = sorted(batch.sns)
+            listings = await asyncio.gather(*(read_new(run_shell, tree.host, tree.remote_dir, sn,
+                                                       self.cursor_file) for sn in sns))
+            full = [sn for sn, listing in zip(sns, listings) if listing is None]
+            listings = [listing for listing in listings if listing is not None]
+            paths = [path for _, _, listed in listings for path in listed
+                     if local_path(path) not in evicted]
+            sent = True
+            if paths:
+                started = time.monotonic()
+                sent, out = await transfer(run, tree.host, tree.remote_dir, paths, self.local_dir)
+                self._measure(tree, 'manifest', started, out)
+                files += received_files(out)
+                ok = ok and sent
+                notes.append(f"{len(paths)} listed" if sent else "manifest rsync failed")
+            if listings and sent:
+                save_cursors({key: cursor for key, cursor, _ in listings}, self.cursor_file)
+
+        # Otherwise let rsync search the tree's output directories
+        if full:
+            batch.report(f"Searching {tree.kind} outputs…", len(received))
+            started = time.monotonic()
+            excluded = [path for path in evicted if None in full or any(sn in path for sn in full)]
+            exclude_file = None
+            if excluded:
+                fd, exclude_file = tempfile.mkstemp(prefix="sync_exclude_", suffix=".txt")
+                with os.fdopen(fd, 'w') as f:
+                    f.write("".join(f"/{path}\n" for path in excluded))
+            try:
+                rc, out, _ = await run(rsync_command(tree, full, self.local_dir, exclude_file, batch.runs))
+            finally:
+                if exclude_file:
+                    os.remove(exclude_file)
+            self._measure(tree, 'full', started, out)
+            if rc in RSYNC_CONNECTION_ERRORS and tree.host:
+                get_ssh_pool().failed(tree.host)
+            files += received_files(out or "")
+            ok = ok and (rc == 0 or rc in RSYNC_PARTIAL)   # partial: one SN has no outputs yet
+            notes.append("full sync" if rc == 0 else f"rsync rc={rc}")
+
+        self.ledger.record_fetched(files)
+        message = f"{'Sync OK' if ok else 'Sync failed'} ({tree.kind}: {', '.join(notes) or 'nothing new'})"
+        return SyncResult(ok, message, files)
+
+    def _measure(self, tree, mode, started, out):
+        metrics = get_metrics()
+        received, elapsed = bytes_received(out), time.monotonic() - started
+        metrics.observe('sync_seconds', elapsed, mode=mode, kind=tree.kind)
+        metrics.inc('sync_bytes_total', received)
+        # Each point has its own data_* directory, whichever SN or run it is under
+        points = {os.path.dirname(path) for path in received_files(out or "") if point_key(path)}
+        if points:
+            metrics.observe('bytes_per_point', received / len(points), kind=tree.kind)
+            metrics.observe('seconds_per_point', elapsed / len(points), kind=tree.kind)
+
+
+# ── Background syncs for the GUI ─────────────────────────────────────────────
+
+class BackgroundSyncs:
+    """Runs a SyncEngine on its own event loop thread; progress per request key."""
+
+    def __init__(self, local_dir=LOCAL_DIR):
+        self.engine  = SyncEngine(local_dir)
+        self._lock   = threading.Lock()
+        self._status = {}      # key -> {state, message, files, started, finished}
+        self._loop   = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True, name="background-sync").start()
+
+    def start(self, key, tree, sn=None, on_done=None):
+        """Start a sync unless key's last one is still running; on_done(result) runs in the sync thread."""
+        with self._lock:
+            if (self._status.get(key) or {}).get('state') == 'running':
+                return False
+            self._status[key] = {'state': 'running', 'message': 'Starting…', 'files': 0,
+                                 'started': time.time(), 'finished': None}
+        asyncio.run_coroutine_threadsafe(self._run(key, tree, sn, on_done), self._loop)
+        return True
+
+    def status(self, key):
+        with self._lock:
+            status = self._status.get(key)
+            return dict(status) if status else None
+
+    def _update(self, key, **fields):
+        with self._lock:
+            self._status[key].update(fields)
+
+    async def _run(self, key, tree, sn, on_done):
+        try:
+            result = await self.engine.sync(
+                tree, sn, lambda message, files: self._update(key, message=message, files=files))
+            if on_done:
+                await asyncio.to_thread(on_done, result)
+        except Exception as e:
+            result = SyncResult(False, f"Sync error: {e}", [])
+        self._update(key, state='done' if result.ok else 'failed', message=result.message,
+                     files=len(result.files), finished=time.time())
+
+
+_background      = None
+_background_lock = threading.Lock()
+
+
+def get_background_syncs(local_dir=LOCAL_DIR):
+    """Process-wide background sync runner, started on first use."""
+    global _background
+    with _background_lock:
+        if _background is None:
+            _background = BackgroundSyncs(local_dir)
+        return _background
@@ -0,0 +1,179 @@
+"""
+Local ledger of what was synced into synced_data/ and what was evicted.
+
+The retention janitor deletes results past the age or size limit, and the
+next full rsync of scan_output_*/<SN> saw them missing and fetched them
+again, so old data kept bouncing between the cluster and the local disk
+(rsync -a also keeps the cluster's mtime, so a re-fetched old file was
+straight away old enough to evict again).  The sync engine and the janitor
+now share LEDGER_FILE, an append-only JSON-lines log of
+
+    {"op": "fetched", "ts": 1767225600.0, "paths": ["SN1/data_theta0_phi0/..."]}
+    {"op": "evicted", "ts": 1767229200.0, "paths": [...]}
+
+with paths relative to synced_data/, and agree on two rules:
+
+  - an evicted point result is excluded from every later sync (rsync
+    --exclude-from, and dropped from manifest transfers), so steady-state
+    traffic is only new results
+  - a file's age, for the janitor, runs from when it was fetched, not from
+    the cluster's mtime, so what a sync brings in stays for the full
+    retention time
+
+Only per-point results (the *_charge.png/json and *_GAIN.txt of one scan or
+HV point, whose names carry their run's timestamp) are excluded.  Summary
+plots a new run rewrites under the same name are fetched again.
+
+The GUI process (janitor, manual sync) and the executor both append, under
+flock; each process folds in what the others appended since its last read.
+Evictions older than EVICTED_KEEP_DAYS are dropped when the log is
+compacted, by then the cluster has normally archived those runs.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LEDGER_FILE       = "sync_ledger.jsonl"
+COMPACT_LINES     = 5000     # rewrite the log as a snapshot past this many lines
+EVICTED_KEEP_DAYS = 90
+
+POINT_RESULT_RE = re.compile(r'_(theta\d+_phi\d+|HV_\d+)_(charge\.png|charge\.json|GAIN\.txt)$')
+
+
+def is_point_result(path):
+    """A file only its own scan/HV point run produces (safe to exclude once evicted)."""
+    return bool(POINT_RESULT_RE.search(path))
+
+
+class SyncLedger:
+    """Fetched/evicted state folded from the shared log."""
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path     = path
+        self._lock    = threading.Lock()
+        self._fetched = {}     # path -> time fetched
+        self._evicted = {}     # path -> time evicted
+        self._offset  = 0
+        self._inode   = None
+        self._lines   = 0
+        self._compacted = 0    # lines in the log right after the last compaction
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def record_fetched(self, paths):
+        self._append('fetched', paths)
+
+    def record_evicted(self, paths):
+        self._append('evicted', paths)
+
+    def fetched_at(self, path):
+        """When path was last fetched (None if not through a ledgered sync)."""
+        with self._lock:
+            self._refresh()
+            return self._fetched.get(path)
+
+    def fetched_times(self):
+        with self._lock:
+            self._refresh()
+            return dict(self._fetched)
+
+    def excluded(self, sn=None):
+        """Evicted point results (of serial number sn only, if given) that syncs must skip."""
+        with self._lock:
+            self._refresh()
+            return sorted(path for path in self._evicted
+                          if is_point_result(path) and (not sn or sn in path))
+
+    # ── Log ───────────────────────────────────────────────────────────────────
+
+    def _apply(self, entry):
+        paths, ts = entry.get('paths') or [], entry.get('ts', 0)
+        if entry.get('op') == 'fetched':
+            for path in paths:
+                self._fetched[path] = ts
+                self._evicted.pop(path, None)
+        elif entry.get('op') == 'evicted':
+            for path in paths:
+                self._evicted[path] = ts
+                self._fetched.pop(path, None)
+
+    def _refresh(self):
+        """Fold in what was appended since the last read (all of it if the log was replaced)."""
+        try:
+            with open(self.path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                inode = stat.st_ino
+                if inode != self._inode or stat.st_size < self._offset:
+                    self._fetched, self._evicted = {}, {}
+                    self._offset, self._lines, self._inode = 0, 0, inode
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return
+        end = data.rfind(b'\n') + 1          # a partial last line waits for the next read
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, AttributeError):
+                pass
+            self._lines += 1
+        self._offset += end
+
+    def _append(self, op, paths):
+        if not paths:
+            return
+        line = json.dumps({'op': op, 'ts': time.time(), 'paths': list(paths)}) + "\n"
+        with self._lock:
+            try:
+                while True:
+                    with open(self.path, 'a') as f:
+                        if fcntl is not None:
+                            fcntl.flock(f, fcntl.LOCK_EX)
+                        if os.fstat(f.fileno()).st_ino != os.stat(self.path).st_ino:
+                            continue      # compacted by another process while we waited
+                        f.write(line)
+                        f.flush()
+                        self._refresh()
+                        if self._lines > max(COMPACT_LINES, 2 * self._compacted):
+                            self._compact()
+                        return
+            except OSError as e:
+                print(f"  Sync ledger not updated: {e}")
+
+    def _compact(self):
+        """Rewrite the log as one snapshot (caller holds the log's flock)."""
+        cutoff = time.time() - EVICTED_KEEP_DAYS * 86400
+        entries = []
+        for op, state in (('fetched', self._fetched), ('evicted', self._evicted)):
+            by_time = {}
+            for path, ts in state.items():
+                if op == 'fetched' or ts >= cutoff:
+                    by_time.setdefault(ts, []).append(path)
+            entries += [{'op': op, 'ts': ts, 'paths': paths} for ts, paths in sorted(by_time.items())]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        os.replace(tmp, self.path)
+        self._refresh()
+        self._compacted = self._lines
+
+
+_ledger      = None
+_ledger_lock = threading.Lock()
+
+
+def get_sync_ledger(path=LEDGER_FILE):
+    """Process-wide ledger."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = SyncLedger(path)
+        return _ledger
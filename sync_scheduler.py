@@ -0,0 +1,153 @@
+"""
+Adaptive sync scheduling from learned point arrival times.
+
+The monitoring loop used to rsync every 30 s for up to 720 cycles, so a
+point was seen up to 30 s after it landed and an idle job still synced twice
+a minute for six hours.  ArrivalModel remembers, per job type ('hv' or
+'scan') and per point index, how long each point took after the previous one
+(or after submission, for the first point) over the last HISTORY_RUNS runs,
+and persists that in MODEL_FILE.  A SyncScheduler uses it for one job:
+
+  - while the next point is due (between the LOW_QUANTILE and HIGH_QUANTILE
+    gap after the last arrival) it syncs about WINDOW_SYNCS times across the
+    window, but never more often than every FAST_INTERVAL seconds
+  - before that nothing is expected, so it sleeps until just before the
+    window opens
+  - once the point is overdue it backs off exponentially from FAST_INTERVAL
+  - all delays are capped at MAX_INTERVAL; with no history at all it falls
+    back to DEFAULT_INTERVAL
+
+predicted_arrival() is the median expectation for the next point, and a job
+times out after MAX_WAIT_SECONDS without a new point.
+"""
+
+import json
+import os
+import time
+
+MODEL_FILE       = "sync_schedule.json"
+HISTORY_RUNS     = 20      # gaps kept per point index
+DEFAULT_INTERVAL = 30      # seconds, used until something has been learned
+FAST_INTERVAL    = 5
+WINDOW_SYNCS     = 6       # syncs spread over the due window
+MAX_INTERVAL     = 120
+MAX_WAIT_SECONDS = 6 * 3600
+LOW_QUANTILE     = 0.1
+HIGH_QUANTILE    = 0.9
+
+
+def job_type(config):
+    """'hv' for HV checks, 'scan' for 21-point scans."""
+    return 'hv' if config.get('hv_remote_command') or config.get('hv_remote_directory') else 'scan'
+
+
+def quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ArrivalModel:
+    """Per job type, per point index: recent seconds between consecutive points."""
+
+    def __init__(self, path=MODEL_FILE):
+        self.path  = path
+        self.gaps  = {'hv': {}, 'scan': {}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                for kind in self.gaps:
+                    self.gaps[kind] = {int(k): list(v) for k, v in data.get(kind, {}).items()}
+            except Exception:
+                pass
+
+    def record(self, kind, index, gap):
+        history = self.gaps.setdefault(kind, {}).setdefault(index, [])
+        history.append(round(gap, 1))
+        del history[:-HISTORY_RUNS]
+
+    def window(self, kind, index):
+        """(low, median, high) seconds after the previous point, or None if nothing learned."""
+        history = self.gaps.get(kind, {}).get(index)
+        if not history:
+            history = [gap for gaps in self.gaps.get(kind, {}).values() for gap in gaps]
+        if not history:
+            return None
+        return quantile(history, LOW_QUANTILE), quantile(history, 0.5), quantile(history, HIGH_QUANTILE)
+
+    def save(self):
+        data = {kind: {str(k): v for k, v in gaps.items()} for kind, gaps in self.gaps.items()}
+        try:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+
+class SyncScheduler:
+    """When to sync next for one job."""
+
+    def __init__(self, model, kind, started=None, index=0):
+        self.model        = model
+        self.kind         = kind
+        self.index        = index                      # next point expected
+        self.last_arrival = time.time() if started is None else started   # submission, then each point
+        self.last_sync    = self.last_arrival
+        self.backoff      = None
+
+    def record(self, arrived, now=None):
+        """arrived new points were found by the sync that just finished; returns the gap per point."""
+        now = time.time() if now is None else now
+        if arrived <= 0:
+            return None
+        # The points landed after the previous sync.  Right after a fast sync
+        # the middle is a good guess; after a long sleep only "by now" is known
+        # (next_delay wakes a little before the window, so that bound shrinks
+        # the window when points come early instead of confirming it)
+        if now - self.last_sync <= 2 * FAST_INTERVAL:
+            landed = (self.last_sync + now) / 2
+        else:
+            landed = now
+        gap = max(0.0, landed - self.last_arrival) / arrived
+        for _ in range(arrived):
+            self.model.record(self.kind, self.index, gap)
+            self.index += 1
+        self.last_arrival = landed
+        self.backoff = None
+        self.model.save()
+        return gap
+
+    def restart(self, now=None):
+        """The SLURM job has just started: time the first point from now, not from submission."""
+        if self.index == 0:
+            self.last_arrival = self.last_sync = time.time() if now is None else now
+            self.backoff = None
+
+    def synced(self, now=None):
+        self.last_sync = time.time() if now is None else now
+
+    def predicted_arrival(self):
+        window = self.model.window(self.kind, self.index)
+        return None if window is None else self.last_arrival + window[1]
+
+    def timed_out(self, now=None):
+        now = time.time() if now is None else now
+        return now - self.last_arrival >= MAX_WAIT_SECONDS
+
+    def next_delay(self, now=None):
+        """Seconds to sleep before the next sync."""
+        now = time.time() if now is None else now
+        window = self.model.window(self.kind, self.index)
+        if window is None:
+            return DEFAULT_INTERVAL
+        due_from, due_until = self.last_arrival + window[0], self.last_arrival + window[2]
+        if now <= due_until and now >= due_from - FAST_INTERVAL:
+            self.backoff = None
+            step = (due_until - due_from) / WINDOW_SYNCS
+            return max(FAST_INTERVAL, min(DEFAULT_INTERVAL, step))
+        if now < due_from - FAST_INTERVAL:
+            return max(FAST_INTERVAL, min(MAX_INTERVAL, due_from - FAST_INTERVAL - now))
+        self.backoff = min(MAX_INTERVAL, (self.backoff or FAST_INTERVAL) * 2)   # overdue
+        return self.backoff
@@ -0,0 +1,106 @@
+"""
+Bytes and sync time per data point, before and after the size-optimised outputs.
+
+Each scan/HV point brings a charge plot, a charge JSON and a GAIN.txt across
+the link from the cluster.  The analysis now writes the plot as a palette
+PNG at R12860_PNG_DPI (_R12860_DATA_MONITOR/compact_png.py) and the sync
+compresses only the text records on the wire (rsync_changes.COMPRESS_OPTION).
+This report shows what that is worth on data already synced:
+
+    python transfer_report.py [local_dir] [link_kbit_s]
+
+  - before: the point files as stored, plots at the size they were written
+  - after:  the same plots re-encoded with the current compact_png settings
+  - wire:   text records as zlib would send them (rsync -z), plots as-is
+  - time:   wire bytes at link_kbit_s (default LINK_KBIT_S)
+
+and, if the executor has run, the bytes and seconds per point it measured
+(executor_metrics.jsonl).  Points synced before and after the change can be
+compared by pointing it at the matching directories.
+"""
+
+import io
+import os
+import sys
+import zlib
+from collections import defaultdict
+
+from rsync_changes import point_key
+from sync_engine import LOCAL_DIR
+from executor_metrics import read_latest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "_R12860_DATA_MONITOR"))
+from compact_png import PNG_DPI, PNG_COLORS, quantize_png
+
+LINK_KBIT_S = 2000
+WRITTEN_DPI = 150      # what the plots were saved at when the PNG carries no dpi
+
+
+def point_files(local_dir):
+    """{point directory: [file paths]} for every scan/HV point under local_dir."""
+    points = defaultdict(list)
+    for root, _, names in os.walk(local_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if point_key(path) or name.endswith('_GAIN.txt'):
+                points[root].append(path)
+    return {point: files for point, files in points.items()
+            if any(point_key(path) for path in files)}
+
+
+def sizes(path):
+    """(stored bytes, optimised bytes, wire bytes before, wire bytes after) for one file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not path.endswith('.png'):
+        wire = len(zlib.compress(data, 6))
+        return len(data), len(data), wire, wire
+    try:
+        from PIL import Image
+        dpi = (Image.open(io.BytesIO(data)).info.get('dpi') or (WRITTEN_DPI,))[0] or WRITTEN_DPI
+        scale = min(1.0, PNG_DPI / round(dpi))
+        optimised = len(quantize_png(data, scale=scale))
+    except Exception as e:
+        print(f"  {os.path.basename(path)}: not re-encoded ({e})")
+        optimised = len(data)
+    return len(data), optimised, len(data), optimised
+
+
+def report(local_dir=LOCAL_DIR, link_kbit_s=LINK_KBIT_S):
+    points = point_files(local_dir)
+    if not points:
+        print(f"No scan or HV points under {local_dir}")
+    else:
+        totals = [0, 0, 0, 0]
+        for files in points.values():
+            for path in files:
+                for i, value in enumerate(sizes(path)):
+                    totals[i] += value
+        n = len(points)
+        seconds = lambda size: size * 8 / (link_kbit_s * 1000)
+        print(f"{n} points under {local_dir}  (PNG {PNG_DPI} dpi, {PNG_COLORS or 'full'} colours, "
+              f"link {link_kbit_s} kbit/s)")
+        print(f"  {'':8}{'stored/point':>14}{'wire/point':>14}{'time/point':>12}")
+        print(f"  {'before':8}{totals[0] / n / 1e3:>11.1f} kB{totals[2] / n / 1e3:>11.1f} kB"
+              f"{seconds(totals[2] / n):>10.2f} s")
+        print(f"  {'after':8}{totals[1] / n / 1e3:>11.1f} kB{totals[3] / n / 1e3:>11.1f} kB"
+              f"{seconds(totals[3] / n):>10.2f} s")
+        if totals[2]:
+            print(f"  saving  {100 * (1 - totals[3] / totals[2]):.0f}% of the bytes on the wire")
+
+    snapshot = read_latest()
+    measured = (snapshot or {}).get('metrics', {})
+    if measured.get('bytes_per_point'):
+        print("Measured by the executor (mean since it started):")
+        seconds_per_point = {tuple(sorted(e['labels'].items())): e for e in measured.get('seconds_per_point', [])}
+        for entry in measured['bytes_per_point']:
+            timing = seconds_per_point.get(tuple(sorted(entry['labels'].items())))
+            line = f"  {entry['labels'].get('kind', '?'):5} {entry['sum'] / entry['count'] / 1e3:8.1f} kB/point"
+            if timing:
+                line += f"  {timing['sum'] / timing['count']:6.2f} s/point"
+            print(line + f"  over {entry['count']} syncs")
+
+
+if __name__ == "__main__":
+    report(sys.argv[1] if len(sys.argv) > 1 else LOCAL_DIR,
+           float(sys.argv[2]) if len(sys.argv) > 2 else LINK_KBIT_S)